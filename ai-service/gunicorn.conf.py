@@ -0,0 +1,112 @@
+"""
+Gunicorn Configuration - Multi-worker runtime for the AI service
+Loads the app, taxonomies, lookup tables and models once in the master, then forks
+workers that share them copy-on-write. Worker count follows the container's CPU quota.
+
+While the master preloads, it answers liveness itself on the bound socket:
+/health returns 200 within about a second of start (after main's own import),
+and everything else returns 503 until the workers take over.
+
+Run with: gunicorn main:app  (this file is picked up from the working directory)
+"""
+
+import gc
+import json
+import logging
+import os
+import selectors
+import threading
+
+from src.runtime import available_cpus, default_worker_count
+
+bind = f"0.0.0.0:{os.getenv('PORT', 8000)}"
+workers = default_worker_count()
+worker_class = 'uvicorn_worker.UvicornWorker'
+
+# Import main:app (settings, taxonomy, palette, routers) before forking
+preload_app = True
+
+# Avatar generation runs for seconds; keep the worker timeout well above it
+timeout = int(os.getenv('WORKER_TIMEOUT_SECONDS', 120))
+graceful_timeout = int(os.getenv('WORKER_GRACEFUL_TIMEOUT_SECONDS', 30))
+keepalive = 5
+
+# One BLAS/OpenMP thread per worker: the workers already use every core
+if workers > 1:
+    for variable in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS'):
+        os.environ.setdefault(variable, '1')
+
+class PreloadHealthResponder:
+    """Answers probes on the listening sockets while the master preloads
+
+    Gunicorn binds before when_ready but only accepts once workers are forked,
+    so without this /health would hang for the whole preload. The thread is
+    joined before returning: nothing but the main thread may exist at fork.
+    """
+
+    def __init__(self, listeners):
+        self.listeners = listeners
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._serve, name='preload-health', daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def _serve(self):
+        with selectors.DefaultSelector() as selector:
+            for listener in self.listeners:
+                selector.register(listener.sock, selectors.EVENT_READ)
+            while not self._stop.is_set():
+                for key, _ in selector.select(timeout=0.1):
+                    try:
+                        connection, _ = key.fileobj.accept()
+                    except (BlockingIOError, InterruptedError):
+                        continue  # Another process took it
+                    with connection:
+                        self._respond(connection)
+
+    @staticmethod
+    def _respond(connection):
+        try:
+            connection.settimeout(1.0)
+            request_line = connection.recv(4096).split(b'\r\n', 1)[0].decode('latin-1').split()
+            path = request_line[1].split('?', 1)[0] if len(request_line) > 1 else ''
+            if path == '/health':
+                status = '200 OK'
+                body = {'status': 'OK', 'service': 'ai-service', 'version': '1.0.0'}
+            else:
+                status = '503 Service Unavailable'
+                body = {'detail': 'Service warming up'}
+
+            payload = json.dumps(body).encode()
+            connection.sendall(
+                f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\nContent-Length: {len(payload)}\r\n"
+                f"Retry-After: 1\r\nConnection: close\r\n\r\n".encode() + payload
+            )
+        except OSError:
+            pass
+
+def when_ready(server):
+    """Warm shared state in the master, right before the workers are forked"""
+
+    import main
+    from src.services.model_registry import model_registry
+
+    # Routers (NumPy, PIL, analyzers) and models load here once instead of per worker
+    with PreloadHealthResponder(server.LISTENERS):
+        main.load_routers()
+        if model_registry.preload:
+            model_registry.load_all()
+
+    # Move everything allocated so far out of GC tracking, so collections in the
+    # workers don't write to (and un-share) the preloaded pages
+    gc.freeze()
+
+    logging.getLogger('gunicorn.error').info(
+        f"Preloaded models for {workers} workers ({available_cpus():g} CPUs available)"
+    )
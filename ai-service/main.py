@@ -1,19 +1,33 @@
+import asyncio
+import json
 import logging
 import os
 from typing import Any, Dict, List
 
-import uvicorn
 from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-# Import avatar routes
-from src.routes.avatar_routes import router as avatar_router
-from src.routes.garment_routes import router as garment_router
+from src.config import settings
+from src.content_encoding import CompressionMiddleware
+from src.lifecycle import lifecycle
+from src.services.idempotency import idempotency_store
+from src.services.job_queue import job_queue
+from src.services.model_registry import model_registry
+from src.services.progress_service import progress_broker
+from src.services.rate_limiter import rate_limiter
+from src.services.single_flight import SingleFlight
+from src.startup import startup_tracker
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# A drain file surviving an in-place container restart would keep the new
+# server draining forever. Cleared here, in the gunicorn master (preload) or the
+# single uvicorn process, never in a worker respawned during a real drain.
+lifecycle.clear_drain_file()
+
 app = FastAPI(
     title="Wardrobe AI - AI Service",
     description="Python microservice for AI-powered fashion analytics and recommendations",
@@ -29,9 +43,112 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Include routers
-app.include_router(avatar_router, prefix="/api")
-app.include_router(garment_router, prefix="/api")
+# Negotiated zstd/brotli/gzip compression for responses above the size threshold
+app.add_middleware(CompressionMiddleware, minimum_size=settings.compression_min_size)
+
+# API routers pull in NumPy, PIL and the analyzers: they are imported after the
+# process is up (or before forking under gunicorn), never on the liveness path.
+# Heavy third-party modules are listed first so the report attributes their cost.
+ROUTER_MODULES = [
+    'numpy',
+    'PIL.Image',
+    'src.routes.avatar_routes',
+    'src.routes.garment_routes',
+    'src.routes.media_routes',
+    'src.routes.progress_routes'
+]
+
+@app.api_route(
+    "/api/{path:path}",
+    methods=["GET", "POST", "PUT", "PATCH", "DELETE"],
+    include_in_schema=False
+)
+async def api_warming_up(path: str):
+    """Placeholder until the API routers are mounted"""
+    raise HTTPException(status_code=503, detail="Service warming up", headers={"Retry-After": "1"})
+
+def _mount_routers(modules: List[Any]) -> None:
+    """Swap the warming-up placeholder for the real API routers"""
+    app.router.routes[:] = [
+        route for route in app.router.routes
+        if getattr(route, 'endpoint', None) is not api_warming_up
+    ]
+    startup_tracker.mount(
+        app,
+        [module for module in modules if hasattr(module, 'router')],
+        prefix="/api"
+    )
+
+def load_routers() -> None:
+    """Import and mount the API routers now (gunicorn preload, scripts and tests)"""
+    if not startup_tracker.routers_loaded:
+        _mount_routers(startup_tracker.import_modules(ROUTER_MODULES))
+
+async def warm_up() -> None:
+    """Background cold start: routers, then job workers, then models"""
+    try:
+        if not startup_tracker.routers_loaded:
+            # Imports run off the event loop so /health answers meanwhile
+            modules = await run_in_threadpool(startup_tracker.import_modules, ROUTER_MODULES)
+            _mount_routers(modules)
+
+        # Job handlers are registered by the service modules imported above
+        await job_queue.start()
+
+        if model_registry.preload:
+            await run_in_threadpool(model_registry.load_all)
+        startup_tracker.mark('warm')
+    except Exception as e:
+        startup_tracker.error = str(e)
+        logger.error(f"Warm-up failed: {str(e)}")
+
+@app.on_event("startup")
+async def start_warm_up():
+    startup_tracker.mark('up')
+    asyncio.create_task(warm_up())
+
+# Runs before the store shutdown handlers below, so in-flight work can still use them
+@app.on_event("shutdown")
+async def drain():
+    lifecycle.begin_drain()
+    await lifecycle.wait_idle()
+    # Running jobs get what is left of the deadline, then are requeued for another instance
+    await job_queue.stop(timeout=lifecycle.remaining())
+    logger.info(
+        f"Drained: lifecycle={json.dumps(lifecycle.status())} "
+        f"rate_limiting={json.dumps(rate_limiter.stats()['rejected'])} "
+        f"recommendation_flight={json.dumps(recommendation_flight.stats())}"
+    )
+
+# Progress channels shared with the worker processes that run the jobs
+@app.on_event("startup")
+async def start_progress_broker():
+    await progress_broker.start()
+
+@app.on_event("shutdown")
+async def stop_progress_broker():
+    await progress_broker.stop()
+
+# Idempotency-Key records for retried uploads
+@app.on_event("startup")
+async def start_idempotency_store():
+    await idempotency_store.start()
+
+@app.on_event("shutdown")
+async def stop_idempotency_store():
+    await idempotency_store.stop()
+
+# Token buckets for admission control of expensive endpoints
+@app.on_event("startup")
+async def start_rate_limiter():
+    await rate_limiter.start()
+
+@app.on_event("shutdown")
+async def stop_rate_limiter():
+    await rate_limiter.stop()
+
+# Identical recommendation requests fired in a burst are computed once
+recommendation_flight = SingleFlight('recommend-outfit')
 
 # Pydantic models
 class HealthResponse(BaseModel):
@@ -64,9 +181,9 @@ class OutfitRecommendationResponse(BaseModel):
 # Health check endpoint
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
-    """Health check endpoint for Kubernetes readiness/liveness probes"""
+    """Liveness probe: answers as soon as the process is up, before the analyzers are warm"""
     return HealthResponse(
-        status="OK",
+        status="draining" if lifecycle.draining else "OK",
         service="ai-service",
         version="1.0.0"
     )
@@ -101,40 +218,73 @@ async def recommend_outfit(request: OutfitRecommendationRequest):
     This is a placeholder implementation for initial deployment
     """
     try:
-        # Mock response for initial deployment
-        return OutfitRecommendationResponse(
-            outfit_id="mock_outfit_123",
-            garments=[
-                {
-                    "id": "garment_1",
-                    "type": "shirt",
-                    "color": "blue",
-                    "style": "casual"
-                },
-                {
-                    "id": "garment_2",
-                    "type": "jeans",
-                    "color": "dark_blue",
-                    "style": "slim_fit"
-                }
-            ],
-            confidence_score=0.92,
-            style_notes="A classic casual look perfect for everyday wear"
-        )
+        key = json.dumps(request.model_dump(), sort_keys=True, default=str)
+        return await recommendation_flight.do(key, lambda: _build_outfit_recommendation(request))
     except Exception as e:
         logger.error(f"Error in outfit recommendation: {str(e)}")
         raise HTTPException(status_code=500, detail="Outfit recommendation failed")
 
+async def _build_outfit_recommendation(request: OutfitRecommendationRequest) -> OutfitRecommendationResponse:
+    """Compute one outfit recommendation"""
+
+    # Mock response for initial deployment
+    return OutfitRecommendationResponse(
+        outfit_id="mock_outfit_123",
+        garments=[
+            {
+                "id": "garment_1",
+                "type": "shirt",
+                "color": "blue",
+                "style": "casual"
+            },
+            {
+                "id": "garment_2",
+                "type": "jeans",
+                "color": "dark_blue",
+                "style": "slim_fit"
+            }
+        ],
+        confidence_score=0.92,
+        style_notes="A classic casual look perfect for everyday wear"
+    )
+
 @app.get("/models/status")
 async def get_models_status():
-    """Get the status of AI models (placeholder for actual model loading)"""
-    return {
-        "style_analyzer": "loaded",
-        "outfit_recommender": "loaded",
-        "color_extractor": "loaded",
-        "last_updated": "2025-09-07T14:05:00Z"
-    }
+    """Get the real load state, load time and memory of registered AI models"""
+    return model_registry.status()
+
+@app.post("/models/{model_name}/reload")
+async def reload_model(model_name: str):
+    """Hot-swap a model from its configured weights without a restart"""
+    try:
+        await run_in_threadpool(model_registry.swap, model_name)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown model: {model_name}")
+    except Exception as e:
+        logger.error(f"Model reload failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Model reload failed: {str(e)}")
+    return model_registry.status()['models'][model_name]
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: 503 until the API routers are mounted and all required models are warm, and again once draining"""
+    if lifecycle.draining:
+        raise HTTPException(status_code=503, detail="Draining")
+    if not startup_tracker.routers_loaded:
+        raise HTTPException(status_code=503, detail="Routes loading")
+    if not model_registry.is_ready():
+        raise HTTPException(status_code=503, detail="Models loading")
+    return {"status": "ready"}
+
+@app.get("/startup")
+async def startup_report():
+    """Cold start report: time to up/routes_loaded/warm and per-module import cost"""
+    return startup_tracker.report()
+
+startup_tracker.mark('app_imported')
 
 if __name__ == "__main__":
+    import uvicorn
+
     port = int(os.getenv("PORT", 8000))
     uvicorn.run(app, host="0.0.0.0", port=port)
@@ -0,0 +1,80 @@
+"""
+Request Authentication - Caller identity from the JWT the backend forwards
+Verifies HS256 tokens signed with the shared JWT_SECRET; never trusts user IDs sent as request data
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import time
+from typing import Optional
+
+from fastapi import HTTPException, Request
+from starlette.requests import HTTPConnection
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+def _b64url_decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + '=' * (-len(segment) % 4))
+
+def verified_jwt_user(token: str, secret: str) -> Optional[str]:
+    """userId claim of an unexpired HS256 JWT signed with secret (as issued by the backend), else None"""
+
+    try:
+        header, payload, signature = token.split('.')
+        if json.loads(_b64url_decode(header)).get('alg') != 'HS256':
+            return None
+        expected = hmac.new(secret.encode(), f"{header}.{payload}".encode(), hashlib.sha256).digest()
+        if not hmac.compare_digest(expected, _b64url_decode(signature)):
+            return None
+        claims = json.loads(_b64url_decode(payload))
+        if 'exp' in claims and claims['exp'] < time.time():
+            return None
+        user_id = claims.get('userId')
+        return str(user_id) if user_id is not None else None
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+class RequestAuthenticator:
+    """Resolves the user behind a request from its bearer token"""
+
+    def __init__(self):
+        # Shared with the backend that issues the tokens it forwards
+        self.jwt_secret = os.getenv('JWT_SECRET')
+        if not self.jwt_secret:
+            logger.warning("JWT_SECRET not set: requests cannot be authenticated")
+
+    def user_id(self, connection: HTTPConnection, allow_query_token: bool = False) -> Optional[str]:
+        """Verified user of the bearer token, None when absent or invalid
+
+        allow_query_token also accepts ?access_token=, for EventSource and
+        WebSocket clients that cannot set headers.
+        """
+
+        if not self.jwt_secret:
+            return None
+
+        authorization = connection.headers.get('authorization', '')
+        if authorization.lower().startswith('bearer '):
+            token = authorization[7:].strip()
+        elif allow_query_token and connection.query_params.get('access_token'):
+            token = connection.query_params['access_token']
+        else:
+            return None
+        return verified_jwt_user(token, self.jwt_secret)
+
+    async def require_user(self, request: Request) -> str:
+        """Dependency: the verified user, or 401"""
+
+        user_id = self.user_id(request)
+        if user_id is None:
+            raise HTTPException(status_code=401, detail="Authentication required",
+                                headers={'WWW-Authenticate': 'Bearer'})
+        return user_id
+
+# Export the authenticator
+authenticator = RequestAuthenticator()
@@ -0,0 +1,120 @@
+"""
+Application Configuration - Process-wide immutable settings and garment taxonomy
+Loaded once from the environment and data files, then shared by services and routes
+"""
+
+import json
+import os
+import tempfile
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import FrozenSet, Mapping, Tuple
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+def storage_dir(env_var: str, default_name: str) -> str:
+    """Writable directory from env_var, defaulting to the temp dir outside production
+
+    Production (NODE_ENV=production) must mount and configure a real volume:
+    a temp-dir default there silently loses files on restart, so it fails instead.
+    """
+
+    path = os.getenv(env_var)
+    if path:
+        return path
+    if os.getenv('NODE_ENV') == 'production':
+        raise RuntimeError(f"{env_var} must be set in production")
+    return os.path.join(tempfile.gettempdir(), default_name)
+
+@dataclass(frozen=True)
+class UploadLimits:
+    """Accepted image formats, size and dimensions for one kind of upload"""
+
+    supported_formats: Tuple[str, ...]
+    max_file_size: int
+    min_dimension: int
+    format_set: FrozenSet[str] = field(init=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, 'format_set', frozenset(self.supported_formats))
+
+    @property
+    def max_file_size_label(self) -> str:
+        return f"{self.max_file_size // (1024 * 1024)}MB"
+
+@dataclass(frozen=True)
+class GarmentTaxonomy:
+    """Garment categories, types and tag vocabularies with precomputed indexes"""
+
+    categories: Mapping[str, Tuple[str, ...]]
+    subcategories: Mapping[str, str]
+    seasons: Tuple[str, ...]
+    occasions: Tuple[str, ...]
+    type_to_category: Mapping[str, str] = field(init=False)
+    garment_types: FrozenSet[str] = field(init=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, 'type_to_category', MappingProxyType({
+            garment_type: category
+            for category, types in self.categories.items()
+            for garment_type in types
+        }))
+        object.__setattr__(self, 'garment_types', frozenset(self.type_to_category))
+
+    @classmethod
+    def from_file(cls, path: str) -> 'GarmentTaxonomy':
+        """Load the taxonomy JSON (categories, subcategories, seasons, occasions)"""
+
+        with open(path, 'r', encoding='utf-8') as taxonomy_file:
+            data = json.load(taxonomy_file)
+
+        return cls(
+            categories=MappingProxyType({
+                category: tuple(types) for category, types in data['categories'].items()
+            }),
+            subcategories=MappingProxyType(dict(data.get('subcategories', {}))),
+            seasons=tuple(data['seasons']),
+            occasions=tuple(data['occasions'])
+        )
+
+    def category_of(self, garment_type: str) -> str:
+        return self.type_to_category.get(garment_type, 'unknown')
+
+    def subcategory_of(self, garment_type: str) -> str:
+        return self.subcategories.get(garment_type, 'general')
+
+@dataclass(frozen=True)
+class Settings:
+    """Immutable process-wide settings"""
+
+    garment_upload: UploadLimits
+    avatar_upload: UploadLimits
+    taxonomy: GarmentTaxonomy
+    color_palette_path: str
+    color_lut_cache_dir: str
+    compression_min_size: int
+
+    @classmethod
+    def from_env(cls) -> 'Settings':
+        """Read settings once from the environment and data files"""
+
+        formats = tuple(
+            fmt.strip().lower()
+            for fmt in os.getenv('SUPPORTED_IMAGE_FORMATS', '.jpg,.jpeg,.png,.webp').split(',')
+            if fmt.strip()
+        )
+        max_file_size = int(os.getenv('MAX_UPLOAD_SIZE_MB', 10)) * 1024 * 1024
+
+        return cls(
+            garment_upload=UploadLimits(formats, max_file_size, min_dimension=100),
+            avatar_upload=UploadLimits(formats, max_file_size, min_dimension=200),
+            taxonomy=GarmentTaxonomy.from_file(
+                os.getenv('GARMENT_TAXONOMY_PATH', os.path.join(DATA_DIR, 'garment_taxonomy.json'))
+            ),
+            color_palette_path=os.getenv('COLOR_PALETTE_PATH', os.path.join(DATA_DIR, 'color_palette.json')),
+            color_lut_cache_dir=storage_dir('COLOR_LUT_CACHE_DIR', 'wardrobe_color_lut'),
+            compression_min_size=int(os.getenv('COMPRESSION_MIN_SIZE', 1024))
+        )
+
+# Export the settings
+settings = Settings.from_env()
@@ -0,0 +1,256 @@
+"""
+Content Encoding - Negotiated gzip/brotli/zstd response compression
+Compresses dynamic responses on the fly and serves precompressed variants of immutable artifacts
+"""
+
+import os
+import zlib
+from typing import Dict, Iterable, Optional
+
+from fastapi import Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Optional codecs (gzip is always available)
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+# Server preference when the client weighs encodings equally
+ENCODINGS = tuple(
+    encoding for encoding, available in (('zstd', ZSTD_AVAILABLE), ('br', BROTLI_AVAILABLE), ('gzip', True))
+    if available
+)
+
+# Precompressed files live next to the original: manifest.json -> manifest.json.br
+FILE_SUFFIXES = {'zstd': '.zst', 'br': '.br', 'gzip': '.gz'}
+
+# Fast levels for per-request compression, maximum levels for write-once artifacts
+DYNAMIC_LEVELS = {'zstd': 3, 'br': 4, 'gzip': 6}
+STATIC_LEVELS = {'zstd': 19, 'br': 11, 'gzip': 9}
+
+COMPRESSIBLE_TYPES = frozenset([
+    'application/json',
+    'application/msgpack',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+    'model/gltf+json',
+    'model/gltf-binary'
+])
+
+# Large bodies are compressed off the event loop
+THREAD_MINIMUM_SIZE = 128 * 1024
+
+class _BrotliStream:
+    """brotli.Compressor with the compress()/flush() interface of zlib"""
+
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.finish()
+
+def compressor(encoding: str, level: Optional[int] = None):
+    """Streaming compressor exposing compress(chunk) and flush()"""
+
+    level = DYNAMIC_LEVELS[encoding] if level is None else level
+    if encoding == 'gzip':
+        return zlib.compressobj(level, zlib.DEFLATED, 31)
+    if encoding == 'br':
+        return _BrotliStream(level)
+    if encoding == 'zstd':
+        return zstandard.ZstdCompressor(level=level).compressobj()
+    raise ValueError(f"Unsupported content encoding: {encoding}")
+
+def compress(data: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    """Compress a complete body with one encoding"""
+
+    stream = compressor(encoding, level)
+    return stream.compress(data) + stream.flush()
+
+def precompress(data: bytes) -> Dict[str, bytes]:
+    """Every available encoding of data at maximum level, keeping only those that shrink it"""
+
+    variants = {}
+    for encoding in ENCODINGS:
+        encoded = compress(data, encoding, STATIC_LEVELS[encoding])
+        if len(encoded) < len(data):
+            variants[encoding] = encoded
+    return variants
+
+def negotiate_encoding(accept_encoding: Optional[str], available: Iterable[str] = ENCODINGS) -> Optional[str]:
+    """Best encoding from available for an Accept-Encoding header (None means identity)"""
+
+    if not accept_encoding:
+        return None
+
+    weights: Dict[str, float] = {}
+    for coding in accept_encoding.split(','):
+        name, _, params = coding.partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.partition('=')
+            if key.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        weights[name.strip().lower()] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in available:
+        quality = weights.get(encoding, weights.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+def write_precompressed(path: str, data: bytes, write) -> None:
+    """Write data to path and its smaller precompressed siblings via write(path, bytes)"""
+
+    write(path, data)
+    for encoding, encoded in precompress(data).items():
+        write(path + FILE_SUFFIXES[encoding], encoded)
+
+def precompressed_response(
+    request: Request,
+    variants: Dict[str, bytes],
+    media_type: str,
+    headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """Serve the negotiated variant of an in-memory body ('identity' key holds the raw bytes)"""
+
+    encoding = negotiate_encoding(
+        request.headers.get('accept-encoding'),
+        [encoding for encoding in ENCODINGS if encoding in variants]
+    )
+    headers = dict(headers or {}, Vary='Accept-Encoding')
+    if encoding:
+        headers['Content-Encoding'] = encoding
+    return Response(variants[encoding or 'identity'], media_type=media_type, headers=headers)
+
+def precompressed_file_response(
+    request: Request,
+    path: str,
+    media_type: str,
+    headers: Optional[Dict[str, str]] = None
+) -> FileResponse:
+    """Serve the negotiated precompressed sibling of a stored file, or the file itself"""
+
+    encoding = negotiate_encoding(
+        request.headers.get('accept-encoding'),
+        [encoding for encoding in ENCODINGS if os.path.exists(path + FILE_SUFFIXES[encoding])]
+    )
+    headers = dict(headers or {}, Vary='Accept-Encoding')
+    if encoding:
+        headers['Content-Encoding'] = encoding
+        path += FILE_SUFFIXES[encoding]
+    return FileResponse(path, media_type=media_type, headers=headers)
+
+class CompressionMiddleware:
+    """ASGI middleware compressing compressible responses above a size threshold
+
+    Single-message bodies are compressed whole (with an exact Content-Length);
+    streaming bodies are compressed chunk by chunk without buffering. Responses
+    that already carry a Content-Encoding (precompressed artifacts) pass through.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get('accept-encoding'))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        await _CompressionResponder(self.app, encoding, self.minimum_size)(scope, receive, send)
+
+class _CompressionResponder:
+    """Per-request state of CompressionMiddleware"""
+
+    def __init__(self, app: ASGIApp, encoding: str, minimum_size: int):
+        self.app = app
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.send: Optional[Send] = None
+        self.start_message: Optional[Message] = None
+        self.stream = None
+        self.passthrough = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    async def send_compressed(self, message: Message) -> None:
+        message_type = message['type']
+
+        if message_type == 'http.response.start':
+            headers = Headers(raw=message['headers'])
+            media_type = headers.get('content-type', '').partition(';')[0].strip().lower()
+            compressible = media_type.startswith('text/') and media_type != 'text/event-stream' \
+                or media_type in COMPRESSIBLE_TYPES
+            self.passthrough = not compressible or 'content-encoding' in headers or message['status'] == 206
+            if self.passthrough:
+                await self.send(message)
+            else:
+                # Held back until the first body chunk decides the headers
+                self.start_message = message
+            return
+
+        if self.passthrough or message_type != 'http.response.body':
+            await self.send(message)
+            return
+
+        body = message.get('body', b'')
+        more_body = message.get('more_body', False)
+
+        if self.start_message is not None:
+            start_message, self.start_message = self.start_message, None
+            headers = MutableHeaders(raw=start_message['headers'])
+            headers.add_vary_header('Accept-Encoding')
+
+            if not more_body and len(body) < self.minimum_size:
+                await self.send(start_message)
+                await self.send(message)
+                return
+
+            self.stream = compressor(self.encoding)
+            body = await self._compress(body, more_body)
+            headers['Content-Encoding'] = self.encoding
+            if more_body:
+                del headers['Content-Length']
+            else:
+                headers['Content-Length'] = str(len(body))
+            await self.send(start_message)
+        else:
+            body = await self._compress(body, more_body)
+
+        await self.send({'type': 'http.response.body', 'body': body, 'more_body': more_body})
+
+    async def _compress(self, body: bytes, more_body: bool) -> bytes:
+        if len(body) >= THREAD_MINIMUM_SIZE:
+            return await run_in_threadpool(self._compress_sync, body, more_body)
+        return self._compress_sync(body, more_body)
+
+    def _compress_sync(self, body: bytes, more_body: bool) -> bytes:
+        compressed = self.stream.compress(body)
+        return compressed if more_body else compressed + self.stream.flush()
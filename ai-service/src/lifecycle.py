@@ -0,0 +1,115 @@
+"""
+Service Lifecycle - Graceful draining for rolling deploys
+Tracks in-flight expensive work, refuses new work while draining and waits for it with a deadline.
+Draining starts on shutdown, or for every worker at once when the drain file appears
+(created by the Kubernetes preStop hook before SIGTERM).
+"""
+
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+from fastapi import HTTPException
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+class Lifecycle:
+    """Process drain state and in-flight counters per operation"""
+
+    def __init__(self):
+        # Must stay below the server's graceful timeout (gunicorn graceful_timeout,
+        # Kubernetes terminationGracePeriodSeconds)
+        self.drain_timeout = float(os.getenv('SHUTDOWN_DRAIN_TIMEOUT_SECONDS', 25))
+        self.drain_file = os.getenv('DRAIN_FILE', '/tmp/ai-service.draining')
+        self.drain_file_check_interval = 1.0
+        self.poll_interval = 0.1
+        self._draining = False
+        self._drain_file_checked = 0.0
+        self._drain_started: Optional[float] = None
+        self._in_flight: Dict[str, int] = {}
+
+    @property
+    def draining(self) -> bool:
+        """True once this process started draining or the shared drain file exists"""
+
+        if not self._draining and self.drain_file:
+            # Stat the file at most once per interval, not on every request
+            now = time.monotonic()
+            if now - self._drain_file_checked >= self.drain_file_check_interval:
+                self._drain_file_checked = now
+                if os.path.exists(self.drain_file):
+                    self.begin_drain()
+        return self._draining
+
+    def clear_drain_file(self) -> None:
+        """Remove a drain file left by a previous run (once per server start, before any worker)"""
+
+        if self.drain_file:
+            try:
+                os.unlink(self.drain_file)
+                logger.info(f"Removed stale drain file {self.drain_file}")
+            except FileNotFoundError:
+                pass
+
+    @asynccontextmanager
+    async def track(self, operation: str) -> AsyncIterator[None]:
+        """Count an expensive operation as in flight; refused with 503 once draining"""
+
+        if self.draining:
+            raise HTTPException(
+                status_code=503,
+                detail="Service is draining, retry on another instance",
+                headers={'Retry-After': '1', 'Connection': 'close'}
+            )
+
+        self._in_flight[operation] = self._in_flight.get(operation, 0) + 1
+        try:
+            yield
+        finally:
+            self._in_flight[operation] -= 1
+
+    def in_flight(self) -> int:
+        return sum(self._in_flight.values())
+
+    def begin_drain(self) -> None:
+        """Stop admitting new expensive work (idempotent)"""
+
+        if not self._draining:
+            self._draining = True
+            self._drain_started = time.monotonic()
+            logger.info(f"Draining: {self.in_flight()} operations in flight, deadline {self.drain_timeout:.0f}s")
+
+    def remaining(self) -> float:
+        """Seconds left until the drain deadline"""
+
+        if self._drain_started is None:
+            return self.drain_timeout
+        return max(0.0, self.drain_timeout - (time.monotonic() - self._drain_started))
+
+    async def wait_idle(self) -> bool:
+        """Wait for in-flight operations to finish; False if the deadline passed first"""
+
+        while self.in_flight() and self.remaining() > 0:
+            await asyncio.sleep(self.poll_interval)
+
+        if self.in_flight():
+            logger.warning(f"Drain deadline reached with {self.in_flight()} operations in flight")
+            return False
+        return True
+
+    def status(self) -> Dict[str, Any]:
+        """Drain state for health reporting"""
+
+        return {
+            'draining': self.draining,
+            'in_flight': {operation: count for operation, count in self._in_flight.items() if count},
+            'drain_timeout_seconds': self.drain_timeout,
+            'drain_remaining_seconds': round(self.remaining(), 1) if self.draining else None
+        }
+
+# Export the lifecycle
+lifecycle = Lifecycle()
@@ -0,0 +1,143 @@
+"""
+Fast Responses - orjson-backed JSON and compact MessagePack wire formats
+Serializes NumPy scalars/arrays natively; falls back to the stdlib json module
+"""
+
+import json
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+# Optional fast serializer (responses stay correct without it)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+MSGPACK_MEDIA_TYPE = 'application/msgpack'
+_MSGPACK_MEDIA_TYPES = frozenset([MSGPACK_MEDIA_TYPE, 'application/x-msgpack', 'application/vnd.msgpack'])
+_JSON_MEDIA_RANGES = frozenset(['application/json', 'application/*', '*/*'])
+
+def _default(obj: Any) -> Any:
+    """Encode types neither serializer handles on its own"""
+
+    if hasattr(obj, 'tolist'):
+        # NumPy scalars and arrays (checked by duck type so NumPy is not imported here)
+        return obj.tolist()
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def dumps(content: Any) -> bytes:
+    """Serialize content to compact UTF-8 JSON bytes"""
+
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(
+            content,
+            default=_default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        )
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson (NumPy-aware)
+
+    Returning this from a route bypasses FastAPI's jsonable_encoder pass and
+    response_model re-validation, so use it only where the service already
+    builds the documented shape.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+class MsgPackResponse(JSONResponse):
+    """MessagePack response (NumPy-aware); requires the msgpack package"""
+
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        return msgpack.packb(content, default=_default, use_bin_type=True)
+
+def accepts_msgpack(accept: Optional[str]) -> bool:
+    """True when the Accept header ranks MessagePack at least as high as JSON"""
+
+    if not accept or not MSGPACK_AVAILABLE:
+        return False
+
+    msgpack_q = json_q = 0.0
+    for media_range in accept.split(','):
+        media_type, _, params = media_range.partition(';')
+        media_type = media_type.strip().lower()
+
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.partition('=')
+            if key.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+
+        if media_type in _MSGPACK_MEDIA_TYPES:
+            msgpack_q = max(msgpack_q, quality)
+        elif media_type in _JSON_MEDIA_RANGES:
+            json_q = max(json_q, quality)
+
+    return msgpack_q > 0 and msgpack_q >= json_q
+
+def encode_columnar(
+    rows: List[Dict[str, Any]],
+    dictionaries: Optional[Dict[str, Sequence[Any]]] = None
+) -> Dict[str, Any]:
+    """Column-oriented view of rows; dictionary columns become small integer codes
+
+    Dictionaries are seeded with a fixed vocabulary so codes stay stable
+    across pages and clients can cache them; unseen values are appended.
+    List-valued cells (e.g. seasons) are encoded element-wise.
+    """
+
+    names: Dict[str, None] = {}
+    for row in rows:
+        names.update(dict.fromkeys(row))
+    columns = {name: [row.get(name) for row in rows] for name in names}
+
+    used_dictionaries = {}
+    for name, vocabulary in (dictionaries or {}).items():
+        if name not in columns:
+            continue
+
+        values = list(vocabulary)
+        codes = {value: code for code, value in enumerate(values)}
+
+        def encode(value: Any) -> Optional[int]:
+            if value is None:
+                return None
+            if value not in codes:
+                codes[value] = len(values)
+                values.append(value)
+            return codes[value]
+
+        columns[name] = [
+            [encode(item) for item in cell] if isinstance(cell, list) else encode(cell)
+            for cell in columns[name]
+        ]
+        used_dictionaries[name] = values
+
+    return {
+        'count': len(rows),
+        'columns': columns,
+        'dictionaries': used_dictionaries
+    }
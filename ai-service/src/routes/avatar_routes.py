@@ -7,10 +7,21 @@ import logging
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
+from fastapi import (APIRouter, Depends, File, Form, Header, HTTPException,
+                     Request, UploadFile)
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 
+from ..auth import authenticator
+from ..config import settings
+from ..lifecycle import lifecycle
+from ..responses import FastJSONResponse
 from ..services.avatar_service import avatar_service
+from ..services.idempotency import (IdempotencyConflict, idempotency_store, is_replayed,
+                                    request_fingerprint)
+from ..services.job_queue import job_queue
+from ..services.progress_service import progress_broker
+from ..services.rate_limiter import rate_limiter
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -39,9 +50,24 @@ class AvatarResponse(BaseModel):
     avatar_id: str
     avatar_url: str
     preview_url: str
+    thumbnail_url: Optional[str] = None
     config: Dict[str, Any]
     created_at: str
 
+class AvatarJobResponse(BaseModel):
+    job_id: str
+    status: str
+    priority: int
+    attempts: int
+    max_attempts: int
+    error: Optional[str] = None
+    created_at: str
+    updated_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    status_url: str
+    result_url: str
+
 class AvatarListResponse(BaseModel):
     avatars: List[Dict[str, Any]]
     total: int
@@ -57,12 +83,34 @@ class AvatarUpdateRequest(BaseModel):
 
 # API Endpoints
 
+# Health check endpoint (declared before the /{id} routes, which would otherwise match it)
+@router.get("/health")
+async def avatar_health_check():
+    """Avatar service health check"""
+
+    return {
+        'service': 'Avatar Creation Service',
+        'status': 'healthy',
+        'version': '1.0.0',
+        'features': {
+            'photo_upload': True,
+            '3d_generation': True,
+            'customization': True,
+            'measurements': True
+        },
+        'supported_formats': list(settings.avatar_upload.supported_formats),
+        'max_file_size': settings.avatar_upload.max_file_size_label
+    }
+
 @router.post("/create", response_model=AvatarResponse)
 async def create_avatar(
+    request: Request,
     user_id: str = Form(...),
     photo: UploadFile = File(...),
     measurements: Optional[str] = Form(None),
-    preferences: Optional[str] = Form(None)
+    preferences: Optional[str] = Form(None),
+    progress_id: Optional[str] = Form(None),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
     """
     Create a new 3D avatar from user photo and measurements
@@ -71,8 +119,15 @@ async def create_avatar(
     - **photo**: User photo file (JPG, PNG, WebP)
     - **measurements**: JSON string of body measurements (optional)
     - **preferences**: JSON string of avatar preferences (optional)
+    - **progress_id**: Client-chosen channel for /api/progress/{id} events (optional, needs the bearer token)
+    - **Idempotency-Key**: Header; retries with the same key return the original avatar (optional)
     """
 
+    # Only the channel's owner may publish on it (progress is optional, the work is not)
+    if progress_id and not await progress_broker.claim(progress_id, authenticator.user_id(request)):
+        logger.warning(f"Progress channel {progress_id} not available to this caller, not publishing")
+        progress_id = None
+
     try:
         # Parse JSON strings if provided
         parsed_measurements = None
@@ -89,21 +144,149 @@ async def create_avatar(
             except json.JSONDecodeError:
                 raise HTTPException(status_code=400, detail="Invalid preferences JSON")
 
-        # Create avatar
-        result = await avatar_service.create_avatar_from_photo(
-            user_id=user_id,
-            photo_file=photo,
-            measurements=parsed_measurements,
-            preferences=parsed_preferences
-        )
+        fingerprint = await request_fingerprint(
+            {'user_id': user_id, 'measurements': parsed_measurements, 'preferences': parsed_preferences},
+            photo
+        ) if idempotency_key else ''
+
+        async def _create() -> Dict[str, Any]:
+            # Charged only when work actually runs (not on replays, not while draining)
+            async with lifecycle.track('avatar_create'):
+                await rate_limiter.admit('avatar_create', request)
+                return await avatar_service.create_avatar_from_photo(
+                    user_id=user_id,
+                    photo_file=photo,
+                    measurements=parsed_measurements,
+                    preferences=parsed_preferences,
+                    progress_id=progress_id
+                )
+
+        # Create avatar; service output already has the AvatarResponse shape
+        response = await idempotency_store.run(f"avatar-create:{user_id}", idempotency_key, fingerprint, _create)
+
+        if is_replayed(response):
+            await progress_broker.publish(progress_id, 'saved', final=True, data={'replayed': True})
+        return response
+
+    except IdempotencyConflict:
+        raise
+    except HTTPException as e:
+        await progress_broker.publish(progress_id, 'failed', final=True, data={'error': e.detail})
+        raise
+    except Exception as e:
+        logger.error(f"Avatar creation failed: {str(e)}")
+        await progress_broker.publish(progress_id, 'failed', final=True, data={'error': str(e)})
+        raise HTTPException(status_code=500, detail=f"Avatar creation failed: {str(e)}")
+
+def _job_response(job: Dict[str, Any]) -> AvatarJobResponse:
+    """Public view of a job record (without the result payload)"""
+
+    return AvatarJobResponse(
+        **{k: v for k, v in job.items() if k in AvatarJobResponse.model_fields},
+        status_url=f"/api/avatars/jobs/{job['job_id']}",
+        result_url=f"/api/avatars/jobs/{job['job_id']}/result"
+    )
+
+async def _get_owned_job(job_id: str, caller: str) -> Dict[str, Any]:
+    """Load a job submitted by the authenticated caller (404 for other users' jobs, so IDs can't be probed)"""
+
+    job = await job_queue.get_job(job_id)
+    if not job or job['user_id'] != caller:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.post("/jobs", response_model=AvatarJobResponse, status_code=202)
+async def submit_avatar_job(
+    request: Request,
+    user_id: str = Form(...),
+    photo: UploadFile = File(...),
+    measurements: Optional[str] = Form(None),
+    preferences: Optional[str] = Form(None),
+    priority: int = Form(5, ge=0, le=9),
+    caller: str = Depends(authenticator.require_user)
+):
+    """
+    Queue avatar generation and return a job ID immediately
+
+    Requires the user's bearer token; the job belongs to that user.
+
+    - **user_id**: User identifier (must match the token)
+    - **photo**: User photo file (JPG, PNG, WebP)
+    - **measurements**: JSON string of body measurements (optional)
+    - **preferences**: JSON string of avatar preferences (optional)
+    - **priority**: Queue priority 0-9, lower runs first (default 5)
+    """
+
+    try:
+        if user_id != caller:
+            raise HTTPException(status_code=403, detail="user_id does not match the authenticated user")
+
+        parsed_measurements = None
+        if measurements:
+            try:
+                parsed_measurements = json.loads(measurements)
+            except json.JSONDecodeError:
+                raise HTTPException(status_code=400, detail="Invalid measurements JSON")
+
+        parsed_preferences = None
+        if preferences:
+            try:
+                parsed_preferences = json.loads(preferences)
+            except json.JSONDecodeError:
+                raise HTTPException(status_code=400, detail="Invalid preferences JSON")
+
+        async with lifecycle.track('avatar_job'):
+            await rate_limiter.admit('avatar_job', request)
+            job = await avatar_service.submit_avatar_job(
+                user_id=user_id,
+                photo_file=photo,
+                measurements=parsed_measurements,
+                preferences=parsed_preferences,
+                priority=priority
+            )
 
-        return AvatarResponse(**result)
+        return _job_response(job)
 
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Avatar creation failed: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Avatar creation failed: {str(e)}")
+        logger.error(f"Avatar job submission failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Avatar job submission failed: {str(e)}")
+
+@router.get("/jobs/{job_id}", response_model=AvatarJobResponse)
+async def get_avatar_job_status(job_id: str, caller: str = Depends(authenticator.require_user)):
+    """
+    Get the status of an avatar generation job
+
+    - **job_id**: Job identifier returned on submission
+
+    Requires the submitting user's bearer token.
+    """
+
+    job = await _get_owned_job(job_id, caller)
+    return _job_response(job)
+
+@router.get("/jobs/{job_id}/result", response_model=AvatarResponse)
+async def get_avatar_job_result(job_id: str, caller: str = Depends(authenticator.require_user)):
+    """
+    Get the created avatar once its job has completed
+
+    Returns 202 with the job status while the job is still pending.
+
+    - **job_id**: Job identifier returned on submission
+
+    Requires the submitting user's bearer token.
+    """
+
+    job = await _get_owned_job(job_id, caller)
+
+    if job['status'] == 'failed':
+        raise HTTPException(status_code=500, detail=f"Avatar creation failed: {job['error']}")
+
+    if job['status'] != 'completed':
+        return JSONResponse(status_code=202, content=_job_response(job).model_dump())
+
+    return FastJSONResponse(job['result'])
 
 @router.get("/{avatar_id}")
 async def get_avatar(avatar_id: str, user_id: str):
@@ -116,7 +299,7 @@ async def get_avatar(avatar_id: str, user_id: str):
 
     try:
         avatar_data = await avatar_service.get_avatar(user_id, avatar_id)
-        return avatar_data
+        return FastJSONResponse(avatar_data)
 
     except HTTPException:
         raise
@@ -134,10 +317,10 @@ async def list_user_avatars(user_id: str):
 
     try:
         avatars = await avatar_service.list_user_avatars(user_id)
-        return AvatarListResponse(
-            avatars=avatars,
-            total=len(avatars)
-        )
+        return FastJSONResponse({
+            'avatars': avatars,
+            'total': len(avatars)
+        })
 
     except HTTPException:
         raise
@@ -227,7 +410,7 @@ async def get_avatar_model(avatar_id: str, user_id: str):
             'created_at': '2024-01-01T00:00:00Z'
         }
 
-        return model_data
+        return FastJSONResponse(model_data)
 
     except Exception as e:
         logger.error(f"Failed to get avatar model {avatar_id}: {str(e)}")
@@ -258,22 +441,3 @@ async def get_avatar_preview(avatar_id: str):
     except Exception as e:
         logger.error(f"Failed to get avatar preview {avatar_id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to retrieve avatar preview")
-
-# Health check endpoint
-@router.get("/health")
-async def avatar_health_check():
-    """Avatar service health check"""
-
-    return {
-        'service': 'Avatar Creation Service',
-        'status': 'healthy',
-        'version': '1.0.0',
-        'features': {
-            'photo_upload': True,
-            '3d_generation': True,
-            'customization': True,
-            'measurements': True
-        },
-        'supported_formats': ['.jpg', '.jpeg', '.png', '.webp'],
-        'max_file_size': '10MB'
-    }
@@ -7,11 +7,22 @@ import logging
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
-from fastapi import (APIRouter, Depends, File, Form, HTTPException, Query,
-                     UploadFile)
+from fastapi import (APIRouter, Depends, File, Form, Header, HTTPException,
+                     Query, Request, UploadFile)
 from pydantic import BaseModel
 
+from ..auth import authenticator
+from ..config import settings
+from ..content_encoding import precompressed_response
+from ..lifecycle import lifecycle
+from ..responses import (FastJSONResponse, MsgPackResponse, accepts_msgpack,
+                         encode_columnar)
 from ..services.garment_service import garment_service
+from ..services.idempotency import (IdempotencyConflict, idempotency_store, is_replayed,
+                                    request_fingerprint)
+from ..services.progress_service import progress_broker
+from ..services.rate_limiter import rate_limiter
+from ..services.single_flight import SingleFlight
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -19,6 +30,15 @@ logger = logging.getLogger(__name__)
 # Create router
 router = APIRouter(prefix="/garments", tags=["garments"])
 
+# Dashboard bursts for the same user compute statistics once
+statistics_flight = SingleFlight('statistics')
+
+# Registered on the app when the router is mounted; runs after the drain
+@router.on_event("shutdown")
+async def stop_micro_batchers():
+    await garment_service.type_batcher.stop()
+    await garment_service.material_batcher.stop()
+
 # Pydantic models for request/response
 class GarmentMetadata(BaseModel):
     name: Optional[str] = None
@@ -56,11 +76,45 @@ class GarmentUpdateRequest(BaseModel):
 
 # API Endpoints
 
+# Health check endpoint (declared before the /{id} routes, which would otherwise match it)
+@router.get("/health")
+async def garment_health_check():
+    """Garment service health check"""
+
+    return {
+        'service': 'Garment Management Service',
+        'status': 'healthy',
+        'version': '1.0.0',
+        'features': {
+            'image_upload': True,
+            'ai_analysis': True,
+            'categorization': True,
+            'color_detection': True,
+            'outfit_analysis': True
+        },
+        'supported_formats': list(settings.garment_upload.supported_formats),
+        'max_file_size': settings.garment_upload.max_file_size_label,
+        'categories': len(settings.taxonomy.categories),
+        'supported_colors': garment_service.color_family_count(),
+        'single_flight': {
+            'analyze': garment_service.analysis_flight.stats(),
+            'statistics': statistics_flight.stats()
+        },
+        'rate_limiting': rate_limiter.stats(),
+        'micro_batching': {
+            'garment_type': garment_service.type_batcher.stats(),
+            'material': garment_service.material_batcher.stats()
+        }
+    }
+
 @router.post("/upload", response_model=GarmentResponse)
 async def upload_garment(
+    request: Request,
     user_id: str = Form(...),
     garment_image: UploadFile = File(...),
-    metadata: Optional[str] = Form(None)
+    metadata: Optional[str] = Form(None),
+    progress_id: Optional[str] = Form(None),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
     """
     Upload and analyze a garment image
@@ -68,8 +122,15 @@ async def upload_garment(
     - **user_id**: User identifier
     - **garment_image**: Garment photo file (JPG, PNG, WebP)
     - **metadata**: JSON string of garment metadata (optional)
+    - **progress_id**: Client-chosen channel for /api/progress/{id} events (optional, needs the bearer token)
+    - **Idempotency-Key**: Header; retries with the same key return the original result (optional)
     """
 
+    # Only the channel's owner may publish on it (progress is optional, the work is not)
+    if progress_id and not await progress_broker.claim(progress_id, authenticator.user_id(request)):
+        logger.warning(f"Progress channel {progress_id} not available to this caller, not publishing")
+        progress_id = None
+
     try:
         # Parse metadata JSON if provided
         parsed_metadata = None
@@ -79,19 +140,37 @@ async def upload_garment(
             except json.JSONDecodeError:
                 raise HTTPException(status_code=400, detail="Invalid metadata JSON")
 
-        # Upload and analyze garment
-        result = await garment_service.upload_and_analyze_garment(
-            user_id=user_id,
-            garment_file=garment_image,
-            metadata=parsed_metadata
-        )
-
-        return GarmentResponse(**result)
-
-    except HTTPException:
+        fingerprint = await request_fingerprint(
+            {'user_id': user_id, 'metadata': parsed_metadata},
+            garment_image
+        ) if idempotency_key else ''
+
+        async def _upload() -> Dict[str, Any]:
+            # Charged only when work actually runs (not on replays, not while draining)
+            async with lifecycle.track('garment_upload'):
+                await rate_limiter.admit('garment_upload', request)
+                return await garment_service.upload_and_analyze_garment(
+                    user_id=user_id,
+                    garment_file=garment_image,
+                    metadata=parsed_metadata,
+                    progress_id=progress_id
+                )
+
+        # Upload and analyze garment; service output already has the GarmentResponse shape
+        response = await idempotency_store.run(f"garment-upload:{user_id}", idempotency_key, fingerprint, _upload)
+
+        if is_replayed(response):
+            await progress_broker.publish(progress_id, 'done', final=True, data={'replayed': True})
+        return response
+
+    except IdempotencyConflict:
+        raise
+    except HTTPException as e:
+        await progress_broker.publish(progress_id, 'failed', final=True, data={'error': e.detail})
         raise
     except Exception as e:
         logger.error(f"Garment upload failed: {str(e)}")
+        await progress_broker.publish(progress_id, 'failed', final=True, data={'error': str(e)})
         raise HTTPException(status_code=500, detail=f"Garment upload failed: {str(e)}")
 
 @router.get("/{garment_id}")
@@ -105,7 +184,7 @@ async def get_garment(garment_id: str, user_id: str = Query(...)):
 
     try:
         garment_data = await garment_service.get_garment(user_id, garment_id)
-        return garment_data
+        return FastJSONResponse(garment_data)
 
     except HTTPException:
         raise
@@ -115,6 +194,7 @@ async def get_garment(garment_id: str, user_id: str = Query(...)):
 
 @router.get("/user/{user_id}", response_model=GarmentListResponse)
 async def list_user_garments(
+    request: Request,
     user_id: str,
     category: Optional[str] = Query(None, description="Filter by category"),
     season: Optional[str] = Query(None, description="Filter by season"),
@@ -131,9 +211,15 @@ async def list_user_garments(
     - **color**: Filter by primary color
     - **limit**: Number of items per page (1-100)
     - **offset**: Number of items to skip for pagination
+
+    With `Accept: application/msgpack` the garments are returned as
+    MessagePack in a columnar layout, with category/type/color/season
+    columns dictionary-encoded as small integers.
     """
 
     try:
+        await rate_limiter.admit('garment_list', request)
+
         result = await garment_service.list_user_garments(
             user_id=user_id,
             category=category,
@@ -143,7 +229,12 @@ async def list_user_garments(
             offset=offset
         )
 
-        return GarmentListResponse(**result)
+        if accepts_msgpack(request.headers.get('accept')):
+            result['garments'] = encode_columnar(result['garments'], garment_service.wire_dictionaries())
+            result['format'] = 'columnar-v1'
+            return MsgPackResponse(result, headers={'Vary': 'Accept'})
+
+        return FastJSONResponse(result, headers={'Vary': 'Accept'})
 
     except HTTPException:
         raise
@@ -229,40 +320,17 @@ async def get_garment_image(garment_id: str, user_id: str = Query(...)):
         raise HTTPException(status_code=500, detail="Failed to retrieve garment image")
 
 @router.get("/categories/list")
-async def list_garment_categories():
+async def list_garment_categories(request: Request):
     """
     Get list of available garment categories and types
     """
 
     try:
-        categories = {
-            'tops': ['t-shirt', 'shirt', 'blouse', 'sweater', 'hoodie', 'tank-top', 'cardigan'],
-            'bottoms': ['jeans', 'pants', 'shorts', 'skirt', 'leggings', 'trousers'],
-            'dresses': ['dress', 'gown', 'sundress', 'maxi-dress', 'mini-dress'],
-            'outerwear': ['jacket', 'coat', 'blazer', 'vest', 'windbreaker', 'parka'],
-            'footwear': ['sneakers', 'boots', 'heels', 'sandals', 'flats', 'loafers'],
-            'accessories': ['hat', 'scarf', 'belt', 'jewelry', 'bag', 'watch', 'sunglasses']
-        }
-
-        colors = [
-            'black', 'white', 'red', 'blue', 'green', 'yellow',
-            'orange', 'purple', 'pink', 'brown', 'gray', 'navy', 'beige'
-        ]
-
-        seasons = ['spring', 'summer', 'fall', 'winter', 'all-season']
-
-        occasions = [
-            'casual', 'formal', 'business', 'party', 'sport', 'beach',
-            'evening', 'daytime', 'weekend', 'office', 'date', 'travel'
-        ]
-
-        return {
-            'categories': categories,
-            'colors': colors,
-            'seasons': seasons,
-            'occasions': occasions
-        }
+        # Static taxonomy: serialized and compressed once per palette version, not per request
+        return precompressed_response(request, garment_service.categories_body(), 'application/json')
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to get categories: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to retrieve categories")
@@ -315,38 +383,7 @@ async def get_wardrobe_statistics(user_id: str):
     """
 
     try:
-        # MVP implementation - mock statistics
-        statistics = {
-            'total_garments': 25,
-            'categories': {
-                'tops': 8,
-                'bottoms': 6,
-                'dresses': 4,
-                'outerwear': 3,
-                'footwear': 2,
-                'accessories': 2
-            },
-            'colors': {
-                'black': 5,
-                'white': 4,
-                'blue': 3,
-                'red': 2,
-                'other': 11
-            },
-            'most_worn': {
-                'garment_id': f'garment_{user_id}_001',
-                'name': 'Blue Denim Jeans',
-                'wear_count': 15
-            },
-            'least_worn': {
-                'garment_id': f'garment_{user_id}_010',
-                'name': 'Formal Black Dress',
-                'wear_count': 1
-            },
-            'favorites_count': 8,
-            'average_wear_count': 3.2,
-            'last_updated': datetime.now().isoformat()
-        }
+        statistics = await statistics_flight.do(user_id, lambda: _build_wardrobe_statistics(user_id))
 
         return {
             'success': True,
@@ -358,49 +395,80 @@ async def get_wardrobe_statistics(user_id: str):
         logger.error(f"Failed to get statistics for user {user_id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to retrieve wardrobe statistics")
 
-# Health check endpoint
+async def _build_wardrobe_statistics(user_id: str) -> Dict[str, Any]:
+    """Aggregate wardrobe statistics for a user"""
+
+    # MVP implementation - mock statistics
+    statistics = {
+        'total_garments': 25,
+        'categories': {
+            'tops': 8,
+            'bottoms': 6,
+            'dresses': 4,
+            'outerwear': 3,
+            'footwear': 2,
+            'accessories': 2
+        },
+        'colors': {
+            'black': 5,
+            'white': 4,
+            'blue': 3,
+            'red': 2,
+            'other': 11
+        },
+        'most_worn': {
+            'garment_id': f'garment_{user_id}_001',
+            'name': 'Blue Denim Jeans',
+            'wear_count': 15
+        },
+        'least_worn': {
+            'garment_id': f'garment_{user_id}_010',
+            'name': 'Formal Black Dress',
+            'wear_count': 1
+        },
+        'favorites_count': 8,
+        'average_wear_count': 3.2,
+        'last_updated': datetime.now().isoformat()
+    }
+
+    return statistics
+
 @router.post("/analyze")
 async def analyze_garment_image(
-    file: UploadFile = File(...)
+    request: Request,
+    file: UploadFile = File(...),
+    fields: Optional[str] = Query(None, description="Comma-separated analysis fields to compute")
 ):
     """
-    Analyze a garment image and return AI predictions
+    Analyze a garment image and return AI predictions (nothing is stored)
+
+    - **file**: Garment photo file (JPG, PNG, WebP)
+    - **fields**: Only compute these analyzers, e.g. `dominant_colors,season_suitability` (optional)
     """
     try:
         logger.info(f"Analyzing garment image: {file.filename}")
 
-        # Analyze the garment
-        analysis = await garment_service.analyze_garment_image(file)
+        requested_fields = [f.strip() for f in fields.split(',') if f.strip()] if fields else None
 
-        return {
+        # Analyze the garment
+        async with lifecycle.track('garment_analyze'):
+            # Charged only when this request starts the analysis, not when it joins one in flight
+            analysis = await garment_service.analyze_garment_image(
+                file,
+                fields=requested_fields,
+                admit=lambda: rate_limiter.admit('garment_analyze', request)
+            )
+
+        return FastJSONResponse({
             'success': True,
             'analysis': analysis
-        }
+        })
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error analyzing garment: {str(e)}")
         raise HTTPException(
             status_code=500,
             detail=f"Failed to analyze garment: {str(e)}"
         )
-
-@router.get("/health")
-async def garment_health_check():
-    """Garment service health check"""
-
-    return {
-        'service': 'Garment Management Service',
-        'status': 'healthy',
-        'version': '1.0.0',
-        'features': {
-            'image_upload': True,
-            'ai_analysis': True,
-            'categorization': True,
-            'color_detection': True,
-            'outfit_analysis': True
-        },
-        'supported_formats': ['.jpg', '.jpeg', '.png', '.webp'],
-        'max_file_size': '10MB',
-        'categories': 6,
-        'supported_colors': 13
-    }
@@ -0,0 +1,56 @@
+"""
+Media API Endpoints - Serves content-addressed image derivatives
+"""
+
+import logging
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse
+
+from ..content_encoding import precompressed_file_response
+from ..services.derivative_service import derivative_service
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Create router
+router = APIRouter(prefix="/media", tags=["media"])
+
+MEDIA_TYPES = {
+    'webp': 'image/webp',
+    'jpg': 'image/jpeg'
+}
+
+@router.get("/manifests/{source_digest}")
+async def get_derivative_manifest(source_digest: str, request: Request):
+    """
+    Get the derivative manifest (sizes, formats, srcset) for an uploaded image
+
+    - **source_digest**: SHA-256 digest of the original upload
+    """
+
+    path = derivative_service.get_manifest_path(source_digest)
+    if not path:
+        raise HTTPException(status_code=404, detail="Derivatives not found")
+
+    # Served straight from disk, precompressed at generation time
+    return precompressed_file_response(request, path, 'application/json')
+
+@router.get("/{filename}")
+async def get_derivative(filename: str):
+    """
+    Serve a stored image derivative
+
+    - **filename**: Content-addressed derivative name (<sha256>.<webp|jpg>)
+    """
+
+    path = derivative_service.get_variant_path(filename)
+    if not path:
+        raise HTTPException(status_code=404, detail="Derivative not found")
+
+    # Content-addressed files never change, so they can be cached forever
+    return FileResponse(
+        path,
+        media_type=MEDIA_TYPES[filename.rsplit('.', 1)[1]],
+        headers={'Cache-Control': 'public, max-age=31536000, immutable'}
+    )
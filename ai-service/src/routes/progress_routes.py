@@ -0,0 +1,79 @@
+"""
+Progress API Endpoints - Server-sent events and WebSocket progress streams
+"""
+
+import json
+import logging
+
+from fastapi import APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+from ..auth import authenticator
+from ..services.progress_service import progress_broker
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Create router
+router = APIRouter(prefix="/progress", tags=["progress"])
+
+@router.get("/{channel}/events")
+async def stream_progress_events(channel: str, request: Request):
+    """
+    Stream stage-level progress events as server-sent events
+
+    Requires the channel owner's bearer token (header, or ?access_token= for EventSource).
+
+    - **channel**: Job ID, or the progress_id sent with an upload/create request
+    """
+
+    user_id = authenticator.user_id(request, allow_query_token=True)
+    if user_id is None:
+        raise HTTPException(status_code=401, detail="Authentication required", headers={'WWW-Authenticate': 'Bearer'})
+    if not await progress_broker.claim(channel, user_id):
+        raise HTTPException(status_code=404, detail="Progress channel not found")
+
+    async def event_stream():
+        async for event in progress_broker.subscribe(channel):
+            if event is None:
+                yield ": keepalive\n\n"
+                continue
+            yield f"event: {event['stage']}\ndata: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'  # Disable proxy buffering (nginx)
+        }
+    )
+
+@router.websocket("/{channel}/ws")
+async def progress_websocket(websocket: WebSocket, channel: str):
+    """
+    Stream stage-level progress events over a WebSocket
+
+    Requires the channel owner's bearer token (header, or ?access_token=).
+
+    - **channel**: Job ID, or the progress_id sent with an upload/create request
+    """
+
+    # Policy violation close before accepting, for anonymous callers and other users' channels
+    if not await progress_broker.claim(channel, authenticator.user_id(websocket, allow_query_token=True)):
+        await websocket.close(code=1008)
+        return
+
+    await websocket.accept()
+
+    try:
+        async for event in progress_broker.subscribe(channel):
+            if event is None:
+                await websocket.send_json({'stage': 'keepalive'})
+                continue
+            await websocket.send_json(event)
+
+        await websocket.close()
+
+    except WebSocketDisconnect:
+        logger.debug(f"Progress subscriber disconnected from {channel}")
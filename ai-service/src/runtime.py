@@ -0,0 +1,53 @@
+"""
+Runtime Sizing - CPU budget detection for the multi-worker server
+Reads cgroup v2/v1 CPU quotas so worker counts follow container limits, not host cores
+"""
+
+import math
+import os
+from typing import Optional
+
+CGROUP_V2_CPU_MAX = '/sys/fs/cgroup/cpu.max'
+CGROUP_V1_QUOTA = '/sys/fs/cgroup/cpu/cpu.cfs_quota_us'
+CGROUP_V1_PERIOD = '/sys/fs/cgroup/cpu/cpu.cfs_period_us'
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path, 'r') as cgroup_file:
+            return cgroup_file.read().strip()
+    except OSError:
+        return None
+
+def cgroup_cpu_limit() -> Optional[float]:
+    """CPU quota of this container in cores (None when unlimited or not in a cgroup)"""
+
+    cpu_max = _read(CGROUP_V2_CPU_MAX)
+    if cpu_max:
+        quota, _, period = cpu_max.partition(' ')
+        if quota != 'max' and period:
+            return int(quota) / int(period)
+        return None
+
+    quota, period = _read(CGROUP_V1_QUOTA), _read(CGROUP_V1_PERIOD)
+    if quota and period and int(quota) > 0:
+        return int(quota) / int(period)
+    return None
+
+def available_cpus() -> float:
+    """Cores this process may actually use: CPU affinity capped by the cgroup quota"""
+
+    try:
+        cpus = float(len(os.sched_getaffinity(0)))
+    except AttributeError:
+        cpus = float(os.cpu_count() or 1)
+
+    limit = cgroup_cpu_limit()
+    return min(cpus, limit) if limit else cpus
+
+def default_worker_count() -> int:
+    """Worker processes for CPU-bound analysis: one per available core (WEB_CONCURRENCY overrides)"""
+
+    configured = os.getenv('WEB_CONCURRENCY')
+    if configured:
+        return max(1, int(configured))
+    return max(1, math.ceil(available_cpus()))
@@ -0,0 +1,103 @@
+"""
+Analysis Pipeline - Dependency-aware scheduling of garment analyzers
+Stages declare their inputs; each shared intermediate is computed once and
+only the stages needed for the requested outputs run, concurrently where possible
+"""
+
+import asyncio
+import inspect
+import logging
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+StageCallback = Callable[[str, Any], Awaitable[None]]
+
+class AnalysisStage:
+    """One node of the analysis DAG"""
+
+    def __init__(self, name: str, func: Callable[..., Any], inputs: Tuple[str, ...]):
+        self.name = name
+        self.func = func
+        self.inputs = inputs
+        self.is_async = inspect.iscoroutinefunction(func)
+
+class AnalysisPipeline:
+    """Small DAG of analysis stages executed on demand"""
+
+    def __init__(self, seeds: Iterable[str]):
+        self.seeds = frozenset(seeds)
+        self._stages: Dict[str, AnalysisStage] = {}
+
+    def add_stage(self, name: str, func: Callable[..., Any], inputs: Tuple[str, ...]) -> None:
+        """Register a stage; func receives its inputs positionally in declared order"""
+
+        for dependency in inputs:
+            if dependency not in self.seeds and dependency not in self._stages:
+                raise ValueError(f"Stage '{name}' depends on unknown stage '{dependency}'")
+        self._stages[name] = AnalysisStage(name, func, inputs)
+
+    def plan(self, targets: Iterable[str]) -> List[str]:
+        """Stages required for the targets, in dependency order"""
+
+        ordered: List[str] = []
+        visited = set()
+
+        def visit(name: str) -> None:
+            if name in visited or name in self.seeds:
+                return
+            visited.add(name)
+            for dependency in self._stages[name].inputs:
+                visit(dependency)
+            ordered.append(name)
+
+        for target in targets:
+            visit(target)
+        return ordered
+
+    async def run(
+        self,
+        seeds: Dict[str, Any],
+        targets: Iterable[str],
+        on_complete: Optional[StageCallback] = None
+    ) -> Dict[str, Any]:
+        """Compute the targets, running independent stages concurrently
+
+        Synchronous stages run in the threadpool (NumPy releases the GIL for
+        large reductions); async stages run on the event loop.
+        """
+
+        targets = list(targets)
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def execute(stage: AnalysisStage, dependencies: List[asyncio.Task]) -> Any:
+            values = await asyncio.gather(*dependencies)
+            args = [
+                seeds[name] if name in seeds else values.pop(0)
+                for name in stage.inputs
+            ]
+            if stage.is_async:
+                result = await stage.func(*args)
+            else:
+                result = await run_in_threadpool(stage.func, *args)
+            if on_complete is not None:
+                await on_complete(stage.name, result)
+            return result
+
+        # plan() yields dependencies first, so their tasks already exist
+        for name in self.plan(targets):
+            stage = self._stages[name]
+            dependencies = [tasks[dep] for dep in stage.inputs if dep not in self.seeds]
+            tasks[name] = asyncio.create_task(execute(stage, dependencies))
+
+        try:
+            await asyncio.gather(*tasks.values())
+        finally:
+            for task in tasks.values():
+                if not task.done():
+                    task.cancel()
+
+        return {name: tasks[name].result() for name in targets}
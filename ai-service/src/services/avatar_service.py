@@ -3,7 +3,6 @@ Avatar Creation Service - MVP Implementation
 Provides basic 3D avatar generation from user photos and measurements
 """
 
-import base64
 import io
 import json
 import logging
@@ -11,12 +10,20 @@ import os
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
-import requests
 from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+
+from ..config import settings
+from .id_generator import new_id
+from .job_queue import job_queue
+from .progress_service import AVATAR_STAGES, progress_broker
+from .upload_store import upload_store
 
 # Optional imports for image processing (MVP can work without)
 try:
     from PIL import Image
+
+    from .frame_cache import frame_cache
     PIL_AVAILABLE = True
 except ImportError:
     PIL_AVAILABLE = False
@@ -35,8 +42,9 @@ class AvatarCreationService:
     """MVP Avatar Creation Service for Wardrobe AI"""
 
     def __init__(self):
-        self.supported_formats = ['.jpg', '.jpeg', '.png', '.webp']
-        self.max_file_size = 10 * 1024 * 1024  # 10MB
+        self.upload_limits = settings.avatar_upload
+        self.skin_analysis_size = 128  # px, longest side of the skin-tone frame
+        self.min_skin_pixels = 64
         self.default_avatar_config = {
             'height': 170,  # cm
             'build': 'medium',
@@ -50,9 +58,13 @@ class AvatarCreationService:
         user_id: str,
         photo_file: UploadFile,
         measurements: Optional[Dict[str, float]] = None,
-        preferences: Optional[Dict[str, Any]] = None
+        preferences: Optional[Dict[str, Any]] = None,
+        progress_id: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Create a 3D avatar from user photo and measurements"""
+        """Create a 3D avatar from user photo and measurements
+
+        When progress_id is given, stage events are published on that channel.
+        """
 
         try:
             # Validate photo upload
@@ -62,18 +74,23 @@ class AvatarCreationService:
 
             # Process photo for avatar generation
             photo_analysis = await self._analyze_photo(photo_file)
+            await self._publish_stage(progress_id, 'analysis', {'face_detected': photo_analysis.get('face_detected', False)})
 
             # Combine photo analysis with user measurements
             avatar_config = await self._build_avatar_config(
                 photo_analysis, measurements, preferences
             )
+            await self._publish_stage(progress_id, 'config')
 
             # Generate 3D avatar model
             avatar_model = await self._generate_3d_avatar(avatar_config)
+            await self._publish_stage(progress_id, 'mesh', {'model_id': avatar_model['model_id']})
 
-            # Save avatar to database
+            # Save avatar to database (its thumbnail is a render of the avatar, never
+            # a resized copy of the photo: selfies stay out of the public media store)
             avatar_data = await self._save_avatar(user_id, avatar_model, avatar_config)
 
+            await self._publish_stage(progress_id, 'saved', {'avatar_id': avatar_data['avatar_id']})
             logger.info(f"Avatar created successfully for user {user_id}")
 
             return {
@@ -81,6 +98,7 @@ class AvatarCreationService:
                 'avatar_id': avatar_data['avatar_id'],
                 'avatar_url': avatar_data['avatar_url'],
                 'preview_url': avatar_data['preview_url'],
+                'thumbnail_url': avatar_data['thumbnail_url'],
                 'config': avatar_config,
                 'created_at': avatar_data['created_at']
             }
@@ -89,22 +107,85 @@ class AvatarCreationService:
             logger.error(f"Avatar creation failed for user {user_id}: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Avatar creation failed: {str(e)}")
 
+    async def submit_avatar_job(
+        self,
+        user_id: str,
+        photo_file: UploadFile,
+        measurements: Optional[Dict[str, float]] = None,
+        preferences: Optional[Dict[str, Any]] = None,
+        priority: int = 5
+    ) -> Dict[str, Any]:
+        """Validate the photo and queue avatar generation as a background job"""
+
+        # Validate up front so bad uploads fail fast instead of being retried
+        validation_result = await self._validate_photo(photo_file)
+        if not validation_result['valid']:
+            raise HTTPException(status_code=400, detail=validation_result['error'])
+
+        # The queue carries a reference; the photo bytes stay in private storage
+        contents = await photo_file.read()
+        payload = {
+            'user_id': user_id,
+            'filename': photo_file.filename,
+            'photo_digest': await run_in_threadpool(upload_store.put, contents),
+            'measurements': measurements,
+            'preferences': preferences
+        }
+
+        return await job_queue.submit('avatar.create', payload, priority=priority, user_id=user_id)
+
+    async def process_avatar_job(self, job_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Job handler: run the full avatar pipeline for a queued submission"""
+
+        contents = await run_in_threadpool(upload_store.get, payload['photo_digest'])
+        if contents is None:
+            raise RuntimeError(f"Uploaded photo {payload['photo_digest'][:12]} is no longer available")
+        photo_file = UploadFile(
+            file=io.BytesIO(contents),
+            filename=payload['filename'],
+            size=len(contents)
+        )
+
+        return await self.create_avatar_from_photo(
+            user_id=payload['user_id'],
+            photo_file=photo_file,
+            measurements=payload.get('measurements'),
+            preferences=payload.get('preferences'),
+            progress_id=job_id
+        )
+
+    async def _publish_stage(
+        self,
+        progress_id: Optional[str],
+        stage: str,
+        data: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Publish an avatar pipeline stage event"""
+
+        await progress_broker.publish(
+            progress_id,
+            stage,
+            progress=(AVATAR_STAGES.index(stage) + 1) / len(AVATAR_STAGES),
+            final=stage == AVATAR_STAGES[-1],
+            data=data
+        )
+
     async def _validate_photo(self, photo_file: UploadFile) -> Dict[str, Any]:
         """Validate uploaded photo file"""
 
         # Check file extension
         file_ext = os.path.splitext(photo_file.filename)[1].lower()
-        if file_ext not in self.supported_formats:
+        if file_ext not in self.upload_limits.format_set:
             return {
                 'valid': False,
-                'error': f"Unsupported file format. Supported: {', '.join(self.supported_formats)}"
+                'error': f"Unsupported file format. Supported: {', '.join(self.upload_limits.supported_formats)}"
             }
 
         # Check file size
-        if photo_file.size > self.max_file_size:
+        if photo_file.size > self.upload_limits.max_file_size:
             return {
                 'valid': False,
-                'error': f"File too large. Maximum size: {self.max_file_size // (1024*1024)}MB"
+                'error': f"File too large. Maximum size: {self.upload_limits.max_file_size_label}"
             }
 
         # Validate image content
@@ -113,10 +194,18 @@ class AvatarCreationService:
             image = Image.open(io.BytesIO(contents))
 
             # Check minimum dimensions
-            if image.width < 200 or image.height < 200:
+            min_dimension = self.upload_limits.min_dimension
+            if image.width < min_dimension or image.height < min_dimension:
+                return {
+                    'valid': False,
+                    'error': f"Image too small. Minimum dimensions: {min_dimension}x{min_dimension} pixels"
+                }
+
+            # Check the resolution can be decoded within the memory budget
+            if not frame_cache.can_decode(image):
                 return {
                     'valid': False,
-                    'error': "Image too small. Minimum dimensions: 200x200 pixels"
+                    'error': f"Image resolution too large. Maximum: {frame_cache.max_decode_pixels * (64 if image.format == 'JPEG' else 1) // 1_000_000} megapixels"
                 }
 
             # Reset file pointer
@@ -134,12 +223,8 @@ class AvatarCreationService:
         """Analyze photo to extract facial features and characteristics"""
 
         try:
-            contents = await photo_file.read()
-            image = Image.open(io.BytesIO(contents))
-
-            # Convert to RGB if necessary
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
+            # Decoded once per upload and shared with the derivative pipeline
+            _, image = await frame_cache.load(photo_file)
 
             # Basic analysis (MVP implementation)
             # In production, this would use advanced face detection/analysis
@@ -164,7 +249,6 @@ class AvatarCreationService:
                 }
             }
 
-            await photo_file.seek(0)  # Reset for potential reuse
             return analysis
 
         except Exception as e:
@@ -175,18 +259,33 @@ class AvatarCreationService:
             }
 
     def _estimate_skin_tone(self, image: Image.Image) -> str:
-        """Estimate skin tone from image (basic implementation)"""
+        """Estimate skin tone from skin pixels in the likely face region"""
 
         try:
-            # Convert to numpy array
-            img_array = np.array(image)
+            # Tone is a low-frequency property, so a small frame is enough
+            scale = min(1.0, self.skin_analysis_size / max(image.width, image.height))
+            small = image.resize(
+                (max(1, round(image.width * scale)), max(1, round(image.height * scale))),
+                Image.BILINEAR,
+                reducing_gap=2.0
+            )
+            rgb = np.asarray(small, dtype=np.float32)
+
+            skin_mask = self._detect_skin_pixels(rgb)
+            face_mask = self._locate_face_region(skin_mask)
+            pixels = rgb[face_mask]
 
-            # Get center region (likely to contain face)
-            h, w = img_array.shape[:2]
-            center_region = img_array[h//4:3*h//4, w//4:3*w//4]
+            if pixels.shape[0] < self.min_skin_pixels:
+                # No usable skin region: fall back to the center region
+                h, w = rgb.shape[:2]
+                pixels = rgb[h//4:3*h//4, w//4:3*w//4].reshape(-1, 3)
 
-            # Calculate average RGB values
-            avg_rgb = np.mean(center_region.reshape(-1, 3), axis=0)
+            # Robust statistics: blend of median and 10% trimmed mean per channel
+            ordered = np.sort(pixels, axis=0)
+            trim = int(ordered.shape[0] * 0.1)
+            trimmed_mean = ordered[trim:ordered.shape[0] - trim].mean(axis=0)
+            median = ordered[ordered.shape[0] // 2]
+            avg_rgb = (trimmed_mean + median) / 2
 
             # Simple skin tone classification
             if avg_rgb[0] > 200 and avg_rgb[1] > 180 and avg_rgb[2] > 160:
@@ -201,6 +300,42 @@ class AvatarCreationService:
         except Exception:
             return 'medium'  # Default fallback
 
+    def _detect_skin_pixels(self, rgb: "np.ndarray") -> "np.ndarray":
+        """Vectorized YCrCb skin mask over an RGB float array"""
+
+        r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+        y = 0.299 * r + 0.587 * g + 0.114 * b
+        cr = (r - y) * 0.713 + 128
+        cb = (b - y) * 0.564 + 128
+
+        return (
+            (cr >= 133) & (cr <= 173) &
+            (cb >= 77) & (cb <= 127) &
+            (y > 40) & (r > g) & (r > b)
+        )
+
+    def _locate_face_region(self, skin_mask: "np.ndarray") -> "np.ndarray":
+        """Restrict the skin mask to the densest skin block in the upper frame
+
+        Faces sit in the upper part of a portrait; hands and arms lower down
+        are dropped by keeping only rows/columns with a dense skin profile.
+        """
+
+        h, w = skin_mask.shape
+        upper = skin_mask[:max(1, (2 * h) // 3)]
+
+        row_profile = upper.sum(axis=1)
+        col_profile = upper.sum(axis=0)
+        if row_profile.max() == 0:
+            return skin_mask
+
+        rows = np.flatnonzero(row_profile >= 0.5 * row_profile.max())
+        cols = np.flatnonzero(col_profile >= 0.5 * col_profile.max())
+
+        face_mask = np.zeros_like(skin_mask)
+        face_mask[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1] = True
+        return face_mask & skin_mask
+
     async def _build_avatar_config(
         self,
         photo_analysis: Dict[str, Any],
@@ -266,7 +401,7 @@ class AvatarCreationService:
             # In production, this would interface with 3D modeling services
 
             avatar_model = {
-                'model_id': f"avatar_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+                'model_id': new_id(),
                 'format': 'gltf',
                 'geometry': {
                     'vertices': self._generate_vertex_data(config),
@@ -528,3 +663,4 @@ class AvatarCreationService:
 
 # Export the service
 avatar_service = AvatarCreationService()
+job_queue.register_handler('avatar.create', avatar_service.process_avatar_job)
@@ -0,0 +1,188 @@
+"""
+Color Lookup Table - Perceptual (CIELAB / CIEDE2000) named-color matching
+Precomputes a quantized RGB -> palette index table once, so classifying a
+pixel is a single array index instead of a distance computation per color
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+LUT_BITS = 6                          # 64 levels per channel -> 64^3 table
+LUT_VERSION = 'ciede2000-v1'          # bump when the matching metric changes
+_SHIFT = 8 - LUT_BITS
+_BUILD_CHUNK = 16384                  # table cells matched per vectorized step
+_CANDIDATES = 32                      # nearest colors by Lab distance re-ranked by CIEDE2000
+
+# sRGB (D65) -> XYZ
+_RGB_TO_XYZ = np.array([
+    [0.4124564, 0.3575761, 0.1804375],
+    [0.2126729, 0.7151522, 0.0721750],
+    [0.0193339, 0.1191920, 0.9503041]
+])
+_D65_WHITE = np.array([0.95047, 1.0, 1.08883])
+
+def rgb_to_lab(rgb: np.ndarray) -> np.ndarray:
+    """Convert (..., 3) sRGB values in 0-255 to CIELAB (D65)"""
+
+    linear = np.asarray(rgb, dtype=np.float64) / 255.0
+    linear = np.where(linear > 0.04045, ((linear + 0.055) / 1.055) ** 2.4, linear / 12.92)
+    xyz = linear @ _RGB_TO_XYZ.T / _D65_WHITE
+
+    epsilon, kappa = 216 / 24389, 24389 / 27
+    f = np.where(xyz > epsilon, np.cbrt(xyz), (kappa * xyz + 16) / 116)
+    return np.stack([
+        116 * f[..., 1] - 16,
+        500 * (f[..., 0] - f[..., 1]),
+        200 * (f[..., 1] - f[..., 2])
+    ], axis=-1)
+
+def delta_e_2000(lab1: np.ndarray, lab2: np.ndarray) -> np.ndarray:
+    """CIEDE2000 color difference, broadcasting over leading dimensions"""
+
+    L1, a1, b1 = lab1[..., 0], lab1[..., 1], lab1[..., 2]
+    L2, a2, b2 = lab2[..., 0], lab2[..., 1], lab2[..., 2]
+
+    C_bar = (np.hypot(a1, b1) + np.hypot(a2, b2)) / 2
+    G = 0.5 * (1 - np.sqrt(C_bar ** 7 / (C_bar ** 7 + 25.0 ** 7)))
+    a1p, a2p = (1 + G) * a1, (1 + G) * a2
+    C1p, C2p = np.hypot(a1p, b1), np.hypot(a2p, b2)
+    h1p = np.degrees(np.arctan2(b1, a1p)) % 360
+    h2p = np.degrees(np.arctan2(b2, a2p)) % 360
+
+    dLp = L2 - L1
+    dCp = C2p - C1p
+    dhp = h2p - h1p
+    dhp = np.where(dhp > 180, dhp - 360, np.where(dhp < -180, dhp + 360, dhp))
+    dhp = np.where(C1p * C2p == 0, 0, dhp)
+    dHp = 2 * np.sqrt(C1p * C2p) * np.sin(np.radians(dhp) / 2)
+
+    L_bar = (L1 + L2) / 2
+    Cp_bar = (C1p + C2p) / 2
+    h_sum = h1p + h2p
+    hp_bar = np.where(
+        C1p * C2p == 0, h_sum,
+        np.where(np.abs(h1p - h2p) <= 180, h_sum / 2,
+                 np.where(h_sum < 360, (h_sum + 360) / 2, (h_sum - 360) / 2))
+    )
+
+    T = (1 - 0.17 * np.cos(np.radians(hp_bar - 30)) + 0.24 * np.cos(np.radians(2 * hp_bar))
+         + 0.32 * np.cos(np.radians(3 * hp_bar + 6)) - 0.20 * np.cos(np.radians(4 * hp_bar - 63)))
+    S_L = 1 + 0.015 * (L_bar - 50) ** 2 / np.sqrt(20 + (L_bar - 50) ** 2)
+    S_C = 1 + 0.045 * Cp_bar
+    S_H = 1 + 0.015 * Cp_bar * T
+    R_T = (-2 * np.sqrt(Cp_bar ** 7 / (Cp_bar ** 7 + 25.0 ** 7))
+           * np.sin(np.radians(60 * np.exp(-(((hp_bar - 275) / 25) ** 2)))))
+
+    return np.sqrt(
+        (dLp / S_L) ** 2 + (dCp / S_C) ** 2 + (dHp / S_H) ** 2
+        + R_T * (dCp / S_C) * (dHp / S_H)
+    )
+
+class ColorLookupTable:
+    """Quantized RGB -> nearest palette color (by CIEDE2000) table"""
+
+    backend = 'numpy-lut'
+
+    def __init__(self, names: Sequence[str], table: np.ndarray, version: str):
+        self.names = list(names)
+        self.table = table  # (64, 64, 64) palette indices, possibly memory-mapped
+        self.version = version
+
+    @classmethod
+    def load_or_build(cls, palette: Dict[str, Sequence[int]], cache_dir: str) -> 'ColorLookupTable':
+        """Memory-map the cached table for this palette, building it on a miss"""
+
+        names = list(palette)
+        version = palette_digest(palette)
+        path = os.path.join(cache_dir, f"color_lut_{version}.npy")
+
+        if os.path.exists(path):
+            try:
+                table = np.load(path, mmap_mode='r')
+                if table.shape == (1 << LUT_BITS,) * 3 and int(table.max()) < len(names):
+                    return cls(names, table, version)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Discarding unreadable color LUT {path}: {str(e)}")
+
+        started = time.perf_counter()
+        table = build_table([palette[name] for name in names])
+        logger.info(
+            f"Built {len(names)}-color LUT in {(time.perf_counter() - started) * 1000:.0f} ms"
+        )
+
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as tmp_file:
+                np.save(tmp_file, table)
+            os.replace(tmp_path, path)
+            table = np.load(path, mmap_mode='r')
+        except OSError as e:
+            logger.warning(f"Color LUT cache not writable, keeping it in memory: {str(e)}")
+
+        return cls(names, table, version)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.table.nbytes)
+
+    def lookup(self, pixels: np.ndarray) -> np.ndarray:
+        """Palette indices for an (..., 3) uint8 RGB array"""
+
+        pixels = np.asarray(pixels, dtype=np.uint8)
+        return self.table[pixels[..., 0] >> _SHIFT, pixels[..., 1] >> _SHIFT, pixels[..., 2] >> _SHIFT]
+
+    def name_of(self, pixel: Sequence[int]) -> str:
+        """Palette name for a single RGB pixel"""
+
+        return self.names[int(self.lookup(np.asarray(pixel, dtype=np.uint8)))]
+
+    def warmup(self) -> None:
+        """Touch every page of a memory-mapped table so first lookups don't fault"""
+
+        int(np.asarray(self.table).sum())
+
+def palette_digest(palette: Dict[str, Sequence[int]]) -> str:
+    """Stable key for a palette plus the matching metric"""
+
+    payload = json.dumps(
+        {'version': LUT_VERSION, 'bits': LUT_BITS, 'palette': [[name, list(rgb)] for name, rgb in palette.items()]},
+        separators=(',', ':')
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+def build_table(colors: List[Sequence[int]]) -> np.ndarray:
+    """Match the centre of every quantized RGB cell to its nearest color"""
+
+    levels = 1 << LUT_BITS
+    centres = (np.arange(levels) << _SHIFT) + ((1 << _SHIFT) - 1) / 2
+    grid = np.stack(np.meshgrid(centres, centres, centres, indexing='ij'), axis=-1).reshape(-1, 3)
+
+    cell_lab = rgb_to_lab(grid)
+    palette_lab = rgb_to_lab(np.asarray(colors, dtype=np.float64))
+    palette_norms = (palette_lab ** 2).sum(axis=1)
+
+    table = np.empty(len(grid), dtype=np.uint8 if len(colors) <= 256 else np.uint16)
+    for start in range(0, len(grid), _BUILD_CHUNK):
+        cells = cell_lab[start:start + _BUILD_CHUNK]
+
+        # Large palettes: shortlist by plain Lab distance, rank the shortlist by CIEDE2000
+        if len(colors) > _CANDIDATES:
+            lab_distance = palette_norms - 2 * cells @ palette_lab.T  # + |cell|^2, constant per row
+            candidates = np.argpartition(lab_distance, _CANDIDATES - 1, axis=1)[:, :_CANDIDATES]
+        else:
+            candidates = np.broadcast_to(np.arange(len(colors)), (len(cells), len(colors)))
+
+        distances = delta_e_2000(cells[:, np.newaxis], palette_lab[candidates])
+        table[start:start + _BUILD_CHUNK] = candidates[np.arange(len(cells)), distances.argmin(axis=1)]
+
+    return table.reshape(levels, levels, levels)
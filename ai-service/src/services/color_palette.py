@@ -0,0 +1,122 @@
+"""
+Color Palette - Data-driven named shades grouped into base color families
+Loaded from a JSON file; its lookup table is rebuilt whenever the file changes
+"""
+
+import json
+import logging
+import os
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .color_lut import ColorLookupTable
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+class ColorPalette:
+    """Shade taxonomy plus its RGB -> shade lookup table (built on first use)"""
+
+    backend = 'numpy-lut'
+
+    def __init__(self, families: Dict[str, Dict[str, List[int]]], path: str,
+                 mtime: Optional[float], cache_dir: str):
+        self.path = path
+        self.mtime = mtime
+        self.cache_dir = cache_dir
+        self.families = list(families)
+
+        # Every family's canonical color is also a shade, so each family is reachable
+        self.shades: Dict[str, List[int]] = {}
+        shade_families = []
+        for family_index, (family, shades) in enumerate(families.items()):
+            for name, rgb in shades.items():
+                if name in self.shades:
+                    raise ValueError(f"Shade '{name}' is listed more than once")
+                self.shades[name] = rgb
+                shade_families.append(family_index)
+
+        self.shade_names = list(self.shades)
+        self.shade_family = np.array(shade_families, dtype=np.intp)  # shade index -> family index
+        self._lookup_table: Optional[ColorLookupTable] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path: str, cache_dir: str) -> 'ColorPalette':
+        """Parse a palette file: {"families": {family: {"rgb": [...], "shades": {...}}}}"""
+
+        with open(path, 'r', encoding='utf-8') as palette_file:
+            data = json.load(palette_file)
+
+        families = {}
+        for family, entry in data['families'].items():
+            shades = {family: [int(v) for v in entry['rgb']]}
+            shades.update({name: [int(v) for v in rgb] for name, rgb in entry.get('shades', {}).items()})
+            for name, rgb in shades.items():
+                if len(rgb) != 3 or not all(0 <= v <= 255 for v in rgb):
+                    raise ValueError(f"Invalid RGB value for shade '{name}': {rgb}")
+            families[family] = shades
+
+        palette = cls(families, path, os.path.getmtime(path), cache_dir)
+        logger.info(f"Loaded color palette: {len(palette.families)} families, {len(palette.shades)} shades")
+        return palette
+
+    @property
+    def lookup_table(self) -> ColorLookupTable:
+        """Shade lookup table, loaded from cache or built on first access"""
+
+        if self._lookup_table is None:
+            with self._lock:
+                if self._lookup_table is None:
+                    self._lookup_table = ColorLookupTable.load_or_build(self.shades, self.cache_dir)
+        return self._lookup_table
+
+    @property
+    def version(self) -> str:
+        return self.lookup_table.version
+
+    @property
+    def nbytes(self) -> Optional[int]:
+        return self._lookup_table.nbytes if self._lookup_table is not None else None
+
+    def shade_counts(self, pixels: np.ndarray) -> np.ndarray:
+        """Pixel count per shade for an (N, 3) uint8 RGB array"""
+
+        return np.bincount(self.lookup_table.lookup(pixels).ravel(), minlength=len(self.shade_names))
+
+    def family_counts(self, shade_counts: np.ndarray) -> np.ndarray:
+        """Fold per-shade counts into per-family counts"""
+
+        return np.bincount(self.shade_family, weights=shade_counts, minlength=len(self.families))
+
+    def family_of(self, shade: str) -> str:
+        return self.families[self.shade_family[self.shade_names.index(shade)]]
+
+    def file_mtime(self) -> Optional[float]:
+        """Current modification time of the palette file (None when unreadable)"""
+
+        try:
+            return os.path.getmtime(self.path)
+        except OSError:
+            return None
+
+    def is_stale(self) -> bool:
+        """True when the palette file changed since it was loaded"""
+
+        mtime = self.file_mtime()
+        return mtime is not None and mtime != self.mtime
+
+    def warmup(self) -> None:
+        """Build or map the lookup table and fault its pages in"""
+
+        self.lookup_table.warmup()
+
+def palette_loader(path: str, cache_dir: str):
+    """Model-registry loader for the palette at path"""
+
+    def _load() -> ColorPalette:
+        return ColorPalette.from_file(path, cache_dir)
+
+    return _load
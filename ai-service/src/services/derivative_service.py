@@ -0,0 +1,160 @@
+"""
+Image Derivative Service - Thumbnail and responsive-image pipeline
+Generates resized WebP/JPEG variants once per upload and stores them content-addressed
+"""
+
+import hashlib
+import io
+import json
+import logging
+import os
+import tempfile
+from typing import Any, Dict, Optional
+
+from PIL import Image
+
+from ..config import storage_dir
+from ..content_encoding import write_precompressed
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+class ImageDerivativeService:
+    """Responsive image derivative generator with content-addressed storage"""
+
+    def __init__(self):
+        self.sizes = [768, 256, 64]  # Largest first so each size is resized from the previous one
+        self.thumbnail_size = 256
+        self.formats = {
+            'webp': ('WEBP', {'quality': 80, 'method': 4}),
+            'jpg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True})
+        }
+        # Shared by every worker and replica: any of them may serve a stored URL
+        self.storage_dir = storage_dir('MEDIA_STORAGE_DIR', 'wardrobe_media')
+        self.url_prefix = '/api/media'
+
+    def generate_derivatives(self, image: Image.Image, source_digest: str) -> Dict[str, Any]:
+        """Generate all derivative sizes/formats for a decoded frame
+
+        Derivatives are keyed by the digest of the source bytes, so re-uploading
+        the same image returns the stored manifest without re-encoding anything.
+        """
+
+        manifest = self.get_manifest(source_digest)
+        if manifest:
+            return manifest
+
+        variants: Dict[str, Dict[str, Any]] = {}
+        frame = image
+
+        for size in self.sizes:
+            if max(frame.size) > size:
+                frame = frame.copy()
+                frame.thumbnail((size, size), Image.LANCZOS)
+
+            variants[str(size)] = {
+                ext: self._store_variant(frame, ext)
+                for ext in self.formats
+            }
+
+        manifest = {
+            'source_digest': source_digest,
+            'source_resolution': f"{image.width}x{image.height}",
+            'variants': variants,
+            'thumbnail_url': variants[str(self.thumbnail_size)]['jpg']['url'],
+            'srcset': {
+                ext: ', '.join(
+                    f"{variants[str(size)][ext]['url']} {variants[str(size)][ext]['width']}w"
+                    for size in reversed(self.sizes)
+                )
+                for ext in self.formats
+            }
+        }
+
+        # Manifests are immutable, so their compressed variants are produced once here
+        write_precompressed(
+            self._manifest_path(source_digest),
+            json.dumps(manifest).encode('utf-8'),
+            self._write_atomic
+        )
+        logger.info(f"Generated {len(self.sizes) * len(self.formats)} derivatives for {source_digest[:12]}")
+        return manifest
+
+    def get_manifest(self, source_digest: str) -> Optional[Dict[str, Any]]:
+        """Load a previously generated derivative manifest"""
+
+        try:
+            with open(self._manifest_path(source_digest), 'rb') as manifest_file:
+                return json.loads(manifest_file.read())
+        except (OSError, ValueError):
+            return None
+
+    def get_manifest_path(self, source_digest: str) -> Optional[str]:
+        """Local path of a stored manifest (precompressed siblings sit next to it)"""
+
+        if len(source_digest) != 64:
+            return None
+        try:
+            int(source_digest, 16)
+        except ValueError:
+            return None
+
+        path = self._manifest_path(source_digest)
+        return path if os.path.exists(path) else None
+
+    def get_variant_path(self, filename: str) -> Optional[str]:
+        """Resolve a stored derivative filename (<sha256>.<ext>) to a local path"""
+
+        digest, _, ext = filename.partition('.')
+        if ext not in self.formats or len(digest) != 64:
+            return None
+        try:
+            int(digest, 16)
+        except ValueError:
+            return None
+
+        path = self._blob_path(digest, ext)
+        return path if os.path.exists(path) else None
+
+    def _store_variant(self, frame: Image.Image, ext: str) -> Dict[str, Any]:
+        """Encode one variant and store it under the digest of its bytes"""
+
+        pil_format, options = self.formats[ext]
+        buffer = io.BytesIO()
+        frame.save(buffer, format=pil_format, **options)
+        data = buffer.getvalue()
+
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest, ext)
+        if not os.path.exists(path):
+            self._write_atomic(path, data)
+
+        return {
+            'url': f"{self.url_prefix}/{digest}.{ext}",
+            'width': frame.width,
+            'height': frame.height,
+            'bytes': len(data)
+        }
+
+    def _blob_path(self, digest: str, ext: str) -> str:
+        return os.path.join(self.storage_dir, digest[:2], f"{digest}.{ext}")
+
+    def _manifest_path(self, source_digest: str) -> str:
+        return os.path.join(self.storage_dir, 'manifests', f"{source_digest}.json")
+
+    def _write_atomic(self, path: str, data: bytes) -> None:
+        """Write via a temp file + rename so readers never see partial files"""
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                tmp_file.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+# Export the service
+derivative_service = ImageDerivativeService()
@@ -0,0 +1,125 @@
+"""
+Foreground Segmentation - Separates the garment from the photo background
+Border-seeded flood fill over a downscaled frame; analyzers then read only the
+garment bounding box and its foreground pixels instead of the whole photo
+"""
+
+import logging
+from typing import Tuple
+
+import numpy as np
+from PIL import Image
+
+from .image_stats import scale_mask
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+SEGMENTATION_SIZE = 160        # px, longest side of the working frame
+BORDER_WIDTH = 3               # px of the working frame used as background seeds
+SEED_MIN_SHARE = 0.05          # border colour bins below this share aren't background
+BASE_TOLERANCE = 30.0          # RGB distance still considered background colour
+MIN_FOREGROUND_RATIO = 0.05    # below / above these, segmentation is not trusted
+MAX_FOREGROUND_RATIO = 0.97
+
+class ForegroundSegment:
+    """Garment bounding box in full-frame coordinates plus a coarse foreground mask"""
+
+    __slots__ = ('image', 'box', 'mask', 'coverage', 'segmented')
+
+    def __init__(self, image: Image.Image, box: Tuple[int, int, int, int],
+                 mask: np.ndarray, coverage: float, segmented: bool):
+        self.image = image          # full decoded frame (never cropped in memory)
+        self.box = box              # (left, top, right, bottom) of the garment
+        self.mask = mask            # coarse bool mask covering box
+        self.coverage = coverage    # foreground share of the whole frame
+        self.segmented = segmented  # False when falling back to the full frame
+
+    @classmethod
+    def full_frame(cls, image: Image.Image) -> 'ForegroundSegment':
+        """Segment that treats the whole photo as garment"""
+
+        return cls(image, (0, 0, image.width, image.height), np.ones((1, 1), dtype=bool), 1.0, False)
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return self.box[2] - self.box[0], self.box[3] - self.box[1]
+
+    def resized(self, size: Tuple[int, int]) -> Image.Image:
+        """Bounding-box region resampled straight from the full frame"""
+
+        return self.image.resize(size, Image.BILINEAR, box=self.box, reducing_gap=2.0)
+
+    def mask_for(self, size: Tuple[int, int]) -> np.ndarray:
+        """Foreground mask matching resized(size)"""
+
+        return scale_mask(self.mask, size)
+
+def segment_foreground(image: Image.Image) -> ForegroundSegment:
+    """Locate the garment by flood-filling background colours in from the border"""
+
+    scale = min(1.0, SEGMENTATION_SIZE / max(image.width, image.height))
+    width = max(1, round(image.width * scale))
+    height = max(1, round(image.height * scale))
+    if min(width, height) <= 2 * BORDER_WIDTH:
+        return ForegroundSegment.full_frame(image)
+
+    frame = np.asarray(image.resize((width, height), Image.BILINEAR, reducing_gap=2.0), dtype=np.float32)
+    foreground = ~_background_mask(frame)
+
+    coverage = float(foreground.mean())
+    if not MIN_FOREGROUND_RATIO <= coverage <= MAX_FOREGROUND_RATIO:
+        # Garment fills the frame, or matches the background: don't guess
+        logger.debug(f"Foreground coverage {coverage:.2f} out of range, using full frame")
+        return ForegroundSegment.full_frame(image)
+
+    rows = np.flatnonzero(foreground.any(axis=1))
+    cols = np.flatnonzero(foreground.any(axis=0))
+    top, bottom = rows[0], rows[-1] + 1
+    left, right = cols[0], cols[-1] + 1
+
+    box = (
+        int(left * image.width // width),
+        int(top * image.height // height),
+        int(-(-right * image.width // width)),
+        int(-(-bottom * image.height // height))
+    )
+    return ForegroundSegment(image, box, foreground[top:bottom, left:right], coverage, True)
+
+def _background_mask(frame: np.ndarray) -> np.ndarray:
+    """Pixels connected to the border through background-coloured pixels"""
+
+    height, width, _ = frame.shape
+    border = np.zeros((height, width), dtype=bool)
+    border[:BORDER_WIDTH] = border[-BORDER_WIDTH:] = True
+    border[:, :BORDER_WIDTH] = border[:, -BORDER_WIDTH:] = True
+
+    # Background colour model: mean colour of each common 32-level border bin
+    border_pixels = frame[border]
+    quantized = border_pixels.astype(np.int32) // 32
+    keys = quantized[:, 0] * 64 + quantized[:, 1] * 8 + quantized[:, 2]
+    counts = np.bincount(keys, minlength=512)
+    seeds = np.flatnonzero(counts >= SEED_MIN_SHARE * len(keys))
+    if not seeds.size:
+        return np.zeros((height, width), dtype=bool)
+    palette = np.array([border_pixels[keys == key].mean(axis=0) for key in seeds], dtype=np.float32)
+
+    # Tolerance adapts to background noise (paper grain, soft shadows)
+    border_distance = np.sqrt(((border_pixels[:, np.newaxis] - palette) ** 2).sum(axis=2)).min(axis=1)
+    tolerance = max(BASE_TOLERANCE, 3.0 * float(np.median(border_distance)))
+
+    distance = np.sqrt(((frame[:, :, np.newaxis] - palette) ** 2).sum(axis=3)).min(axis=2)
+    candidates = distance < tolerance
+
+    # Flood fill: grow the border seeds through candidate pixels until stable
+    filled = border & candidates
+    while True:
+        grown = filled.copy()
+        grown[1:] |= filled[:-1]
+        grown[:-1] |= filled[1:]
+        grown[:, 1:] |= filled[:, :-1]
+        grown[:, :-1] |= filled[:, 1:]
+        grown &= candidates
+        if np.array_equal(grown, filled):
+            return filled
+        filled = grown
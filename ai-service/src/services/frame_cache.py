@@ -0,0 +1,117 @@
+"""
+Decoded Frame Cache - Shares a single decoded image frame per upload
+Avoids decoding the same uploaded bytes again in each pipeline stage
+"""
+
+import hashlib
+import io
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Tuple
+
+from fastapi import UploadFile
+from PIL import ExifTags, Image, ImageOps
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+class DecodedFrameCache:
+    """Small byte-bounded LRU of decoded RGB frames keyed by content digest"""
+
+    def __init__(self):
+        self.max_bytes = int(os.getenv('FRAME_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+        self.max_decode_pixels = int(os.getenv('FRAME_MAX_DECODE_PIXELS', 16_000_000))
+        # Larger frames are walked in strips and released after the request, not pinned here
+        self.max_cached_pixels = int(os.getenv('FRAME_CACHE_MAX_FRAME_PIXELS', 4_000_000))
+        self._frames: "OrderedDict[str, Image.Image]" = OrderedDict()
+        self._sizes = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def can_decode(self, image: Image.Image) -> bool:
+        """True when an opened (not yet decoded) image fits the decode budget
+
+        Only JPEG can be decoded at reduced scale (down to 1/8); every other
+        format decodes at full resolution, so it must fit the budget as-is.
+        """
+
+        pixels = image.width * image.height
+        if image.format == 'JPEG':
+            return pixels <= self.max_decode_pixels * 64
+        return pixels <= self.max_decode_pixels
+
+    async def load(self, upload_file: UploadFile) -> Tuple[str, Image.Image]:
+        """Return (content digest, decoded RGB frame) for an uploaded file"""
+
+        contents = await upload_file.read()
+        await upload_file.seek(0)  # Reset for potential reuse
+        return self.load_bytes(contents)
+
+    def load_bytes(self, contents: bytes) -> Tuple[str, Image.Image]:
+        """Return (content digest, decoded RGB frame) for raw image bytes"""
+
+        digest = hashlib.sha256(contents).hexdigest()
+
+        with self._lock:
+            frame = self._frames.get(digest)
+            if frame is not None:
+                self._frames.move_to_end(digest)
+                return digest, frame
+
+        frame = Image.open(io.BytesIO(contents))
+        original_size = frame.size
+        if not self.can_decode(frame):
+            raise ValueError(f"Image resolution {frame.width}x{frame.height} exceeds the decode limit")
+
+        # JPEG can decode directly at 1/2, 1/4 or 1/8 scale: huge photos never
+        # materialize at full resolution (analysis and derivatives don't need it)
+        reduction = 1
+        while reduction < 8 and frame.width * frame.height > self.max_decode_pixels * reduction ** 2:
+            reduction *= 2
+        if reduction > 1:
+            frame.draft('RGB', (frame.width // reduction, frame.height // reduction))
+
+        # Apply the EXIF orientation once, so analysis and derivatives see the upright photo
+        if frame.getexif().get(ExifTags.Base.Orientation, 1) in (5, 6, 7, 8):
+            original_size = original_size[::-1]
+        frame = ImageOps.exif_transpose(frame)
+
+        if frame.mode != 'RGB':
+            frame = frame.convert('RGB')
+        frame.load()
+        frame.info['original_size'] = original_size
+
+        self._store(digest, frame)
+        return digest, frame
+
+    def _store(self, digest: str, frame: Image.Image) -> None:
+        """Insert a frame and evict least recently used entries over budget"""
+
+        frame_bytes = frame.width * frame.height * 3
+        if frame_bytes > self.max_bytes or frame.width * frame.height > self.max_cached_pixels:
+            return
+
+        with self._lock:
+            if digest in self._frames:
+                return
+            self._frames[digest] = frame
+            self._sizes[digest] = frame_bytes
+            self._total_bytes += frame_bytes
+
+            while self._total_bytes > self.max_bytes and self._frames:
+                evicted, _ = self._frames.popitem(last=False)
+                self._total_bytes -= self._sizes.pop(evicted)
+                logger.debug(f"Evicted decoded frame {evicted[:12]}")
+
+    def clear(self) -> None:
+        """Drop all cached frames"""
+
+        with self._lock:
+            self._frames.clear()
+            self._sizes.clear()
+            self._total_bytes = 0
+
+# Export the cache
+frame_cache = DecodedFrameCache()
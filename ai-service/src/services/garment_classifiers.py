@@ -0,0 +1,104 @@
+"""
+Garment Classifiers - Small NumPy-only CPU models for garment type and material
+Loaded through the model registry; trained weights can be supplied as .npz files
+"""
+
+import logging
+import os
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from .image_stats import ImageStats
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+FEATURE_NAMES = ['log_aspect_ratio', 'brightness', 'min_channel_mean', 'texture_variance']
+
+class LinearSoftmaxClassifier:
+    """Multinomial logistic regression over the garment feature vector"""
+
+    backend = 'numpy'
+
+    def __init__(self, labels: List[str], weights: np.ndarray, bias: np.ndarray, version: str):
+        self.labels = list(labels)
+        self.weights = np.ascontiguousarray(weights, dtype=np.float32)  # (features, classes)
+        self.bias = np.ascontiguousarray(bias, dtype=np.float32)        # (classes,)
+        self.version = version
+
+        if self.weights.shape != (len(FEATURE_NAMES), len(self.labels)):
+            raise ValueError(f"Weight shape {self.weights.shape} does not match features/labels")
+
+    @classmethod
+    def from_file(cls, path: str) -> 'LinearSoftmaxClassifier':
+        """Load trained weights from an .npz file (labels, weights, bias, version)"""
+
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                labels=[str(label) for label in data['labels']],
+                weights=data['weights'],
+                bias=data['bias'],
+                version=str(data['version']) if 'version' in data else os.path.basename(path)
+            )
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.weights.nbytes + self.bias.nbytes)
+
+    def predict_proba(self, features: np.ndarray) -> np.ndarray:
+        """Class probabilities for a (batch, features) array"""
+
+        logits = np.asarray(features, dtype=np.float32) @ self.weights + self.bias
+        logits -= logits.max(axis=1, keepdims=True)
+        exp = np.exp(logits)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    def warmup(self) -> None:
+        """Run a dummy batch so first real requests don't pay one-time costs"""
+
+        self.predict_proba(np.zeros((8, len(FEATURE_NAMES)), dtype=np.float32))
+
+def extract_garment_features(stats: ImageStats) -> np.ndarray:
+    """Build the classifier feature vector from the shared image statistics"""
+
+    return np.array([
+        np.log(stats.width / stats.height),
+        stats.mean / 255.0,
+        stats.channel_mean.min() / 255.0,
+        stats.variance / 1000.0
+    ], dtype=np.float32)
+
+def default_garment_type_model() -> LinearSoftmaxClassifier:
+    """Built-in prior: wide frames -> pants, tall frames -> dress, else t-shirt"""
+
+    # Decision boundaries sit at aspect ratios 1.5 and 0.7
+    weights = np.zeros((len(FEATURE_NAMES), 3), dtype=np.float32)
+    weights[0] = [10.0, -10.0, 0.0]
+    bias = np.array([-10.0 * np.log(1.5), 10.0 * np.log(0.7), 0.0], dtype=np.float32)
+    return LinearSoftmaxClassifier(['pants', 'dress', 't-shirt'], weights, bias, 'builtin-prior-1')
+
+def default_material_model() -> LinearSoftmaxClassifier:
+    """Built-in prior: high texture variance -> denim, bright -> cotton, else polyester"""
+
+    # Decision boundaries sit at variance 800 and a minimum channel mean of 200
+    weights = np.zeros((len(FEATURE_NAMES), 3), dtype=np.float32)
+    weights[3, 0] = 8.0
+    weights[2, 1] = 30.0
+    bias = np.array([-8.0 * 0.8, -30.0 * 200 / 255, 0.0], dtype=np.float32)
+    return LinearSoftmaxClassifier(['denim', 'cotton', 'polyester'], weights, bias, 'builtin-prior-1')
+
+def classifier_loader(
+    env_var: str,
+    default_factory: Callable[[], LinearSoftmaxClassifier]
+) -> Callable[[], LinearSoftmaxClassifier]:
+    """Loader that prefers trained weights from $env_var and falls back to the prior"""
+
+    def _load() -> LinearSoftmaxClassifier:
+        path: Optional[str] = os.getenv(env_var)
+        if path:
+            logger.info(f"Loading classifier weights from {path}")
+            return LinearSoftmaxClassifier.from_file(path)
+        return default_factory()
+
+    return _load
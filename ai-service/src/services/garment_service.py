@@ -3,73 +3,106 @@ Garment Management Service - Virtual Wardrobe Implementation
 Handles garment uploads, AI-powered tagging, and wardrobe organization
 """
 
+import hashlib
 import json
 import logging
 import os
+import threading
+import time
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 
 import numpy as np
-import requests
 from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from PIL import Image
 
+from ..config import settings
+from ..content_encoding import precompress
+from .analysis_pipeline import AnalysisPipeline
+from .derivative_service import derivative_service
+from .color_palette import ColorPalette, palette_loader
+from .foreground_segmentation import ForegroundSegment, segment_foreground
+from .frame_cache import frame_cache
+from .id_generator import new_id
+from .garment_classifiers import (classifier_loader, default_garment_type_model,
+                                  default_material_model, extract_garment_features)
+from .image_stats import ImageStats, compute_image_stats_tiled
+from .micro_batcher import MicroBatcher
+from .model_registry import model_registry
+from .progress_service import GARMENT_STAGES, progress_broker
+from .single_flight import SingleFlight
+from .texture_analysis import TEXTURE_FRAME_SIZE, analyze_texture
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def _batch_classifier(name: str):
+    """Batch function for a registered classifier: (labels, probabilities) per row
+
+    The model is looked up once per batch, so a hot-swap can't pair its
+    probabilities with another model's labels.
+    """
+
+    def _predict(batch: np.ndarray) -> List[Tuple[List[str], np.ndarray]]:
+        model = model_registry.get(name)
+        return [(model.labels, row) for row in model.predict_proba(batch)]
+
+    return _predict
+
 class GarmentService:
     """Virtual Wardrobe Garment Management Service"""
 
     def __init__(self):
-        self.supported_formats = ['.jpg', '.jpeg', '.png', '.webp']
-        self.max_file_size = 10 * 1024 * 1024  # 10MB
-        self.garment_categories = {
-            'tops': ['t-shirt', 'shirt', 'blouse', 'sweater', 'hoodie', 'tank-top', 'cardigan'],
-            'bottoms': ['jeans', 'pants', 'shorts', 'skirt', 'leggings', 'trousers'],
-            'dresses': ['dress', 'gown', 'sundress', 'maxi-dress', 'mini-dress'],
-            'outerwear': ['jacket', 'coat', 'blazer', 'vest', 'windbreaker', 'parka'],
-            'footwear': ['sneakers', 'boots', 'heels', 'sandals', 'flats', 'loafers'],
-            'accessories': ['hat', 'scarf', 'belt', 'jewelry', 'bag', 'watch', 'sunglasses']
-        }
-        self.color_palette = {
-            'black': [0, 0, 0],
-            'white': [255, 255, 255],
-            'red': [255, 0, 0],
-            'blue': [0, 0, 255],
-            'green': [0, 255, 0],
-            'yellow': [255, 255, 0],
-            'orange': [255, 165, 0],
-            'purple': [128, 0, 128],
-            'pink': [255, 192, 203],
-            'brown': [139, 69, 19],
-            'gray': [128, 128, 128],
-            'navy': [0, 0, 128],
-            'beige': [245, 245, 220]
-        }
+        self.upload_limits = settings.garment_upload
+        self.taxonomy = settings.taxonomy
+        # Concurrent uploads share one batched classifier call per model
+        self.type_batcher = MicroBatcher('garment_type', _batch_classifier('garment_type'))
+        self.material_batcher = MicroBatcher('material', _batch_classifier('material'))
+        self.segmentation_enabled = os.getenv('GARMENT_SEGMENTATION', 'true').lower() == 'true'
+        self.analysis_fields = [
+            'dominant_colors', 'dominant_shades', 'garment_type', 'style_attributes',
+            'pattern_analysis', 'material_prediction', 'occasion_tags', 'season_suitability', 'image_quality'
+        ]
+        self.analysis_pipeline = self._build_analysis_pipeline()
+        # Identical images analyzed concurrently (burst retries, hot images) run once
+        self.analysis_flight = SingleFlight('analyze')
+        self._categories_body: Optional[Tuple[ColorPalette, Dict[str, bytes]]] = None
+        self._palette_reload_lock = threading.Lock()
+        self._palette_reloading = False
+        self._palette_failed_mtime: Optional[float] = None
+        # The palette file is stat'ed at most once per interval
+        self.palette_check_interval = float(os.getenv('COLOR_PALETTE_CHECK_INTERVAL_SECONDS', 5))
+        self._palette_checked = 0.0
 
     async def upload_and_analyze_garment(
         self,
         user_id: str,
         garment_file: UploadFile,
-        metadata: Optional[Dict[str, Any]] = None
+        metadata: Optional[Dict[str, Any]] = None,
+        progress_id: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Upload and analyze a garment image"""
+        """Upload and analyze a garment image
+
+        When progress_id is given, stage events are published on that channel.
+        """
 
         try:
             # Validate file upload
             validation_result = await self._validate_garment_image(garment_file)
             if not validation_result['valid']:
                 raise HTTPException(status_code=400, detail=validation_result['error'])
+            await self._publish_stage(progress_id, 'validated')
 
             # Analyze garment image
-            analysis_result = await self._analyze_garment_image(garment_file)
+            analysis_result = await self._analyze_garment_image(garment_file, progress_id)
 
             # Extract features and properties
             garment_data = await self._extract_garment_features(analysis_result, metadata)
 
             # Generate garment ID and URLs
-            garment_id = f"garment_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+            garment_id = new_id()
             garment_data.update({
                 'garment_id': garment_id,
                 'user_id': user_id,
@@ -78,6 +111,15 @@ class GarmentService:
                 'thumbnail_url': f"/api/garments/{garment_id}/thumb.jpg"
             })
 
+            # Generate thumbnails and responsive variants once, from the decoded frame
+            derivatives = await self._generate_derivatives(garment_file)
+            if derivatives:
+                garment_data.update({
+                    'thumbnail_url': derivatives['thumbnail_url'],
+                    'derivatives': derivatives
+                })
+
+            await self._publish_stage(progress_id, 'done', {'garment_id': garment_id})
             logger.info(f"Garment analyzed successfully for user {user_id}: {garment_id}")
 
             return {
@@ -95,17 +137,17 @@ class GarmentService:
 
         # Check file extension
         file_ext = os.path.splitext(garment_file.filename)[1].lower()
-        if file_ext not in self.supported_formats:
+        if file_ext not in self.upload_limits.format_set:
             return {
                 'valid': False,
-                'error': f"Unsupported file format. Supported: {', '.join(self.supported_formats)}"
+                'error': f"Unsupported file format. Supported: {', '.join(self.upload_limits.supported_formats)}"
             }
 
         # Check file size
-        if garment_file.size > self.max_file_size:
+        if garment_file.size > self.upload_limits.max_file_size:
             return {
                 'valid': False,
-                'error': f"File too large. Maximum size: {self.max_file_size // (1024*1024)}MB"
+                'error': f"File too large. Maximum size: {self.upload_limits.max_file_size_label}"
             }
 
         # Validate image content
@@ -115,10 +157,18 @@ class GarmentService:
             image = Image.open(io.BytesIO(contents))
 
             # Check minimum dimensions
-            if image.width < 100 or image.height < 100:
+            min_dimension = self.upload_limits.min_dimension
+            if image.width < min_dimension or image.height < min_dimension:
+                return {
+                    'valid': False,
+                    'error': f"Image too small. Minimum dimensions: {min_dimension}x{min_dimension} pixels"
+                }
+
+            # Check the resolution can be decoded within the memory budget
+            if not frame_cache.can_decode(image):
                 return {
                     'valid': False,
-                    'error': "Image too small. Minimum dimensions: 100x100 pixels"
+                    'error': f"Image resolution too large. Maximum: {frame_cache.max_decode_pixels * (64 if image.format == 'JPEG' else 1) // 1_000_000} megapixels"
                 }
 
             # Reset file pointer
@@ -132,36 +182,62 @@ class GarmentService:
                 'error': f"Invalid image file: {str(e)}"
             }
 
-    async def _analyze_garment_image(self, garment_file: UploadFile) -> Dict[str, Any]:
+    async def analyze_garment_image(
+        self,
+        garment_file: UploadFile,
+        fields: Optional[List[str]] = None,
+        admit: Optional[Callable[[], Awaitable[None]]] = None
+    ) -> Dict[str, Any]:
+        """Analysis-only mode: run the requested analyzers without persisting anything
+
+        Skips ID generation, metadata merging and derivative generation.
+        Concurrent requests for the same image bytes and fields share one run;
+        admit is awaited only by the request that starts it.
+        """
+
+        requested = self._resolve_analysis_fields(fields)
+
+        validation_result = await self._validate_garment_image(garment_file)
+        if not validation_result['valid']:
+            raise HTTPException(status_code=400, detail=validation_result['error'])
+
+        contents = await garment_file.read()
+        key = (hashlib.sha256(contents).hexdigest(), tuple(requested))
+        return await self.analysis_flight.do(key, lambda: self._analyze_bytes(contents, requested), admit=admit)
+
+    async def _analyze_bytes(self, contents: bytes, fields: List[str]) -> Dict[str, Any]:
+        """Decode (or reuse) the frame for raw image bytes and run the given analyzers"""
+
+        _, image = frame_cache.load_bytes(contents)
+        return await self._run_analyzers(image, fields)
+
+    def _resolve_analysis_fields(self, fields: Optional[List[str]]) -> List[str]:
+        """Validate requested analysis fields (all fields when none requested)"""
+
+        if not fields:
+            return list(self.analysis_fields)
+
+        unknown = [field for field in fields if field not in self.analysis_fields]
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown analysis fields: {', '.join(unknown)}. Supported: {', '.join(self.analysis_fields)}"
+            )
+        return [field for field in self.analysis_fields if field in fields]
+
+    async def _analyze_garment_image(
+        self,
+        garment_file: UploadFile,
+        progress_id: Optional[str] = None
+    ) -> Dict[str, Any]:
         """Analyze garment image using AI/Computer Vision"""
 
         try:
-            import io
-            contents = await garment_file.read()
-            image = Image.open(io.BytesIO(contents))
-
-            # Convert to RGB if necessary
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
-
-            # Basic analysis (MVP implementation)
-            analysis = {
-                'dominant_colors': self._extract_dominant_colors(image),
-                'garment_type': self._classify_garment_type(image),
-                'style_attributes': self._extract_style_attributes(image),
-                'pattern_analysis': self._analyze_patterns(image),
-                'material_prediction': self._predict_material(image),
-                'occasion_tags': self._generate_occasion_tags(image),
-                'season_suitability': self._analyze_season_suitability(image),
-                'image_quality': {
-                    'resolution': f"{image.width}x{image.height}",
-                    'clarity': 'good',  # MVP placeholder
-                    'lighting': 'adequate'  # MVP placeholder
-                }
-            }
+            # Decoded once per upload and shared with the derivative pipeline
+            _, image = await frame_cache.load(garment_file)
+            await self._publish_stage(progress_id, 'decoded', {'resolution': f"{image.width}x{image.height}"})
 
-            await garment_file.seek(0)  # Reset for potential reuse
-            return analysis
+            return await self._run_analyzers(image, self.analysis_fields, progress_id)
 
         except Exception as e:
             logger.error(f"Garment analysis failed: {str(e)}")
@@ -170,112 +246,262 @@ class GarmentService:
                 'analysis_failed': True
             }
 
-    def _extract_dominant_colors(self, image: Image.Image) -> List[str]:
-        """Extract dominant colors from garment image"""
+    async def _run_analyzers(
+        self,
+        image: Image.Image,
+        fields: List[str],
+        progress_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Run only the requested analyzers (and their shared inputs) on a decoded frame"""
+
+        async def on_complete(stage: str, result: Any) -> None:
+            if stage == 'dominant_colors':
+                await self._publish_stage(progress_id, 'colors', {'dominant_colors': result})
+
+        analysis = await self.analysis_pipeline.run({'image': image}, fields, on_complete)
+
+        # Keep the documented field order regardless of completion order
+        return {field: analysis[field] for field in self.analysis_fields if field in analysis}
+
+    def _build_analysis_pipeline(self) -> AnalysisPipeline:
+        """Analyzer DAG: shared intermediates first, then the output stages"""
+
+        pipeline = AnalysisPipeline(seeds=['image'])
+
+        # Shared intermediates (each computed at most once per analysis)
+        pipeline.add_stage('foreground', self._segment_foreground, ('image',))
+        pipeline.add_stage('image_stats', self._compute_image_stats, ('foreground',))
+        pipeline.add_stage('classifier_features', extract_garment_features, ('image_stats',))
+        pipeline.add_stage('color_histogram', self._compute_color_histogram, ('foreground',))
+
+        # Output stages (the public analysis fields)
+        pipeline.add_stage('dominant_colors', self._extract_dominant_colors, ('color_histogram',))
+        pipeline.add_stage('dominant_shades', self._extract_dominant_shades, ('color_histogram',))
+        pipeline.add_stage('garment_type', self._classify_garment_type, ('classifier_features',))
+        pipeline.add_stage('style_attributes', self._extract_style_attributes, ('image_stats',))
+        pipeline.add_stage('pattern_analysis', self._analyze_patterns, ('foreground', 'image_stats'))
+        pipeline.add_stage('material_prediction', self._predict_material, ('classifier_features',))
+        pipeline.add_stage('occasion_tags', self._generate_occasion_tags, ('image_stats',))
+        pipeline.add_stage('season_suitability', self._analyze_season_suitability, ('image_stats',))
+        pipeline.add_stage('image_quality', self._assess_image_quality, ('image',))
+
+        return pipeline
+
+    async def _publish_stage(
+        self,
+        progress_id: Optional[str],
+        stage: str,
+        data: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Publish a garment pipeline stage event"""
+
+        await progress_broker.publish(
+            progress_id,
+            stage,
+            progress=(GARMENT_STAGES.index(stage) + 1) / len(GARMENT_STAGES),
+            final=stage == GARMENT_STAGES[-1],
+            data=data
+        )
+
+    async def _generate_derivatives(self, garment_file: UploadFile) -> Optional[Dict[str, Any]]:
+        """Generate thumbnail/responsive derivatives (never fails the upload)"""
 
         try:
-            # Resize image for faster processing
-            image_small = image.resize((150, 150))
-            img_array = np.array(image_small)
-
-            # Reshape to list of pixels
-            pixels = img_array.reshape(-1, 3)
-
-            # Simple color clustering (MVP implementation)
-            # In production, use proper k-means clustering
-            unique_colors = []
-            color_counts = {}
-
-            for pixel in pixels[::10]:  # Sample every 10th pixel
-                closest_color = self._find_closest_color(pixel)
-                if closest_color in color_counts:
-                    color_counts[closest_color] += 1
-                else:
-                    color_counts[closest_color] = 1
+            source_digest, image = await frame_cache.load(garment_file)
+            return await run_in_threadpool(
+                derivative_service.generate_derivatives, image, source_digest
+            )
+
+        except Exception as e:
+            logger.warning(f"Derivative generation failed: {str(e)}")
+            return None
+
+    def _segment_foreground(self, image: Image.Image) -> ForegroundSegment:
+        """Separate the garment from the background (whole frame when disabled)"""
+
+        if not self.segmentation_enabled:
+            return ForegroundSegment.full_frame(image)
+        return segment_foreground(image)
+
+    def _compute_image_stats(self, foreground: ForegroundSegment) -> ImageStats:
+        """Shared statistics over the garment's foreground pixels only"""
 
-            # Sort by frequency and return top 3
-            sorted_colors = sorted(color_counts.items(), key=lambda x: x[1], reverse=True)
-            return [color for color, count in sorted_colors[:3]]
+        return compute_image_stats_tiled(foreground.image, box=foreground.box, mask=foreground.mask)
 
-        except Exception:
+    def _compute_color_histogram(
+        self,
+        foreground: ForegroundSegment
+    ) -> Optional[Tuple[ColorPalette, np.ndarray]]:
+        """Per-shade pixel counts over the garment foreground (one LUT gather)"""
+
+        try:
+            # Resize the garment region for faster processing
+            image_small = foreground.resized((150, 150))
+            pixels = np.asarray(image_small).reshape(-1, 3)[foreground.mask_for((150, 150)).ravel()]
+
+            # Counts travel with the palette they index, so a palette reload can't mix them up
+            # Analyzer stages run in the threadpool, so they may wait for a cold load
+            palette = self._color_palette(blocking=True)
+            return palette, palette.shade_counts(pixels)
+
+        except Exception as e:
+            logger.warning(f"Color histogram failed: {str(e)}")
+            return None
+
+    def _extract_dominant_colors(self, color_histogram: Optional[Tuple[ColorPalette, np.ndarray]]) -> List[str]:
+        """Top 3 base color families of the garment"""
+
+        if color_histogram is None:
             return ['unknown']
 
+        palette, shade_counts = color_histogram
+        counts = palette.family_counts(shade_counts)
+        top = np.argsort(counts, kind='stable')[::-1][:3]
+        return [palette.families[index] for index in top if counts[index] > 0] or ['unknown']
+
+    def _extract_dominant_shades(
+        self,
+        color_histogram: Optional[Tuple[ColorPalette, np.ndarray]]
+    ) -> List[Dict[str, Any]]:
+        """Top 5 named shades of the garment with their family and pixel share"""
+
+        if color_histogram is None:
+            return []
+
+        palette, shade_counts = color_histogram
+        total = max(int(shade_counts.sum()), 1)
+        top = np.argsort(shade_counts, kind='stable')[::-1][:5]
+        return [
+            {
+                'name': palette.shade_names[index],
+                'family': palette.families[palette.shade_family[index]],
+                'share': round(float(shade_counts[index]) / total, 3)
+            }
+            for index in top if shade_counts[index] > 0
+        ]
+
     def _find_closest_color(self, pixel_rgb) -> str:
-        """Find closest named color to RGB value"""
-
-        min_distance = float('inf')
-        closest_color = 'unknown'
-
-        for color_name, color_rgb in self.color_palette.items():
-            distance = sum((a - b) ** 2 for a, b in zip(pixel_rgb, color_rgb))
-            if distance < min_distance:
-                min_distance = distance
-                closest_color = color_name
-
-        return closest_color
-
-    def _classify_garment_type(self, image: Image.Image) -> Dict[str, Any]:
-        """Classify garment type using image analysis"""
-
-        # MVP implementation - basic classification
-        # In production, use trained ML model
-
-        width, height = image.size
-        aspect_ratio = width / height
-
-        # Simple heuristic-based classification
-        if aspect_ratio > 1.5:
-            # Wide images likely bottoms
-            category = 'bottoms'
-            type_prediction = 'pants'
-            confidence = 0.6
-        elif aspect_ratio < 0.7:
-            # Tall images likely dresses or coats
-            category = 'dresses'
-            type_prediction = 'dress'
-            confidence = 0.7
-        else:
-            # Square-ish images likely tops
-            category = 'tops'
-            type_prediction = 't-shirt'
-            confidence = 0.5
+        """Find closest named color family to RGB value (CIEDE2000, via the lookup table)"""
+
+        palette = self._color_palette()
+        return palette.family_of(palette.lookup_table.name_of(pixel_rgb))
+
+    def _color_palette(self, blocking: bool = False) -> ColorPalette:
+        """Active palette; loads and reloads run in the background
+
+        Request handlers call this on the event loop: when the palette is not
+        loaded yet it starts the load and raises 503 instead of building the
+        lookup table inline. blocking=True (threadpool callers) waits for it.
+        """
+
+        palette = model_registry.get_loaded('color_palette')
+        if palette is None:
+            if blocking:
+                return model_registry.get('color_palette')
+            self._refresh_color_palette(None)
+            raise HTTPException(status_code=503, detail="Color palette loading", headers={'Retry-After': '1'})
+
+        now = time.monotonic()
+        if now - self._palette_checked >= self.palette_check_interval:
+            self._palette_checked = now
+            if palette.is_stale():
+                self._refresh_color_palette(palette)
+        return palette
+
+    def _refresh_color_palette(self, palette: Optional[ColorPalette]) -> None:
+        """Load (palette None) or rebuild a changed palette on a background thread, one at a time
+
+        The current palette keeps serving until the swap; a file that fails to
+        load is not retried until it changes again.
+        """
+
+        mtime = palette.file_mtime() if palette is not None else None
+        with self._palette_reload_lock:
+            if self._palette_reloading or (palette is not None and mtime == self._palette_failed_mtime):
+                return
+            self._palette_reloading = True
+
+        def _refresh():
+            try:
+                if palette is None:
+                    model_registry.load('color_palette')
+                else:
+                    logger.info(f"Color palette {palette.path} changed, reloading")
+                    model_registry.swap('color_palette')
+            except Exception as e:
+                self._palette_failed_mtime = mtime
+                logger.error(f"Color palette reload failed, keeping the current palette: {str(e)}")
+            finally:
+                self._palette_reloading = False
+
+        threading.Thread(target=_refresh, name='color-palette-refresh', daemon=True).start()
+
+    def color_family_count(self) -> Optional[int]:
+        """Number of base color families, None while the palette is loading"""
+
+        palette = model_registry.get_loaded('color_palette')
+        return len(palette.families) if palette is not None else None
+
+    def color_families(self) -> List[str]:
+        """Base color families of the active palette"""
 
+        return list(self._color_palette().families)
+
+    def wire_dictionaries(self) -> Dict[str, List[str]]:
+        """Stable vocabularies for dictionary-encoding garment listing columns"""
+
+        families = self.color_families()
         return {
-            'category': category,
-            'type': type_prediction,
-            'confidence': confidence,
-            'subcategory': self._get_subcategory(type_prediction)
+            'category': list(self.taxonomy.categories),
+            'type': list(self.taxonomy.type_to_category),
+            'primary_color': families,
+            'colors': families,
+            'seasons': list(self.taxonomy.seasons),
+            'occasions': list(self.taxonomy.occasions)
         }
 
-    def _get_subcategory(self, garment_type: str) -> str:
-        """Get subcategory for garment type"""
-
-        subcategory_map = {
-            't-shirt': 'casual',
-            'shirt': 'formal',
-            'dress': 'formal',
-            'jeans': 'casual',
-            'pants': 'business',
-            'shorts': 'casual',
-            'jacket': 'outerwear',
-            'sweater': 'knitwear'
-        }
+    def categories_body(self) -> Dict[str, bytes]:
+        """Pre-serialized and precompressed /categories/list bodies by content encoding
+
+        Rebuilt only when the palette changes; 'identity' holds the raw JSON.
+        """
+
+        palette = self._color_palette()
+        cached = self._categories_body
+        if cached is None or cached[0] is not palette:
+            body = json.dumps({
+                'categories': {category: list(types) for category, types in self.taxonomy.categories.items()},
+                'colors': palette.families,
+                'seasons': list(self.taxonomy.seasons),
+                'occasions': list(self.taxonomy.occasions)
+            }, separators=(',', ':')).encode()
+            cached = self._categories_body = (palette, dict(precompress(body), identity=body))
+        return cached[1]
 
-        return subcategory_map.get(garment_type, 'general')
+    async def _classify_garment_type(self, features: np.ndarray) -> Dict[str, Any]:
+        """Classify garment type with the registered CPU classifier (micro-batched)"""
 
-    def _extract_style_attributes(self, image: Image.Image) -> List[str]:
+        labels, probabilities = await self.type_batcher.submit(features)
+        best = int(np.argmax(probabilities))
+        type_prediction = labels[best]
+
+        return {
+            'category': self.taxonomy.category_of(type_prediction),
+            'type': type_prediction,
+            'confidence': round(float(probabilities[best]), 2),
+            'subcategory': self.taxonomy.subcategory_of(type_prediction)
+        }
+
+    def _extract_style_attributes(self, stats: ImageStats) -> List[str]:
         """Extract style attributes from garment"""
 
         # MVP implementation - generate basic style tags
         style_attributes = []
 
         # Analyze image properties for style cues
-        img_array = np.array(image)
-        avg_brightness = np.mean(img_array)
-
-        if avg_brightness > 200:
+        if stats.mean > 200:
             style_attributes.append('light')
-        elif avg_brightness < 100:
+        elif stats.mean < 100:
             style_attributes.append('dark')
 
         # Add common style attributes (MVP)
@@ -283,79 +509,62 @@ class GarmentService:
 
         return style_attributes
 
-    def _analyze_patterns(self, image: Image.Image) -> Dict[str, Any]:
-        """Analyze patterns in garment"""
+    def _analyze_patterns(self, foreground: ForegroundSegment, stats: ImageStats) -> Dict[str, Any]:
+        """Detect stripes, checks, prints and weaves from FFT, gradient and LBP features"""
 
-        # MVP implementation - basic pattern detection
         try:
-            img_array = np.array(image.convert('L'))  # Convert to grayscale
-
-            # Simple pattern detection using variance
-            variance = np.var(img_array)
+            frame_size = (TEXTURE_FRAME_SIZE, TEXTURE_FRAME_SIZE)
+            texture = analyze_texture(
+                foreground.resized(frame_size), stats, foreground.mask_for(frame_size)
+            )
 
+            variance = stats.gray_variance
             if variance > 1000:
-                pattern_type = 'patterned'
                 pattern_intensity = 'high'
             elif variance > 500:
-                pattern_type = 'textured'
                 pattern_intensity = 'medium'
             else:
-                pattern_type = 'solid'
                 pattern_intensity = 'low'
 
             return {
-                'type': pattern_type,
+                'type': texture['type'],
                 'intensity': pattern_intensity,
-                'details': ['geometric'] if variance > 800 else ['simple']
+                'details': texture['details'],
+                'texture_features': texture['features']
             }
 
-        except Exception:
+        except Exception as e:
+            # Optional stage: a texture failure must not fail the whole analysis
+            logger.warning(f"Pattern analysis failed: {str(e)}")
             return {
                 'type': 'unknown',
                 'intensity': 'unknown',
-                'details': []
+                'details': [],
+                'texture_features': {}
             }
 
-    def _predict_material(self, image: Image.Image) -> Dict[str, Any]:
-        """Predict garment material"""
-
-        # MVP implementation - basic material prediction
-        materials = ['cotton', 'denim', 'wool', 'silk', 'polyester', 'leather']
+    async def _predict_material(self, features: np.ndarray) -> Dict[str, Any]:
+        """Predict garment material with the registered CPU classifier (micro-batched)"""
 
-        # Simple heuristic based on image properties
-        img_array = np.array(image)
-        avg_color = np.mean(img_array, axis=(0, 1))
-        texture_variance = np.var(img_array)
-
-        if texture_variance > 800:
-            predicted_material = 'denim'
-            confidence = 0.6
-        elif avg_color[0] > 200 and avg_color[1] > 200 and avg_color[2] > 200:
-            predicted_material = 'cotton'
-            confidence = 0.5
-        else:
-            predicted_material = 'polyester'
-            confidence = 0.4
+        labels, probabilities = await self.material_batcher.submit(features)
+        ranking = np.argsort(probabilities)[::-1]
 
         return {
-            'primary': predicted_material,
-            'confidence': confidence,
-            'alternatives': [m for m in materials if m != predicted_material][:2]
+            'primary': labels[ranking[0]],
+            'confidence': round(float(probabilities[ranking[0]]), 2),
+            'alternatives': [labels[i] for i in ranking[1:3]]
         }
 
-    def _generate_occasion_tags(self, image: Image.Image) -> List[str]:
+    def _generate_occasion_tags(self, stats: ImageStats) -> List[str]:
         """Generate occasion tags for garment"""
 
         # MVP implementation - generate basic occasion tags
         occasion_tags = ['casual']
 
         # Simple analysis based on image properties
-        img_array = np.array(image)
-        avg_brightness = np.mean(img_array)
-
-        if avg_brightness > 180:
+        if stats.mean > 180:
             occasion_tags.extend(['daytime', 'office'])
-        elif avg_brightness < 120:
+        elif stats.mean < 120:
             occasion_tags.extend(['evening', 'formal'])
 
         # Add general occasions
@@ -363,21 +572,18 @@ class GarmentService:
 
         return list(set(occasion_tags))  # Remove duplicates
 
-    def _analyze_season_suitability(self, image: Image.Image) -> List[str]:
+    def _analyze_season_suitability(self, stats: ImageStats) -> List[str]:
         """Analyze season suitability"""
 
         # MVP implementation - basic season analysis
-        img_array = np.array(image)
-        avg_color = np.mean(img_array, axis=(0, 1))
-
         seasons = []
 
         # Light colors for spring/summer
-        if np.mean(avg_color) > 150:
+        if stats.mean > 150:
             seasons.extend(['spring', 'summer'])
 
         # Darker colors for fall/winter
-        if np.mean(avg_color) < 120:
+        if stats.mean < 120:
             seasons.extend(['fall', 'winter'])
 
         # If neither, suitable for all seasons
@@ -386,6 +592,18 @@ class GarmentService:
 
         return seasons
 
+    def _assess_image_quality(self, image: Image.Image) -> Dict[str, Any]:
+        """Assess image quality"""
+
+        # Report the uploaded resolution even when the frame was decoded at reduced scale
+        width, height = image.info.get('original_size', image.size)
+
+        return {
+            'resolution': f"{width}x{height}",
+            'clarity': 'good',  # MVP placeholder
+            'lighting': 'adequate'  # MVP placeholder
+        }
+
     async def _extract_garment_features(
         self,
         analysis_result: Dict[str, Any],
@@ -408,6 +626,7 @@ class GarmentService:
             'subcategory': analysis_result.get('garment_type', {}).get('subcategory', 'general'),
             'colors': analysis_result.get('dominant_colors', []),
             'primary_color': analysis_result.get('dominant_colors', ['unknown'])[0],
+            'shades': [shade['name'] for shade in analysis_result.get('dominant_shades', [])],
             'style_attributes': analysis_result.get('style_attributes', []),
             'pattern': analysis_result.get('pattern_analysis', {}),
             'material': analysis_result.get('material_prediction', {}),
@@ -583,3 +802,15 @@ class GarmentService:
 
 # Export the service
 garment_service = GarmentService()
+model_registry.register(
+    'garment_type',
+    classifier_loader('GARMENT_TYPE_MODEL_PATH', default_garment_type_model)
+)
+model_registry.register(
+    'material',
+    classifier_loader('MATERIAL_MODEL_PATH', default_material_model)
+)
+model_registry.register(
+    'color_palette',
+    palette_loader(settings.color_palette_path, settings.color_lut_cache_dir)
+)
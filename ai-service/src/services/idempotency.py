@@ -0,0 +1,238 @@
+"""
+Idempotency Store - Client-supplied Idempotency-Key support for expensive POSTs
+Replays the stored response for retried requests; Redis-backed with an in-memory fallback
+"""
+
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from fastapi import HTTPException, Response, UploadFile
+
+from ..responses import FastJSONResponse, dumps
+
+# Optional Redis client, imported on connect (falls back to the in-memory backend without it)
+REDIS_AVAILABLE = importlib.util.find_spec('redis') is not None
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+
+class IdempotencyConflict(HTTPException):
+    """Key reused for a different request, or its first request is still running"""
+
+class InMemoryIdempotencyBackend:
+    """Process-local idempotency records (local testing only)
+
+    Bounded like the frame cache: least recently used completed records are
+    evicted past an entry or byte budget (pending claims are never evicted).
+    """
+
+    name = 'memory'
+
+    def __init__(self):
+        self.max_entries = int(os.getenv('IDEMPOTENCY_MEMORY_MAX_ENTRIES', 10_000))
+        self.max_bytes = int(os.getenv('IDEMPOTENCY_MEMORY_MAX_BYTES', 64 * 1024 * 1024))
+        self._records: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._expires: Dict[str, float] = {}
+        self._sizes: Dict[str, int] = {}
+        self._total_bytes = 0
+
+    async def connect(self) -> None:
+        return None
+
+    async def close(self) -> None:
+        return None
+
+    async def claim(self, key: str, record: Dict[str, Any], ttl: int) -> Optional[Dict[str, Any]]:
+        self._expire()
+        existing = self._records.get(key)
+        if existing is not None:
+            self._records.move_to_end(key)
+            return dict(existing)
+        self._put(key, record, ttl)
+        return None
+
+    async def save(self, key: str, record: Dict[str, Any], ttl: int) -> None:
+        self._put(key, record, ttl)
+
+    async def delete(self, key: str) -> None:
+        self._remove(key)
+
+    def _put(self, key: str, record: Dict[str, Any], ttl: int) -> None:
+        self._remove(key)
+        size = len(record.get('body', '')) + len(key) + len(record['fingerprint'])
+        self._records[key] = dict(record)
+        self._expires[key] = time.monotonic() + ttl
+        self._sizes[key] = size
+        self._total_bytes += size
+
+        while len(self._records) > self.max_entries or self._total_bytes > self.max_bytes:
+            evicted = next((k for k, r in self._records.items() if r['status'] != 'pending'), None)
+            if evicted is None:
+                break
+            self._remove(evicted)
+
+    def _remove(self, key: str) -> None:
+        if self._records.pop(key, None) is not None:
+            del self._expires[key]
+            self._total_bytes -= self._sizes.pop(key)
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        for key in [key for key, expires in self._expires.items() if expires <= now]:
+            self._remove(key)
+
+class RedisIdempotencyBackend:
+    """Redis idempotency records shared by all workers (SET NX claims)"""
+
+    name = 'redis'
+
+    def __init__(self, redis_url: str, prefix: str = 'wardrobe:idempotency'):
+        self.redis_url = redis_url
+        self.prefix = prefix
+        self._client = None
+
+    async def connect(self) -> None:
+        import redis.asyncio as redis_asyncio
+
+        self._client = redis_asyncio.from_url(self.redis_url)
+        await self._client.ping()
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+    async def claim(self, key: str, record: Dict[str, Any], ttl: int) -> Optional[Dict[str, Any]]:
+        if await self._client.set(f"{self.prefix}:{key}", json.dumps(record), ex=ttl, nx=True):
+            return None
+        raw = await self._client.get(f"{self.prefix}:{key}")
+        # Expired between SET NX and GET: treat as a conflict-free retry of the claim
+        return json.loads(raw) if raw else await self.claim(key, record, ttl)
+
+    async def save(self, key: str, record: Dict[str, Any], ttl: int) -> None:
+        await self._client.set(f"{self.prefix}:{key}", json.dumps(record), ex=ttl)
+
+    async def delete(self, key: str) -> None:
+        await self._client.delete(f"{self.prefix}:{key}")
+
+class IdempotencyStore:
+    """Runs a request at most once per (scope, Idempotency-Key) within the TTL
+
+    The first request claims the key and its JSON response is stored; retries
+    with the same key and the same request fingerprint get that response back
+    without redoing the work. Failed requests release the key so they can be
+    retried.
+    """
+
+    def __init__(self):
+        self.ttl = int(os.getenv('IDEMPOTENCY_TTL_SECONDS', 24 * 60 * 60))
+        # A claim outlives its request only if the worker died mid-flight
+        self.pending_ttl = int(os.getenv('IDEMPOTENCY_PENDING_TTL_SECONDS', 10 * 60))
+        self.backend = self._create_backend()
+
+    def _create_backend(self):
+        """Pick Redis when configured and available, else the in-memory store"""
+
+        backend = os.getenv('IDEMPOTENCY_BACKEND', 'auto').lower()
+        redis_url = os.getenv('REDIS_URL')
+
+        if backend in ('auto', 'redis') and redis_url and REDIS_AVAILABLE:
+            return RedisIdempotencyBackend(redis_url)
+        if backend == 'redis':
+            logger.warning("Redis idempotency backend requested but unavailable, using in-memory store")
+        return InMemoryIdempotencyBackend()
+
+    async def start(self) -> None:
+        """Connect the backend"""
+
+        try:
+            await self.backend.connect()
+        except Exception as e:
+            logger.warning(f"Idempotency backend '{self.backend.name}' unavailable ({str(e)}), using in-memory store")
+            self.backend = InMemoryIdempotencyBackend()
+            await self.backend.connect()
+
+    async def stop(self) -> None:
+        """Close the backend"""
+
+        await self.backend.close()
+
+    async def run(
+        self,
+        scope: str,
+        key: Optional[str],
+        fingerprint: str,
+        fn: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Response:
+        """Run fn() once for the key and return its JSON response (replayed on retries)"""
+
+        if not key:
+            return FastJSONResponse(await fn())
+
+        if len(key) > MAX_KEY_LENGTH:
+            raise HTTPException(status_code=400, detail=f"{IDEMPOTENCY_HEADER} longer than {MAX_KEY_LENGTH} characters")
+
+        record_key = f"{scope}:{hashlib.sha256(key.encode('utf-8')).hexdigest()}"
+        existing = await self.backend.claim(
+            record_key,
+            {'status': 'pending', 'fingerprint': fingerprint},
+            self.pending_ttl
+        )
+
+        if existing is not None:
+            if existing['fingerprint'] != fingerprint:
+                raise IdempotencyConflict(
+                    status_code=422,
+                    detail=f"{IDEMPOTENCY_HEADER} was already used for a different request"
+                )
+            if existing['status'] == 'pending':
+                raise IdempotencyConflict(
+                    status_code=409,
+                    detail="A request with this Idempotency-Key is still being processed",
+                    headers={'Retry-After': '1'}
+                )
+
+            logger.info(f"Replaying stored response for {scope} ({IDEMPOTENCY_HEADER} {key[:16]})")
+            return Response(
+                existing['body'],
+                media_type='application/json',
+                headers={IDEMPOTENCY_HEADER: key, REPLAYED_HEADER: 'true'}
+            )
+
+        try:
+            body = dumps(await fn())
+        except BaseException:
+            await self.backend.delete(record_key)
+            raise
+
+        await self.backend.save(
+            record_key,
+            {'status': 'completed', 'fingerprint': fingerprint, 'body': body.decode('utf-8')},
+            self.ttl
+        )
+        return Response(body, media_type='application/json', headers={IDEMPOTENCY_HEADER: key})
+
+async def request_fingerprint(fields: Dict[str, Any], upload: Optional[UploadFile] = None) -> str:
+    """Digest of the request fields and uploaded bytes that define 'the same request'"""
+
+    digest = hashlib.sha256(json.dumps(fields, sort_keys=True, default=str).encode('utf-8'))
+    if upload is not None:
+        digest.update(await upload.read())
+        await upload.seek(0)
+    return digest.hexdigest()
+
+def is_replayed(response: Response) -> bool:
+    return response.headers.get(REPLAYED_HEADER) == 'true'
+
+# Export the store
+idempotency_store = IdempotencyStore()
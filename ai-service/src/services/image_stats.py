@@ -0,0 +1,192 @@
+"""
+Image Statistics Kernel - One fused pass over a uint8 RGB buffer
+Produces every statistic the heuristic analyzers need (means, variances,
+luminance histogram, edge energy) so no analyzer re-reads the full image
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+BLOCK_ROWS = 64  # Rows per block; keeps the working set cache-resident
+STRIP_BYTES = 4 * 1024 * 1024  # Max RGB bytes materialized per strip in tiled mode
+_VALUES = np.arange(256, dtype=np.float64)
+
+class ImageStats:
+    """Compact statistics record shared by all analyzers"""
+
+    __slots__ = (
+        'width', 'height', 'pixel_count',
+        'mean', 'channel_mean', 'variance',
+        'gray_mean', 'gray_variance', 'luminance_histogram', 'edge_energy'
+    )
+
+    def __init__(self, width, height, pixel_count, mean, channel_mean, variance,
+                 gray_mean, gray_variance, luminance_histogram, edge_energy):
+        self.width = width
+        self.height = height
+        self.pixel_count = pixel_count
+        self.mean = mean                                # mean over all RGB values
+        self.channel_mean = channel_mean                # (3,) per-channel mean
+        self.variance = variance                        # variance over all RGB values
+        self.gray_mean = gray_mean
+        self.gray_variance = gray_variance
+        self.luminance_histogram = luminance_histogram  # (256,) pixel counts
+        self.edge_energy = edge_energy                  # mean |dx| + |dy| of luminance
+
+class ImageStatsAccumulator:
+    """Accumulates exact integer histograms and edge sums block by block
+
+    Histogram counts make this a streaming estimator: blocks can arrive in
+    any number of strips and the final means/variances are exact, with no
+    running-mean round-off to correct for.
+    """
+
+    def __init__(self):
+        self.channel_histograms = np.zeros((3, 256), dtype=np.int64)
+        self.luminance_histogram = np.zeros(256, dtype=np.int64)
+        self.edge_sum = 0
+        self.edge_count = 0
+        self.width = 0
+        self.height = 0
+        self._last_gray_row: Optional[np.ndarray] = None
+        self._last_mask_row: Optional[np.ndarray] = None
+
+    def update(self, block: np.ndarray, mask: Optional[np.ndarray] = None) -> None:
+        """Fold one (rows, width, 3) uint8 block into the running statistics
+
+        With a (rows, width) boolean mask only masked pixels are counted, and
+        edges only between neighbouring masked pixels.
+        """
+
+        pixels = block.reshape(-1, 3) if mask is None else block[mask]
+        for channel in range(3):
+            self.channel_histograms[channel] += np.bincount(pixels[:, channel], minlength=256)
+
+        # Same fixed-point weights PIL uses for RGB -> L conversion
+        rgb = block.astype(np.int32)
+        gray = ((rgb[..., 0] * 19595 + rgb[..., 1] * 38470 + rgb[..., 2] * 7471 + 0x8000) >> 16)
+        self.luminance_histogram += np.bincount(
+            gray.ravel() if mask is None else gray[mask], minlength=256
+        )
+
+        # Edge energy, including the seam with the previous block
+        if self._last_gray_row is not None:
+            gray = np.vstack([self._last_gray_row, gray])
+            if mask is not None:
+                mask = np.vstack([self._last_mask_row, mask])
+            first_new_row = 1
+        else:
+            first_new_row = 0
+
+        if mask is None:
+            self.edge_sum += int(np.abs(np.diff(gray[first_new_row:], axis=1)).sum())
+            self.edge_sum += int(np.abs(np.diff(gray, axis=0)).sum())
+            self.edge_count += (gray.shape[0] - first_new_row) * max(gray.shape[1] - 1, 0)
+            self.edge_count += (gray.shape[0] - 1) * gray.shape[1]
+        else:
+            new_mask = mask[first_new_row:]
+            pairs = new_mask[:, 1:] & new_mask[:, :-1]
+            self.edge_sum += int(np.abs(np.diff(gray[first_new_row:], axis=1))[pairs].sum())
+            self.edge_count += int(pairs.sum())
+            pairs = mask[1:] & mask[:-1]
+            self.edge_sum += int(np.abs(np.diff(gray, axis=0))[pairs].sum())
+            self.edge_count += int(pairs.sum())
+            self._last_mask_row = mask[-1:]
+        self._last_gray_row = gray[-1:]
+
+        self.height += block.shape[0]
+        self.width = block.shape[1]
+
+    def finalize(self) -> ImageStats:
+        """Derive means and variances from the accumulated histograms"""
+
+        pixel_count = int(self.luminance_histogram.sum())
+        channel_sums = self.channel_histograms @ _VALUES
+        channel_squares = self.channel_histograms @ (_VALUES ** 2)
+        channel_mean = channel_sums / max(pixel_count, 1)
+
+        value_count = max(pixel_count * 3, 1)
+        mean = channel_sums.sum() / value_count
+        variance = channel_squares.sum() / value_count - mean ** 2
+
+        gray_mean = float(self.luminance_histogram @ _VALUES) / max(pixel_count, 1)
+        gray_variance = float(self.luminance_histogram @ (_VALUES ** 2)) / max(pixel_count, 1) - gray_mean ** 2
+
+        return ImageStats(
+            width=self.width,
+            height=self.height,
+            pixel_count=pixel_count,
+            mean=float(mean),
+            channel_mean=channel_mean,
+            variance=float(max(variance, 0.0)),
+            gray_mean=gray_mean,
+            gray_variance=float(max(gray_variance, 0.0)),
+            luminance_histogram=self.luminance_histogram,
+            edge_energy=self.edge_sum / max(self.edge_count, 1)
+        )
+
+def scale_mask(
+    mask: np.ndarray,
+    size: Tuple[int, int],
+    row_start: int = 0,
+    row_stop: Optional[int] = None
+) -> np.ndarray:
+    """Nearest-neighbour resample of a coarse boolean mask to (width, height)
+
+    Only rows [row_start, row_stop) of the resampled mask are materialized,
+    so strips of a large frame never need a full-resolution mask.
+    """
+
+    width, height = size
+    row_stop = height if row_stop is None else row_stop
+    rows = np.arange(row_start, row_stop) * mask.shape[0] // height
+    cols = np.arange(width) * mask.shape[1] // width
+    return mask[rows[:, np.newaxis], cols]
+
+def compute_image_stats(
+    frame: np.ndarray,
+    block_rows: int = BLOCK_ROWS,
+    mask: Optional[np.ndarray] = None
+) -> ImageStats:
+    """Compute all analyzer statistics for an (H, W, 3) uint8 frame in one sweep"""
+
+    accumulator = ImageStatsAccumulator()
+    for top in range(0, frame.shape[0], block_rows):
+        accumulator.update(
+            frame[top:top + block_rows],
+            None if mask is None else mask[top:top + block_rows]
+        )
+    return accumulator.finalize()
+
+def compute_image_stats_tiled(
+    image: Image.Image,
+    strip_bytes: int = STRIP_BYTES,
+    box: Optional[Tuple[int, int, int, int]] = None,
+    mask: Optional[np.ndarray] = None
+) -> ImageStats:
+    """Compute statistics by walking a decoded RGB image in horizontal strips
+
+    Only one strip is ever converted to a NumPy array, so peak extra memory
+    stays at ~strip_bytes regardless of the image resolution. box restricts
+    the walk to a region; mask is a coarse foreground mask covering it.
+    """
+
+    left, top, right, bottom = box or (0, 0, image.width, image.height)
+    width, height = right - left, bottom - top
+    strip_rows = max(BLOCK_ROWS, (strip_bytes // max(width * 3, 1)) // BLOCK_ROWS * BLOCK_ROWS)
+
+    accumulator = ImageStatsAccumulator()
+    for strip_top in range(0, height, strip_rows):
+        strip_bottom = min(strip_top + strip_rows, height)
+        strip = np.asarray(image.crop((left, top + strip_top, right, top + strip_bottom)))
+        strip_mask = None
+        if mask is not None:
+            strip_mask = scale_mask(mask, (width, height), strip_top, strip_bottom)
+        for block_top in range(0, strip.shape[0], BLOCK_ROWS):
+            accumulator.update(
+                strip[block_top:block_top + BLOCK_ROWS],
+                None if strip_mask is None else strip_mask[block_top:block_top + BLOCK_ROWS]
+            )
+    return accumulator.finalize()
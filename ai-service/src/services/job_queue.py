@@ -0,0 +1,477 @@
+"""
+Background Job Queue - Asynchronous processing for long-running AI work
+Redis-backed priority queue with an in-memory fallback for local development
+"""
+
+import asyncio
+import importlib.util
+import itertools
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from fastapi import HTTPException
+
+from .id_generator import new_id
+from .progress_service import progress_broker
+
+# Optional Redis client, imported on connect (falls back to the in-memory backend without it)
+REDIS_AVAILABLE = importlib.util.find_spec('redis') is not None
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[str, Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+class InMemoryJobBackend:
+    """Process-local job storage and priority queue (local testing only)"""
+
+    name = 'memory'
+
+    def __init__(self):
+        self._queue: "asyncio.PriorityQueue" = asyncio.PriorityQueue()
+        self._sequence = itertools.count()
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._payloads: Dict[str, Dict[str, Any]] = {}
+        self._claims: Dict[str, float] = {}
+
+    async def connect(self) -> None:
+        return None
+
+    async def close(self) -> None:
+        return None
+
+    async def enqueue(self, job_id: str, priority: int) -> None:
+        # Sequence number keeps FIFO order within the same priority
+        await self._queue.put((priority, next(self._sequence), job_id))
+
+    async def dequeue(self, timeout: float, visibility: float) -> Optional[str]:
+        try:
+            _, _, job_id = await asyncio.wait_for(self._queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+        self._claims[job_id] = time.time() + visibility
+        return job_id
+
+    async def extend(self, job_id: str, visibility: float) -> None:
+        if job_id in self._claims:
+            self._claims[job_id] = time.time() + visibility
+
+    async def ack(self, job_id: str) -> bool:
+        return self._claims.pop(job_id, None) is not None
+
+    async def expired_claims(self) -> List[str]:
+        now = time.time()
+        return [job_id for job_id, deadline in self._claims.items() if deadline <= now]
+
+    async def save_job(self, job: Dict[str, Any], ttl: int) -> None:
+        self._jobs[job['job_id']] = dict(job)
+
+    async def load_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self._jobs.get(job_id)
+        return dict(job) if job else None
+
+    async def save_payload(self, job_id: str, payload: Dict[str, Any], ttl: int) -> None:
+        self._payloads[job_id] = payload
+
+    async def load_payload(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self._payloads.get(job_id)
+
+    async def delete_payload(self, job_id: str) -> None:
+        self._payloads.pop(job_id, None)
+
+class RedisJobBackend:
+    """Redis job storage: sorted-set priority queue plus JSON job records
+
+    Dequeuing moves a job into a processing set scored by its visibility
+    deadline instead of deleting it, so a job whose worker dies (OOM kill,
+    eviction) is found by the reaper and queued again.
+    """
+
+    name = 'redis'
+
+    # KEYS: queue, processing; ARGV: claim deadline. Pop and claim atomically.
+    CLAIM_SCRIPT = """
+local item = redis.call('ZPOPMIN', KEYS[1])
+if #item == 0 then
+    return false
+end
+redis.call('ZADD', KEYS[2], ARGV[1], item[1])
+return item[1]
+"""
+
+    def __init__(self, redis_url: str, prefix: str = 'wardrobe:jobs'):
+        self.redis_url = redis_url
+        self.prefix = prefix
+        self.claim_poll_interval = 0.2
+        self._client = None
+        self._claim = None
+
+    async def connect(self) -> None:
+        import redis.asyncio as redis_asyncio
+
+        self._client = redis_asyncio.from_url(self.redis_url)
+        await self._client.ping()
+        self._claim = self._client.register_script(self.CLAIM_SCRIPT)
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+    async def enqueue(self, job_id: str, priority: int) -> None:
+        # Score orders by priority first, then by enqueue time (FIFO)
+        score = priority * 1e13 + datetime.now().timestamp() * 1000
+        await self._client.zadd(f"{self.prefix}:queue", {job_id: score})
+
+    async def dequeue(self, timeout: float, visibility: float) -> Optional[str]:
+        # Scripts can't block, so an empty queue is polled until the timeout
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            job_id = await self._claim(
+                keys=[f"{self.prefix}:queue", f"{self.prefix}:processing"],
+                args=[time.time() + visibility]
+            )
+            if job_id:
+                return job_id.decode('utf-8') if isinstance(job_id, bytes) else job_id
+
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return None
+            await asyncio.sleep(min(self.claim_poll_interval, remaining))
+
+    async def extend(self, job_id: str, visibility: float) -> None:
+        # XX: never resurrect a claim the reaper already took back
+        await self._client.zadd(f"{self.prefix}:processing", {job_id: time.time() + visibility}, xx=True)
+
+    async def ack(self, job_id: str) -> bool:
+        return bool(await self._client.zrem(f"{self.prefix}:processing", job_id))
+
+    async def expired_claims(self) -> List[str]:
+        job_ids = await self._client.zrangebyscore(f"{self.prefix}:processing", '-inf', time.time())
+        return [job_id.decode('utf-8') if isinstance(job_id, bytes) else job_id for job_id in job_ids]
+
+    async def save_job(self, job: Dict[str, Any], ttl: int) -> None:
+        await self._client.set(f"{self.prefix}:job:{job['job_id']}", json.dumps(job), ex=ttl)
+
+    async def load_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        raw = await self._client.get(f"{self.prefix}:job:{job_id}")
+        return json.loads(raw) if raw else None
+
+    async def save_payload(self, job_id: str, payload: Dict[str, Any], ttl: int) -> None:
+        await self._client.set(f"{self.prefix}:payload:{job_id}", json.dumps(payload), ex=ttl)
+
+    async def load_payload(self, job_id: str) -> Optional[Dict[str, Any]]:
+        raw = await self._client.get(f"{self.prefix}:payload:{job_id}")
+        return json.loads(raw) if raw else None
+
+    async def delete_payload(self, job_id: str) -> None:
+        await self._client.delete(f"{self.prefix}:payload:{job_id}")
+
+class JobQueue:
+    """Priority job queue with a worker pool and bounded retries"""
+
+    def __init__(self):
+        self.worker_count = int(os.getenv('JOB_WORKERS', 2))
+        self.max_attempts = int(os.getenv('JOB_MAX_ATTEMPTS', 3))
+        self.retry_backoff = float(os.getenv('JOB_RETRY_BACKOFF_SECONDS', 2.0))
+        self.job_ttl = int(os.getenv('JOB_TTL_SECONDS', 24 * 60 * 60))
+        self.poll_timeout = 1.0
+        # A claimed job not acknowledged or extended within this is considered lost
+        self.visibility_timeout = float(os.getenv('JOB_VISIBILITY_TIMEOUT_SECONDS', 300))
+        self.reap_interval = float(os.getenv('JOB_REAP_INTERVAL_SECONDS', 30))
+        self.backend = self._create_backend()
+        self._handlers: Dict[str, JobHandler] = {}
+        self._workers: List[asyncio.Task] = []
+        self._reaper: Optional[asyncio.Task] = None
+        self._retry_tasks: set = set()
+        self._stopping = False
+
+    def _create_backend(self):
+        """Pick Redis when configured and available, else the in-memory queue"""
+
+        backend = os.getenv('JOB_QUEUE_BACKEND', 'auto').lower()
+        redis_url = os.getenv('REDIS_URL')
+
+        if backend in ('auto', 'redis') and redis_url and REDIS_AVAILABLE:
+            return RedisJobBackend(redis_url)
+        if backend == 'redis':
+            logger.warning("Redis job backend requested but unavailable, using in-memory queue")
+        return InMemoryJobBackend()
+
+    def register_handler(self, job_type: str, handler: JobHandler) -> None:
+        """Register the coroutine that processes jobs of a given type"""
+
+        self._handlers[job_type] = handler
+
+    async def start(self) -> None:
+        """Connect the backend and start the worker pool"""
+
+        if self._workers:
+            return
+
+        try:
+            await self.backend.connect()
+        except Exception as e:
+            logger.warning(f"Job backend '{self.backend.name}' unavailable ({str(e)}), using in-memory queue")
+            self.backend = InMemoryJobBackend()
+            await self.backend.connect()
+
+        self._workers = [
+            asyncio.create_task(self._worker(index))
+            for index in range(self.worker_count)
+        ]
+        self._reaper = asyncio.create_task(self._reap())
+        logger.info(f"Job queue started: {self.worker_count} workers on '{self.backend.name}' backend")
+
+    async def stop(self, timeout: float = 0.0) -> None:
+        """Stop the worker pool and close the backend
+
+        Workers stop taking jobs at once and get up to timeout seconds to finish
+        the one they are running; anything still running is checkpointed back
+        onto the queue, so another instance resumes it.
+        """
+
+        self._stopping = True
+        if self._workers and timeout > 0:
+            _, pending = await asyncio.wait(self._workers, timeout=timeout)
+            if pending:
+                logger.warning(f"Job queue stop deadline reached, checkpointing {len(pending)} running job(s)")
+
+        tasks = [*self._workers, *self._retry_tasks, *([self._reaper] if self._reaper else [])]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._reaper = None
+        self._retry_tasks.clear()
+        self._stopping = False
+        await self.backend.close()
+
+    async def submit(
+        self,
+        job_type: str,
+        payload: Dict[str, Any],
+        priority: int = 5,
+        user_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Queue a job and return its public record immediately
+
+        Lower priority values are processed first.
+        """
+
+        if job_type not in self._handlers:
+            raise HTTPException(status_code=400, detail=f"Unknown job type: {job_type}")
+
+        now = datetime.now().isoformat()
+        job = {
+            'job_id': f"job_{new_id()}",
+            'type': job_type,
+            'user_id': user_id,
+            'status': 'queued',
+            'priority': priority,
+            'attempts': 0,
+            'max_attempts': self.max_attempts,
+            'error': None,
+            'result': None,
+            'created_at': now,
+            'updated_at': now,
+            'started_at': None,
+            'finished_at': None
+        }
+
+        await self.backend.save_payload(job['job_id'], payload, self.job_ttl)
+        await self.backend.save_job(job, self.job_ttl)
+        await self.backend.enqueue(job['job_id'], priority)
+        # Only the submitter may follow the job's progress channel
+        if user_id:
+            await progress_broker.claim(job['job_id'], user_id)
+        await progress_broker.publish(job['job_id'], 'queued', progress=0.0)
+
+        logger.info(f"Job {job['job_id']} queued ({job_type}, priority {priority})")
+        return job
+
+    async def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job record by ID"""
+
+        return await self.backend.load_job(job_id)
+
+    async def _worker(self, index: int) -> None:
+        """Worker loop: pull job IDs in priority order and process them"""
+
+        while not self._stopping:
+            try:
+                job_id = await self.backend.dequeue(self.poll_timeout, self.visibility_timeout)
+                if job_id and self._stopping:
+                    # Dequeued while stopping: hand it back for another instance
+                    job = await self.backend.load_job(job_id)
+                    await self.backend.ack(job_id)
+                    await self.backend.enqueue(job_id, job['priority'] if job else 5)
+                elif job_id:
+                    await self._process(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job worker {index} error: {str(e)}")
+                await asyncio.sleep(self.poll_timeout)
+
+    async def _process(self, job_id: str) -> None:
+        """Run a single job attempt and record the outcome"""
+
+        job = await self.backend.load_job(job_id)
+        payload = await self.backend.load_payload(job_id)
+        if not job or payload is None:
+            logger.warning(f"Job {job_id} expired before processing")
+            await self.backend.ack(job_id)
+            return
+
+        job.update({
+            'status': 'running',
+            'attempts': job['attempts'] + 1,
+            'started_at': job['started_at'] or datetime.now().isoformat(),
+            'updated_at': datetime.now().isoformat()
+        })
+        await self.backend.save_job(job, self.job_ttl)
+        await progress_broker.publish(job_id, 'running', progress=0.0, data={'attempt': job['attempts']})
+
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        try:
+            # Handlers publish their own stage events on the job channel
+            try:
+                result = await self._handlers[job['type']](job_id, payload)
+            finally:
+                heartbeat.cancel()
+
+            job.update({
+                'status': 'completed',
+                'result': result,
+                'error': None,
+                'finished_at': datetime.now().isoformat(),
+                'updated_at': datetime.now().isoformat()
+            })
+            await self.backend.save_job(job, self.job_ttl)
+            await self.backend.delete_payload(job_id)
+            await self.backend.ack(job_id)
+            logger.info(f"Job {job_id} completed after {job['attempts']} attempt(s)")
+
+        except asyncio.CancelledError:
+            await self._checkpoint(job)
+            raise
+
+        except Exception as e:
+            error = e.detail if isinstance(e, HTTPException) else str(e)
+            retryable = not (isinstance(e, HTTPException) and e.status_code < 500)
+
+            if retryable and job['attempts'] < job['max_attempts']:
+                delay = self.retry_backoff * (2 ** (job['attempts'] - 1))
+                job.update({
+                    'status': 'retrying',
+                    'error': error,
+                    'updated_at': datetime.now().isoformat()
+                })
+                await self.backend.save_job(job, self.job_ttl)
+                # The claim is kept through the backoff, so a retry survives a worker crash
+                await self.backend.extend(job_id, delay + self.visibility_timeout)
+                self._schedule_retry(job_id, job['priority'], delay)
+                await progress_broker.publish(job_id, 'retrying', data={'attempt': job['attempts'], 'error': error})
+                logger.warning(f"Job {job_id} failed (attempt {job['attempts']}), retrying in {delay:.1f}s: {error}")
+            else:
+                job.update({
+                    'status': 'failed',
+                    'error': error,
+                    'finished_at': datetime.now().isoformat(),
+                    'updated_at': datetime.now().isoformat()
+                })
+                await self.backend.save_job(job, self.job_ttl)
+                await self.backend.delete_payload(job_id)
+                await self.backend.ack(job_id)
+                await progress_broker.publish(job_id, 'failed', final=True, data={'error': error})
+                logger.error(f"Job {job_id} failed permanently: {error}")
+
+    async def _heartbeat(self, job_id: str) -> None:
+        """Extend a running job's claim so the reaper leaves it alone"""
+
+        while True:
+            await asyncio.sleep(self.visibility_timeout / 3)
+            try:
+                await self.backend.extend(job_id, self.visibility_timeout)
+            except Exception as e:
+                logger.warning(f"Failed to extend claim on job {job_id}: {str(e)}")
+
+    async def _reap(self) -> None:
+        """Requeue jobs whose claim expired because their worker died mid-run"""
+
+        while True:
+            await asyncio.sleep(self.reap_interval)
+            try:
+                for job_id in await self.backend.expired_claims():
+                    # Only the instance that removes the claim recovers the job
+                    if await self.backend.ack(job_id):
+                        await self._recover(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job reaper error: {str(e)}")
+
+    async def _recover(self, job_id: str) -> None:
+        """Requeue a lost job; the lost run counts as an attempt, so a job that kills its worker ends up failed"""
+
+        job = await self.backend.load_job(job_id)
+        if not job or job['status'] not in ('running', 'retrying'):
+            return
+
+        if job['attempts'] >= job['max_attempts']:
+            error = 'Worker lost while processing the job'
+            job.update({
+                'status': 'failed',
+                'error': error,
+                'finished_at': datetime.now().isoformat(),
+                'updated_at': datetime.now().isoformat()
+            })
+            await self.backend.save_job(job, self.job_ttl)
+            await self.backend.delete_payload(job_id)
+            await progress_broker.publish(job_id, 'failed', final=True, data={'error': error})
+            logger.error(f"Job {job_id} lost its worker on the final attempt, marked failed")
+            return
+
+        job.update({'status': 'queued', 'updated_at': datetime.now().isoformat()})
+        await self.backend.save_job(job, self.job_ttl)
+        await self.backend.enqueue(job_id, job['priority'])
+        await progress_broker.publish(job_id, 'requeued', data={'reason': 'worker_lost'})
+        logger.warning(f"Job {job_id} claim expired (worker lost), requeued")
+
+    async def _checkpoint(self, job: Dict[str, Any]) -> None:
+        """Put a job interrupted by shutdown back on the queue without using up an attempt"""
+
+        job.update({
+            'status': 'queued',
+            'attempts': max(0, job['attempts'] - 1),
+            'updated_at': datetime.now().isoformat()
+        })
+        await self.backend.save_job(job, self.job_ttl)
+        await self.backend.ack(job['job_id'])
+        await self.backend.enqueue(job['job_id'], job['priority'])
+        await progress_broker.publish(job['job_id'], 'requeued', data={'reason': 'shutdown'})
+        logger.info(f"Job {job['job_id']} interrupted by shutdown, requeued")
+
+    def _schedule_retry(self, job_id: str, priority: int, delay: float) -> None:
+        """Re-enqueue a job after an exponential backoff delay"""
+
+        async def _requeue():
+            try:
+                await asyncio.sleep(delay)
+            finally:
+                # On shutdown, requeue now rather than dropping the retry
+                await self.backend.ack(job_id)
+                await self.backend.enqueue(job_id, priority)
+
+        task = asyncio.create_task(_requeue())
+        self._retry_tasks.add(task)
+        task.add_done_callback(self._retry_tasks.discard)
+
+# Export the queue
+job_queue = JobQueue()
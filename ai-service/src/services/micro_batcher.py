@@ -0,0 +1,111 @@
+"""
+Micro-Batcher - Dynamic batching of concurrent inference requests
+Collects single-item requests for up to N ms or B items and runs one batched call
+"""
+
+import asyncio
+import logging
+import os
+from typing import Any, Callable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Stacked inputs -> one output per input row (an array's rows, or any sequence)
+BatchFunction = Callable[[np.ndarray], Sequence[Any]]
+
+class MicroBatcher:
+    """Groups concurrent submit() calls into batched NumPy inference calls"""
+
+    def __init__(
+        self,
+        name: str,
+        batch_fn: BatchFunction,
+        max_batch_size: Optional[int] = None,
+        max_wait_ms: Optional[float] = None
+    ):
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size or int(os.getenv('MICRO_BATCH_MAX_SIZE', 32))
+        self.max_wait = (max_wait_ms if max_wait_ms is not None
+                         else float(os.getenv('MICRO_BATCH_MAX_WAIT_MS', 2.0))) / 1000
+        self._pending: List[Tuple[np.ndarray, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # Strong references: the event loop only keeps weak ones to running tasks
+        self._tasks: Set[asyncio.Task] = set()
+        self._batches = 0
+        self._items = 0
+
+    async def submit(self, item: np.ndarray) -> Any:
+        """Queue one input row and wait for its row of the batched output"""
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            # Latency cost is bounded by max_wait for the first item in a batch
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def stats(self):
+        """Batching counters for health/status reporting"""
+
+        return {
+            'batches': self._batches,
+            'items': self._items,
+            'average_batch_size': round(self._items / self._batches, 2) if self._batches else 0.0,
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000
+        }
+
+    def _flush(self) -> None:
+        """Take everything pending and run it as one batch"""
+
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._task_done)
+
+    def _task_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Micro-batch '{self.name}' task failed: {str(task.exception())}")
+
+    async def stop(self) -> None:
+        """Run whatever is still pending and wait for in-flight batches (shutdown)"""
+
+        self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _run_batch(self, batch: List[Tuple[np.ndarray, asyncio.Future]]) -> None:
+        """Execute one batched call and resolve each caller's future individually"""
+
+        self._batches += 1
+        self._items += len(batch)
+
+        try:
+            inputs = np.stack([item for item, _ in batch])
+            outputs = await run_in_threadpool(self.batch_fn, inputs)
+        except Exception as e:
+            logger.error(f"Micro-batch '{self.name}' failed ({len(batch)} items): {str(e)}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), output in zip(batch, outputs):
+            if not future.done():
+                future.set_result(output)
@@ -0,0 +1,160 @@
+"""
+Model Registry - Lazy/eager loading, warmup and hot-swap for CPU classifiers
+Tracks real load state, load time and memory for /models/status
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+ModelLoader = Callable[[], Any]
+
+class ModelEntry:
+    """Registry slot holding one model and its load metadata"""
+
+    def __init__(self, name: str, loader: ModelLoader, required: bool):
+        self.name = name
+        self.loader = loader
+        self.required = required
+        self.state = 'unloaded'  # unloaded -> loading -> ready | failed
+        self.model: Any = None
+        self.load_time_ms: Optional[float] = None
+        self.warmup_time_ms: Optional[float] = None
+        self.memory_bytes: Optional[int] = None
+        self.loaded_at: Optional[str] = None
+        self.error: Optional[str] = None
+        self.lock = threading.Lock()
+
+class ModelRegistry:
+    """Process-wide registry of inference models"""
+
+    def __init__(self):
+        self.preload = os.getenv('MODEL_PRELOAD', 'true').lower() in ('1', 'true', 'yes')
+        self._entries: Dict[str, ModelEntry] = {}
+
+    def register(self, name: str, loader: ModelLoader, required: bool = True) -> None:
+        """Register a model loader; required models gate readiness"""
+
+        self._entries[name] = ModelEntry(name, loader, required)
+
+    def get(self, name: str) -> Any:
+        """Return a ready model, loading it on first use"""
+
+        entry = self._entries[name]
+        if entry.state == 'ready':
+            return entry.model
+
+        self.load(name)
+        if entry.state != 'ready':
+            raise RuntimeError(f"Model '{name}' unavailable: {entry.error}")
+        return entry.model
+
+    def get_loaded(self, name: str) -> Any:
+        """Return the model if it is already loaded, else None (never loads or waits)"""
+
+        entry = self._entries[name]
+        return entry.model if entry.state == 'ready' else None
+
+    def load(self, name: str, warmup: bool = True) -> None:
+        """Load (once) and optionally warm up a registered model"""
+
+        entry = self._entries[name]
+        with entry.lock:
+            if entry.state == 'ready':
+                return
+            entry.state = 'loading'
+            try:
+                model, load_ms, warmup_ms = self._build(entry.loader, warmup)
+                self._install(entry, model, load_ms, warmup_ms)
+            except Exception as e:
+                entry.state = 'failed'
+                entry.error = str(e)
+                logger.error(f"Failed to load model '{name}': {str(e)}")
+
+    def load_all(self, warmup: bool = True) -> None:
+        """Eagerly load every registered model (startup preload)"""
+
+        for name in self._entries:
+            self.load(name, warmup=warmup)
+
+    def swap(self, name: str, loader: Optional[ModelLoader] = None) -> None:
+        """Hot-swap a model: build and warm the replacement, then switch atomically
+
+        In-flight requests keep using the previous model object until they finish.
+        """
+
+        entry = self._entries[name]
+        new_loader = loader or entry.loader
+        model, load_ms, warmup_ms = self._build(new_loader, warmup=True)
+
+        with entry.lock:
+            entry.loader = new_loader
+            self._install(entry, model, load_ms, warmup_ms)
+        logger.info(f"Model '{name}' hot-swapped (version {getattr(model, 'version', 'unknown')})")
+
+    def is_ready(self) -> bool:
+        """True when every required model is loaded and warmed up
+
+        With preloading disabled models load on first use, so only
+        failed loads block readiness.
+        """
+
+        required = [entry for entry in self._entries.values() if entry.required]
+        if not self.preload:
+            return all(entry.state != 'failed' for entry in required)
+        return all(entry.state == 'ready' for entry in required)
+
+    def status(self) -> Dict[str, Any]:
+        """Real load state of all registered models"""
+
+        return {
+            'ready': self.is_ready(),
+            'preload': self.preload,
+            'models': {
+                entry.name: {
+                    'state': entry.state,
+                    'required': entry.required,
+                    'version': getattr(entry.model, 'version', None),
+                    'backend': getattr(entry.model, 'backend', None),
+                    'load_time_ms': entry.load_time_ms,
+                    'warmup_time_ms': entry.warmup_time_ms,
+                    'memory_bytes': entry.memory_bytes,
+                    'loaded_at': entry.loaded_at,
+                    'error': entry.error
+                }
+                for entry in self._entries.values()
+            }
+        }
+
+    def _build(self, loader: ModelLoader, warmup: bool):
+        """Run a loader and its warmup pass, timing both"""
+
+        started = time.perf_counter()
+        model = loader()
+        load_ms = (time.perf_counter() - started) * 1000
+
+        warmup_ms = None
+        if warmup and hasattr(model, 'warmup'):
+            started = time.perf_counter()
+            model.warmup()
+            warmup_ms = (time.perf_counter() - started) * 1000
+
+        return model, load_ms, warmup_ms
+
+    def _install(self, entry: ModelEntry, model: Any, load_ms: float, warmup_ms: Optional[float]) -> None:
+        entry.model = model
+        entry.state = 'ready'
+        entry.error = None
+        entry.load_time_ms = round(load_ms, 2)
+        entry.warmup_time_ms = round(warmup_ms, 2) if warmup_ms is not None else None
+        entry.memory_bytes = getattr(model, 'nbytes', None)
+        entry.loaded_at = datetime.now().isoformat()
+
+# Export the registry
+model_registry = ModelRegistry()
@@ -0,0 +1,351 @@
+"""
+Progress Broker - Stage-level progress events for long-running analysis
+Fans out events per channel to SSE/WebSocket subscribers with short replay history;
+Redis-backed across workers and replicas with an in-memory fallback
+"""
+
+import asyncio
+import importlib.util
+import json
+import logging
+import os
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Set, Tuple
+
+# Optional Redis client, imported on connect (falls back to the in-memory backend without it)
+REDIS_AVAILABLE = importlib.util.find_spec('redis') is not None
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Stage names published by each pipeline, in order
+GARMENT_STAGES = ['validated', 'decoded', 'colors', 'done']
+AVATAR_STAGES = ['analysis', 'config', 'mesh', 'saved']
+
+class InMemoryProgressBackend:
+    """Process-local channels (single process only: publisher and subscriber must share it)"""
+
+    name = 'memory'
+
+    def __init__(self, history_limit: int, channel_ttl: int):
+        self.history_limit = history_limit
+        self.channel_ttl = channel_ttl
+        self._history: Dict[str, Deque[Dict[str, Any]]] = {}
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._owners: Dict[str, str] = {}
+        self._last_activity: Dict[str, float] = {}
+        self._last_prune = time.monotonic()
+
+    async def connect(self) -> None:
+        return None
+
+    async def close(self) -> None:
+        return None
+
+    async def claim(self, channel: str, user_id: str) -> bool:
+        owner = self._owners.setdefault(channel, user_id)
+        if owner == user_id:
+            self._last_activity[channel] = time.monotonic()
+        return owner == user_id
+
+    async def publish(self, channel: str, event: Dict[str, Any]) -> None:
+        history = self._history.setdefault(channel, deque(maxlen=self.history_limit))
+        history.append(event)
+        self._last_activity[channel] = time.monotonic()
+
+        for queue in self._subscribers.get(channel, ()):
+            queue.put_nowait(event)
+
+        self._prune()
+
+    async def subscribe(self, channel: str, keepalive: float) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """Yield past then live events, and None after each idle keepalive interval"""
+
+        queue: asyncio.Queue = asyncio.Queue()
+        # Register before copying history so no event falls between the two
+        self._subscribers.setdefault(channel, set()).add(queue)
+        for event in self._history.get(channel, ()):
+            queue.put_nowait(event)
+
+        try:
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), timeout=keepalive)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            subscribers = self._subscribers.get(channel)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[channel]
+
+    def _prune(self) -> None:
+        """Drop history for channels idle longer than the TTL"""
+
+        now = time.monotonic()
+        if now - self._last_prune < 30:
+            return
+        self._last_prune = now
+
+        for channel, last_activity in list(self._last_activity.items()):
+            if now - last_activity > self.channel_ttl and channel not in self._subscribers:
+                self._history.pop(channel, None)
+                self._owners.pop(channel, None)
+                del self._last_activity[channel]
+
+class _StreamSubscriber:
+    """One local subscriber of a Redis channel and the last entry it was given"""
+
+    def __init__(self):
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.seen: Tuple[int, int] = (0, 0)
+        self.live = False
+
+class _StreamChannel:
+    """Local subscribers of one Redis channel and the reader's position in its stream"""
+
+    def __init__(self):
+        self.subscribers: Set[_StreamSubscriber] = set()
+        self.last_id: Optional[Tuple[int, int]] = None  # None until the first history load
+
+def _stream_id(entry_id) -> Tuple[int, int]:
+    milliseconds, _, sequence = (entry_id.decode() if isinstance(entry_id, bytes) else entry_id).partition('-')
+    return int(milliseconds), int(sequence or 0)
+
+class RedisProgressBackend:
+    """One capped Redis stream per channel, shared by all workers and replicas
+
+    The stream is both the replay history and the live feed. Each subscriber
+    replays it with XRANGE; live entries come from a single reader task per
+    process that blocks on XREAD for every subscribed channel at once and
+    fans entries out, so subscribers never hold a Redis connection each.
+    """
+
+    name = 'redis'
+
+    def __init__(self, redis_url: str, history_limit: int, channel_ttl: int, prefix: str = 'wardrobe:progress'):
+        self.redis_url = redis_url
+        self.history_limit = history_limit
+        self.channel_ttl = channel_ttl
+        self.prefix = prefix
+        self.owner_prefix = f"{prefix}-owner"
+        # Bounds how long a newly subscribed channel waits to join the shared read
+        self.read_block_ms = 250
+        self._client = None
+        self._channels: Dict[str, _StreamChannel] = {}
+        self._reader: Optional[asyncio.Task] = None
+
+    async def connect(self) -> None:
+        import redis.asyncio as redis_asyncio
+
+        self._client = redis_asyncio.from_url(self.redis_url)
+        await self._client.ping()
+
+    async def close(self) -> None:
+        if self._reader is not None:
+            self._reader.cancel()
+            self._reader = None
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+    async def claim(self, channel: str, user_id: str) -> bool:
+        key = f"{self.owner_prefix}:{channel}"
+        async with self._client.pipeline(transaction=True) as pipe:
+            pipe.set(key, user_id, nx=True, ex=self.channel_ttl)
+            pipe.get(key)
+            _, owner = await pipe.execute()
+
+        if owner is None or owner.decode() != user_id:
+            return False
+        await self._client.expire(key, self.channel_ttl)
+        return True
+
+    async def publish(self, channel: str, event: Dict[str, Any]) -> None:
+        key = f"{self.prefix}:{channel}"
+        async with self._client.pipeline(transaction=False) as pipe:
+            pipe.xadd(key, {'event': json.dumps(event)}, maxlen=self.history_limit, approximate=True)
+            pipe.expire(key, self.channel_ttl)
+            await pipe.execute()
+
+    async def subscribe(self, channel: str, keepalive: float) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """Yield past then live events, and None after each idle keepalive interval"""
+
+        subscriber = _StreamSubscriber()
+        state = self._channels.setdefault(channel, _StreamChannel())
+        state.subscribers.add(subscriber)
+
+        try:
+            await self._replay(channel, state, subscriber)
+            if self._reader is None or self._reader.done():
+                self._reader = asyncio.create_task(self._read_loop())
+
+            while True:
+                try:
+                    yield await asyncio.wait_for(subscriber.queue.get(), timeout=keepalive)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            state.subscribers.discard(subscriber)
+            if not state.subscribers and self._channels.get(channel) is state:
+                del self._channels[channel]
+
+    async def _replay(self, channel: str, state: _StreamChannel, subscriber: _StreamSubscriber) -> None:
+        """Queue the stream history, then hand the subscriber over to the shared reader
+
+        Reads until it has caught up with everything the reader already
+        dispatched, so no entry is missed or delivered twice in between.
+        """
+
+        key = f"{self.prefix}:{channel}"
+        while True:
+            start = f"({subscriber.seen[0]}-{subscriber.seen[1]}" if subscriber.seen != (0, 0) else '-'
+            entries = await self._client.xrange(key, min=start, max='+', count=self.history_limit)
+            for entry_id, fields in entries:
+                subscriber.seen = _stream_id(entry_id)
+                subscriber.queue.put_nowait(json.loads(fields[b'event']))
+
+            if not entries and state.last_id is not None:
+                # Stream trimmed or expired under us: nothing more to replay
+                subscriber.seen = max(subscriber.seen, state.last_id)
+            if state.last_id is None:
+                state.last_id = subscriber.seen
+            if subscriber.seen >= state.last_id:
+                subscriber.live = True
+                return
+
+    async def _read_loop(self) -> None:
+        """Block on XREAD across all subscribed channels and fan entries out"""
+
+        while self._channels:
+            streams = {
+                f"{self.prefix}:{channel}": f"{state.last_id[0]}-{state.last_id[1]}"
+                for channel, state in self._channels.items()
+                if state.last_id is not None
+            }
+            if not streams:
+                await asyncio.sleep(self.read_block_ms / 1000)
+                continue
+
+            try:
+                response = await self._client.xread(streams, count=self.history_limit, block=self.read_block_ms)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Progress stream read failed: {str(e)}")
+                await asyncio.sleep(1.0)
+                continue
+
+            for key, entries in response or ():
+                channel = (key.decode() if isinstance(key, bytes) else key)[len(self.prefix) + 1:]
+                state = self._channels.get(channel)
+                if state is None:
+                    continue
+                for entry_id, fields in entries:
+                    entry = _stream_id(entry_id)
+                    state.last_id = max(state.last_id, entry)
+                    event = json.loads(fields[b'event'])
+                    for subscriber in state.subscribers:
+                        if subscriber.live and entry > subscriber.seen:
+                            subscriber.seen = entry
+                            subscriber.queue.put_nowait(event)
+
+class ProgressBroker:
+    """Pub/sub of progress events keyed by channel ID"""
+
+    def __init__(self):
+        self.history_limit = 32
+        self.channel_ttl = int(os.getenv('PROGRESS_CHANNEL_TTL_SECONDS', 300))
+        self.keepalive_interval = 15.0
+        self.backend = self._create_backend()
+
+    def _create_backend(self):
+        """Pick Redis when configured and available, else in-process channels"""
+
+        backend = os.getenv('PROGRESS_BACKEND', 'auto').lower()
+        redis_url = os.getenv('REDIS_URL')
+
+        if backend in ('auto', 'redis') and redis_url and REDIS_AVAILABLE:
+            return RedisProgressBackend(redis_url, self.history_limit, self.channel_ttl)
+        if backend == 'redis':
+            logger.warning("Redis progress backend requested but unavailable, using in-process channels")
+        return InMemoryProgressBackend(self.history_limit, self.channel_ttl)
+
+    async def start(self) -> None:
+        """Connect the backend"""
+
+        try:
+            await self.backend.connect()
+        except Exception as e:
+            logger.warning(f"Progress backend '{self.backend.name}' unavailable ({str(e)}), using in-process channels")
+            self.backend = InMemoryProgressBackend(self.history_limit, self.channel_ttl)
+            await self.backend.connect()
+
+    async def stop(self) -> None:
+        """Close the backend"""
+
+        await self.backend.close()
+
+    async def claim(self, channel: str, user_id: Optional[str]) -> bool:
+        """Bind a channel to a user on first use (publisher or subscriber)
+
+        True when the channel is, or now becomes, that user's. Anonymous callers
+        and an unavailable backend get False: no one else's events are exposed.
+        """
+
+        if not user_id:
+            return False
+        try:
+            return await self.backend.claim(channel, user_id)
+        except Exception as e:
+            logger.warning(f"Failed to claim progress channel {channel}: {str(e)}")
+            return False
+
+    async def publish(
+        self,
+        channel: Optional[str],
+        stage: str,
+        progress: Optional[float] = None,
+        final: bool = False,
+        data: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Publish a stage event (no-op when the caller did not ask for progress)"""
+
+        if not channel:
+            return
+
+        event = {
+            'channel': channel,
+            'stage': stage,
+            'progress': progress,
+            'final': final,
+            'data': data or {},
+            'timestamp': datetime.now().isoformat()
+        }
+
+        try:
+            await self.backend.publish(channel, event)
+        except Exception as e:
+            # Progress is best-effort: never fail the work being reported on
+            logger.warning(f"Failed to publish progress for {channel}: {str(e)}")
+
+    async def subscribe(self, channel: str) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """Yield past then live events until a final event
+
+        Yields None every keepalive interval so transports can send heartbeats.
+        """
+
+        events = self.backend.subscribe(channel, self.keepalive_interval)
+        try:
+            async for event in events:
+                yield event
+                if event is not None and event['final']:
+                    return
+        finally:
+            await events.aclose()
+
+# Export the broker
+progress_broker = ProgressBroker()
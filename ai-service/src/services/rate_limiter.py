@@ -0,0 +1,221 @@
+"""
+Rate Limiter - Cost-weighted token-bucket admission control for expensive endpoints
+Per-user and global buckets; Redis-backed across workers with an in-memory fallback
+"""
+
+import importlib.util
+import logging
+import math
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, Request
+
+from ..auth import authenticator
+
+# Optional Redis client, imported on connect (falls back to the in-memory backend without it)
+REDIS_AVAILABLE = importlib.util.find_spec('redis') is not None
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# (key, capacity, refill tokens per second)
+Bucket = Tuple[str, float, float]
+
+class InMemoryRateLimitBackend:
+    """Process-local token buckets (per worker; local testing only)"""
+
+    name = 'memory'
+
+    def __init__(self):
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+
+    async def connect(self) -> None:
+        return None
+
+    async def close(self) -> None:
+        return None
+
+    async def acquire(self, buckets: List[Bucket], cost: float) -> float:
+        """Take cost from every bucket, or none; returns seconds to wait (0 when admitted)"""
+
+        now = time.monotonic()
+        levels = []
+        wait = 0.0
+        for key, capacity, rate in buckets:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            levels.append(tokens)
+            if tokens < cost:
+                wait = max(wait, (cost - tokens) / rate)
+
+        if wait == 0.0:
+            for (key, _, _), tokens in zip(buckets, levels):
+                self._buckets[key] = (tokens - cost, now)
+        return wait
+
+class RedisRateLimitBackend:
+    """Redis token buckets shared by all workers (one atomic Lua call per admission)"""
+
+    name = 'redis'
+
+    # KEYS: bucket keys; ARGV: cost, then capacity and rate per key.
+    # Uses the Redis clock so every worker and node refills identically.
+    ACQUIRE_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local cost = tonumber(ARGV[1])
+local levels = {}
+local wait = 0
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i])
+    local rate = tonumber(ARGV[2 * i + 1])
+    local state = redis.call('HMGET', key, 'tokens', 'updated')
+    local tokens = tonumber(state[1]) or capacity
+    local updated = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+    levels[i] = tokens
+    if tokens < cost then
+        wait = math.max(wait, (cost - tokens) / rate)
+    end
+end
+if wait == 0 then
+    for i, key in ipairs(KEYS) do
+        local capacity = tonumber(ARGV[2 * i])
+        local rate = tonumber(ARGV[2 * i + 1])
+        redis.call('HSET', key, 'tokens', levels[i] - cost, 'updated', now)
+        redis.call('EXPIRE', key, math.ceil(capacity / rate) + 1)
+    end
+end
+return tostring(wait)
+"""
+
+    def __init__(self, redis_url: str, prefix: str = 'wardrobe:ratelimit'):
+        self.redis_url = redis_url
+        self.prefix = prefix
+        self._client = None
+        self._script = None
+
+    async def connect(self) -> None:
+        import redis.asyncio as redis_asyncio
+
+        self._client = redis_asyncio.from_url(self.redis_url)
+        await self._client.ping()
+        self._script = self._client.register_script(self.ACQUIRE_SCRIPT)
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+    async def acquire(self, buckets: List[Bucket], cost: float) -> float:
+        args = [cost]
+        for _, capacity, rate in buckets:
+            args.extend([capacity, rate])
+        wait = await self._script(keys=[f"{self.prefix}:{key}" for key, _, _ in buckets], args=args)
+        return float(wait)
+
+class RateLimiter:
+    """Admission control: each operation costs tokens from its caller's and the global bucket
+
+    A request is admitted only if both buckets can pay; otherwise it is
+    rejected with 429 and a Retry-After telling the client when it would fit.
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+        self.user_capacity = float(os.getenv('RATE_LIMIT_USER_BURST', 60))
+        self.user_rate = float(os.getenv('RATE_LIMIT_USER_TOKENS_PER_SECOND', 1.0))
+        self.global_capacity = float(os.getenv('RATE_LIMIT_GLOBAL_BURST', 600))
+        self.global_rate = float(os.getenv('RATE_LIMIT_GLOBAL_TOKENS_PER_SECOND', 20.0))
+        # Token cost per operation, roughly proportional to CPU time
+        self.costs = {
+            'avatar_create': 20,
+            'avatar_job': 20,
+            'garment_upload': 10,
+            'garment_analyze': 5,
+            'garment_list': 1
+        }
+        self.backend = self._create_backend()
+        self._rejected: Dict[str, int] = {}
+
+    def _create_backend(self):
+        """Pick Redis when configured and available, else in-memory buckets"""
+
+        backend = os.getenv('RATE_LIMIT_BACKEND', 'auto').lower()
+        redis_url = os.getenv('REDIS_URL')
+
+        if backend in ('auto', 'redis') and redis_url and REDIS_AVAILABLE:
+            return RedisRateLimitBackend(redis_url)
+        if backend == 'redis':
+            logger.warning("Redis rate limit backend requested but unavailable, using in-memory buckets")
+        return InMemoryRateLimitBackend()
+
+    async def start(self) -> None:
+        """Connect the backend"""
+
+        try:
+            await self.backend.connect()
+        except Exception as e:
+            logger.warning(f"Rate limit backend '{self.backend.name}' unavailable ({str(e)}), using in-memory buckets")
+            self.backend = InMemoryRateLimitBackend()
+            await self.backend.connect()
+
+    async def stop(self) -> None:
+        """Close the backend"""
+
+        await self.backend.close()
+
+    def caller_id(self, request: Request) -> Optional[str]:
+        """Bucket key of the authenticated caller: the verified forwarded JWT's user, else the client address
+
+        Never taken from request data (form/path user_id), which any caller can rotate.
+        """
+
+        user_id = authenticator.user_id(request)
+        if user_id:
+            return f"user:{user_id}"
+        return f"ip:{request.client.host}" if request.client else None
+
+    async def admit(self, operation: str, request: Request) -> None:
+        """Charge an operation to the caller's and the global bucket, or raise 429"""
+
+        if not self.enabled:
+            return
+
+        cost = self.costs[operation]
+        client_id = self.caller_id(request)
+        buckets: List[Bucket] = [('global', self.global_capacity, self.global_rate)]
+        if client_id:
+            buckets.append((f"client:{client_id}", self.user_capacity, self.user_rate))
+
+        try:
+            wait = await self.backend.acquire(buckets, min(cost, self.user_capacity, self.global_capacity))
+        except Exception as e:
+            # Admission control must not take the service down with its store
+            logger.warning(f"Rate limiter unavailable, admitting {operation}: {str(e)}")
+            return
+
+        if wait > 0:
+            self._rejected[operation] = self._rejected.get(operation, 0) + 1
+            raise HTTPException(
+                status_code=429,
+                detail=f"Rate limit exceeded for {operation}, retry in {wait:.1f}s",
+                headers={'Retry-After': str(max(1, math.ceil(wait)))}
+            )
+
+    def stats(self):
+        """Limiter configuration and rejection counters for health/status reporting"""
+
+        return {
+            'enabled': self.enabled,
+            'backend': self.backend.name,
+            'user_bucket': {'capacity': self.user_capacity, 'tokens_per_second': self.user_rate},
+            'global_bucket': {'capacity': self.global_capacity, 'tokens_per_second': self.global_rate},
+            'costs': dict(self.costs),
+            'rejected': dict(self._rejected)
+        }
+
+# Export the limiter
+rate_limiter = RateLimiter()
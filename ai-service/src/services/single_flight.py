@@ -0,0 +1,73 @@
+"""
+Single-Flight - Request coalescing for identical concurrent work
+Concurrent callers with the same key await one in-flight computation and share its result
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key onto one computation
+
+    Nothing is cached: once the computation finishes, the next call with that
+    key starts a fresh one. The shared result is handed to every waiter, so
+    callers must treat it as read-only.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._calls = 0
+        self._executions = 0
+
+    async def do(
+        self,
+        key: Hashable,
+        fn: Callable[[], Awaitable[T]],
+        admit: Optional[Callable[[], Awaitable[None]]] = None
+    ) -> T:
+        """Run fn() for key, or join the run already in flight for it
+
+        admit (e.g. a rate-limit charge, which may raise) is awaited only by a
+        caller about to start a new run; callers joining one are not charged.
+        Callers arriving while the leader is still being admitted pay too.
+        """
+
+        if admit is not None and key not in self._inflight:
+            await admit()
+
+        self._calls += 1
+        future = self._inflight.get(key)
+
+        if future is None:
+            self._executions += 1
+            future = asyncio.ensure_future(fn())
+            self._inflight[key] = future
+            future.add_done_callback(lambda done: self._finish(key, done))
+
+        # A disconnecting caller must not cancel the work other callers are awaiting
+        return await asyncio.shield(future)
+
+    def stats(self) -> Dict[str, Any]:
+        """Coalescing counters for health/status reporting"""
+
+        return {
+            'calls': self._calls,
+            'executions': self._executions,
+            'coalesced': self._calls - self._executions,
+            'in_flight': len(self._inflight)
+        }
+
+    def _finish(self, key: Hashable, future: asyncio.Future) -> None:
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+
+        # Mark the exception retrieved even if every waiter went away
+        if not future.cancelled() and future.exception() is not None:
+            logger.debug(f"Single-flight '{self.name}' computation failed: {future.exception()}")
@@ -0,0 +1,210 @@
+"""
+Texture Analysis - Vectorized pattern detection on a downscaled grayscale frame
+Combines FFT periodicity, gradient orientation histograms and local binary
+patterns to label solid / striped / checked / textured / patterned garments
+"""
+
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from .image_stats import ImageStats
+
+TEXTURE_FRAME_SIZE = 128       # px, square frame all features are computed on
+TEXTURE_BUDGET_MS = 15.0       # per-image cost budget enforced by the benchmark
+ORIENTATION_BINS = 8
+
+_WINDOW = np.outer(np.hanning(TEXTURE_FRAME_SIZE), np.hanning(TEXTURE_FRAME_SIZE)).astype(np.float32)
+_LBP_OFFSETS = [(-1, -1), (-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1)]
+
+def _build_uniform_lookup() -> np.ndarray:
+    """True for LBP codes with at most two 0/1 transitions (edges, spots, flats)"""
+
+    codes = np.arange(256, dtype=np.uint8)
+    rotated = ((codes >> 1) | ((codes & 1) << 7)).astype(np.uint8)
+    transitions = np.unpackbits((codes ^ rotated)[:, np.newaxis], axis=1).sum(axis=1)
+    return transitions <= 2
+
+_UNIFORM_LBP = _build_uniform_lookup()
+
+def analyze_texture(
+    image: Image.Image,
+    stats: Optional[ImageStats] = None,
+    mask: Optional[np.ndarray] = None
+) -> Dict[str, Any]:
+    """Compute texture features and a pattern label for a decoded image
+
+    Fine weaves vanish when the frame is downscaled, so contrast comes from
+    the full-resolution statistics when the caller already has them. A
+    (TEXTURE_FRAME_SIZE, TEXTURE_FRAME_SIZE) mask limits analysis to foreground.
+    """
+
+    frame_size = (TEXTURE_FRAME_SIZE, TEXTURE_FRAME_SIZE)
+    if image.size != frame_size:
+        image = image.resize(frame_size, Image.BILINEAR, reducing_gap=2.0)
+    gray = np.array(image.convert('L'), dtype=np.float32)
+
+    if mask is not None and mask.any():
+        # Flatten the background so its outline doesn't register as texture
+        gray[~mask] = gray[mask].mean()
+        contrast = float(gray[mask].std())
+    else:
+        contrast = float(gray.std())
+    if stats is not None:
+        contrast = float(np.sqrt(stats.gray_variance))
+
+    periodicity, peak_angles = _fft_periodicity(gray)
+    orientation_histogram, orientation_dominance = _gradient_orientations(gray)
+    lbp_uniformity, lbp_histogram = _local_binary_patterns(gray)
+    lbp_entropy = _entropy(lbp_histogram)
+
+    pattern_type, details = _classify_texture(
+        contrast, periodicity, peak_angles, orientation_dominance, lbp_uniformity, lbp_entropy
+    )
+
+    return {
+        'type': pattern_type,
+        'details': details,
+        'features': {
+            'contrast': round(contrast, 2),
+            'periodicity': round(periodicity, 3),
+            'orientation_dominance': round(orientation_dominance, 3),
+            'orientation_histogram': [round(float(v), 3) for v in orientation_histogram],
+            'lbp_uniformity': round(lbp_uniformity, 3),
+            'lbp_histogram_entropy': round(lbp_entropy, 3)
+        }
+    }
+
+def _fft_periodicity(gray: np.ndarray) -> Tuple[float, np.ndarray]:
+    """Share of AC spectral power in the strongest peaks, plus the peaks' angles"""
+
+    spectrum = np.abs(np.fft.rfft2((gray - gray.mean()) * _WINDOW)) ** 2
+    spectrum[0, 0] = 0
+    total = spectrum.sum()
+    if total <= 0:
+        return 0.0, np.empty(0)
+
+    # Lowest frequencies (illumination gradients, garment outline) stay in the
+    # total but can't be peaks, so smooth shading never reads as periodic
+    spectrum[:3, :3] = 0
+    spectrum[-2:, :3] = 0
+
+    peaks = np.argpartition(spectrum.ravel(), -6)[-6:]
+    periodicity = float(spectrum.ravel()[peaks].sum() / total)
+
+    # Frequency vector angle in [0, 180): 0 = varies along x (vertical stripes)
+    rows, cols = np.unravel_index(peaks, spectrum.shape)
+    freq_y = np.where(rows > gray.shape[0] // 2, rows - gray.shape[0], rows)
+    strong = spectrum[rows, cols] >= 0.25 * spectrum[rows, cols].max()
+    angles = np.degrees(np.arctan2(freq_y[strong], cols[strong])) % 180
+    return periodicity, angles
+
+def _gradient_orientations(gray: np.ndarray) -> Tuple[np.ndarray, float]:
+    """Magnitude-weighted histogram of gradient orientations (mod 180 degrees)"""
+
+    grad_y, grad_x = np.gradient(gray)
+    magnitude = np.hypot(grad_x, grad_y)
+    angle = np.mod(np.arctan2(grad_y, grad_x), np.pi)
+
+    bins = np.minimum((angle / np.pi * ORIENTATION_BINS).astype(np.int32), ORIENTATION_BINS - 1)
+    histogram = np.bincount(bins.ravel(), weights=magnitude.ravel(), minlength=ORIENTATION_BINS)
+    total = histogram.sum()
+    if total <= 0:
+        return np.zeros(ORIENTATION_BINS), 0.0
+
+    histogram = histogram / total
+    # Dominance: weight of the strongest orientation pair of bins
+    pairs = histogram + np.roll(histogram, -1)
+    return histogram, float(pairs.max())
+
+def _local_binary_patterns(gray: np.ndarray) -> Tuple[float, np.ndarray]:
+    """8-neighbour LBP code histogram and the share of uniform codes"""
+
+    center = gray[1:-1, 1:-1]
+    codes = np.zeros(center.shape, dtype=np.uint8)
+    h, w = gray.shape
+    for bit, (dy, dx) in enumerate(_LBP_OFFSETS):
+        neighbour = gray[1 + dy:h - 1 + dy, 1 + dx:w - 1 + dx]
+        codes |= ((neighbour >= center).astype(np.uint8) << bit)
+
+    histogram = np.bincount(codes.ravel(), minlength=256).astype(np.float64)
+    histogram /= histogram.sum()
+    return float(histogram[_UNIFORM_LBP].sum()), histogram
+
+def _classify_texture(
+    contrast: float,
+    periodicity: float,
+    peak_angles: np.ndarray,
+    orientation_dominance: float,
+    lbp_uniformity: float,
+    lbp_entropy: float
+) -> Tuple[str, List[str]]:
+    """Map texture features to a pattern label and detail tags"""
+
+    if contrast < 6:
+        return 'solid', ['simple']
+
+    if periodicity > 0.35 and peak_angles.size:
+        # Coherence of the peak directions (doubled angles, so 0 == 180):
+        # ~1 for one stripe direction, ~0 for two crossing directions
+        doubled = np.radians(peak_angles * 2)
+        coherence = float(np.hypot(np.cos(doubled).mean(), np.sin(doubled).mean()))
+        if coherence < 0.8 or orientation_dominance < 0.6:
+            return 'checked', ['geometric', 'grid']
+        mean_angle = float(np.degrees(np.arctan2(np.sin(doubled).mean(), np.cos(doubled).mean())) / 2 % 180)
+        return 'striped', ['geometric', _orientation_name(mean_angle)]
+
+    # Nearly every pixel shares one LBP code: smooth shading, not a pattern
+    if lbp_entropy < 1.0:
+        return 'solid', ['shaded']
+
+    if lbp_uniformity > 0.75 and contrast > 25:
+        return 'patterned', ['print', 'high-contrast'] if contrast > 50 else ['print']
+    return 'textured', ['fabric-texture']
+
+def _orientation_name(frequency_angle: float) -> str:
+    """Stripe orientation for a spectral peak (stripes run perpendicular to it)"""
+
+    if frequency_angle < 20 or frequency_angle > 160:
+        return 'vertical'
+    if 70 < frequency_angle < 110:
+        return 'horizontal'
+    return 'diagonal'
+
+def _entropy(histogram: np.ndarray) -> float:
+    """Shannon entropy (bits) of a normalized histogram"""
+
+    nonzero = histogram[histogram > 0]
+    return float(max(-(nonzero * np.log2(nonzero)).sum(), 0.0))
+
+def benchmark_texture_analysis(iterations: int = 50, size: int = 1024) -> Dict[str, Any]:
+    """Time analyze_texture on a synthetic striped frame against TEXTURE_BUDGET_MS"""
+
+    stripes = ((np.arange(size) // 16) % 2 * 200 + 30).astype(np.uint8)
+    frame = np.repeat(np.tile(stripes, (size, 1))[..., np.newaxis], 3, axis=2)
+    image = Image.fromarray(frame)
+    analyze_texture(image)  # Warm caches and lazy NumPy initialisation
+
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        analyze_texture(image)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    timings.sort()
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    return {
+        'iterations': iterations,
+        'frame': f"{size}x{size}",
+        'median_ms': round(timings[len(timings) // 2], 3),
+        'p95_ms': round(p95, 3),
+        'budget_ms': TEXTURE_BUDGET_MS,
+        'within_budget': p95 <= TEXTURE_BUDGET_MS
+    }
+
+if __name__ == "__main__":
+    result = benchmark_texture_analysis()
+    print(result)
+    raise SystemExit(0 if result['within_budget'] else 1)
@@ -0,0 +1,90 @@
+"""
+Upload Store - Private content-addressed storage for uploads awaiting background processing
+Queued jobs carry a digest reference instead of the raw bytes; blobs expire after the retention period
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+import time
+from typing import Optional
+
+from ..config import storage_dir
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+class UploadStore:
+    """Uploaded files stored under the SHA-256 of their bytes (never served over HTTP)"""
+
+    def __init__(self):
+        # Shared by every worker and replica: any of them may run the job
+        self.storage_dir = storage_dir('UPLOAD_STORAGE_DIR', 'wardrobe_uploads')
+        self.retention = int(os.getenv('UPLOAD_RETENTION_SECONDS', 24 * 60 * 60))
+        self.prune_interval = 600.0
+        self._last_prune = 0.0
+
+    def put(self, data: bytes) -> str:
+        """Store bytes (once per content) and return their digest"""
+
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+        if os.path.exists(path):
+            # Refresh the retention clock for the new reference
+            os.utime(path)
+        else:
+            self._write_atomic(path, data)
+
+        self._maybe_prune()
+        return digest
+
+    def get(self, digest: str) -> Optional[bytes]:
+        """Stored bytes for a digest, None when unknown or expired"""
+
+        try:
+            with open(self._blob_path(digest), 'rb') as blob_file:
+                return blob_file.read()
+        except OSError:
+            return None
+
+    def _maybe_prune(self) -> None:
+        """Delete blobs older than the retention period, at most once per interval"""
+
+        now = time.time()
+        if now - self._last_prune < self.prune_interval:
+            return
+        self._last_prune = now
+
+        removed = 0
+        for root, _, files in os.walk(self.storage_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    if now - os.path.getmtime(path) > self.retention:
+                        os.unlink(path)
+                        removed += 1
+                except OSError:
+                    continue
+        if removed:
+            logger.info(f"Pruned {removed} expired uploads")
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.storage_dir, digest[:2], digest)
+
+    def _write_atomic(self, path: str, data: bytes) -> None:
+        """Write via a temp file + rename so readers never see partial files"""
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                tmp_file.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+# Export the store
+upload_store = UploadStore()
@@ -0,0 +1,87 @@
+"""
+Startup Tracker - Staged cold start for the AI service
+Serves liveness before the heavy routers (NumPy, PIL, analyzers) are imported, and
+reports per-module import cost and time to "up", "routes loaded" and "warm"
+"""
+
+import importlib
+import logging
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+def process_start_time() -> float:
+    """Wall-clock time this process was started (Linux /proc), else now"""
+
+    try:
+        with open('/proc/self/stat', 'r') as stat_file:
+            # Fields after the parenthesized command name; starttime is field 22 overall
+            start_ticks = int(stat_file.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime', 'r') as uptime_file:
+            uptime = float(uptime_file.read().split()[0])
+        return time.time() - uptime + start_ticks / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError):
+        return time.time()
+
+class StartupTracker:
+    """Startup stages (ms since process start) and per-module import costs"""
+
+    def __init__(self):
+        self.started = process_start_time()
+        self.stages: Dict[str, float] = {}
+        self.import_costs: List[Dict[str, Any]] = []
+        self.error: Optional[str] = None
+        self.routers_loaded = False
+
+    def mark(self, stage: str) -> None:
+        """Record the first time a stage is reached"""
+
+        if stage not in self.stages:
+            self.stages[stage] = round((time.time() - self.started) * 1000, 1)
+            logger.info(f"Startup stage '{stage}' reached after {self.stages[stage]} ms")
+
+    def import_modules(self, names: List[str]) -> List[Any]:
+        """Import modules in order, timing each one (imports already done cost nothing)"""
+
+        modules = []
+        for name in names:
+            already_loaded = name in sys.modules
+            started = time.perf_counter()
+            modules.append(importlib.import_module(name))
+            if not already_loaded:
+                self.import_costs.append({
+                    'module': name,
+                    'import_ms': round((time.perf_counter() - started) * 1000, 1)
+                })
+        return modules
+
+    def mount(self, app: FastAPI, modules: List[Any], prefix: str) -> None:
+        """Mount imported router modules (mutates the route table: call on the event loop or before it)"""
+
+        if self.routers_loaded:
+            return
+
+        for module in modules:
+            app.include_router(module.router, prefix=prefix)
+        app.openapi_schema = None  # Rebuilt with the new routes on next request
+        self.routers_loaded = True
+        self.mark('routes_loaded')
+
+    def report(self) -> Dict[str, Any]:
+        """Startup timings for the /startup endpoint"""
+
+        return {
+            'stages_ms': dict(self.stages),
+            'routers_loaded': self.routers_loaded,
+            'error': self.error,
+            'import_costs': sorted(self.import_costs, key=lambda cost: cost['import_ms'], reverse=True)
+        }
+
+# Export the tracker (created when main.py starts importing it)
+startup_tracker = StartupTracker()
@@ -0,0 +1,8 @@
+"""
+Shared test setup - Puts the service root on sys.path so tests import src.* like main.py does
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,67 @@
+"""
+Color lookup table - nearest palette color by CIEDE2000, and the on-disk cache
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+from src.services.color_lut import (LUT_BITS, ColorLookupTable, delta_e_2000,
+                                    palette_digest, rgb_to_lab)
+
+PALETTE = {
+    'black': [0, 0, 0],
+    'white': [255, 255, 255],
+    'red': [220, 20, 30],
+    'green': [30, 140, 50],
+    'blue': [30, 60, 200],
+    'beige': [225, 200, 160],
+    'gray': [128, 128, 128]
+}
+
+@pytest.fixture(scope='module')
+def table(tmp_path_factory):
+    return ColorLookupTable.load_or_build(PALETTE, str(tmp_path_factory.mktemp('lut')))
+
+@pytest.mark.parametrize('pixel, expected', [
+    ([0, 0, 0], 'black'),
+    ([12, 10, 14], 'black'),
+    ([255, 255, 255], 'white'),
+    ([245, 243, 240], 'white'),
+    ([200, 30, 40], 'red'),
+    ([40, 150, 60], 'green'),
+    ([20, 50, 220], 'blue'),
+    ([220, 195, 150], 'beige'),
+    ([120, 125, 130], 'gray'),
+])
+def test_nearest_shade(table, pixel, expected):
+    assert table.name_of(pixel) == expected
+
+def test_table_matches_brute_force_ciede2000_at_cell_centres(table):
+    step = 1 << (8 - LUT_BITS)
+    pixels = np.random.default_rng(11).integers(0, 256, size=(2000, 3))
+    centres = (pixels // step) * step + (step - 1) / 2
+
+    distances = delta_e_2000(rgb_to_lab(centres)[:, np.newaxis], rgb_to_lab(np.array(list(PALETTE.values())))[np.newaxis])
+    expected = distances.argmin(axis=1)
+
+    np.testing.assert_array_equal(table.lookup(pixels.astype(np.uint8)), expected)
+
+def test_delta_e_2000_reference_pair():
+    # Sharma et al. (2005) test data, pair 1
+    lab1 = np.array([50.0, 2.6772, -79.7751])
+    lab2 = np.array([50.0, 0.0, -82.7485])
+    assert float(delta_e_2000(lab1, lab2)) == pytest.approx(2.0425, abs=1e-4)
+
+def test_cached_table_is_reused_and_keyed_by_palette(tmp_path):
+    first = ColorLookupTable.load_or_build(PALETTE, str(tmp_path))
+    path = tmp_path / f"color_lut_{first.version}.npy"
+    built_at = os.path.getmtime(path)
+
+    second = ColorLookupTable.load_or_build(PALETTE, str(tmp_path))
+    assert isinstance(second.table, np.memmap)
+    assert os.path.getmtime(path) == built_at
+
+    changed = dict(PALETTE, red=[200, 0, 0])
+    assert palette_digest(changed) != first.version
@@ -0,0 +1,79 @@
+"""
+Content encoding - Accept-Encoding negotiation and the compression middleware
+"""
+
+import gzip
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from src.content_encoding import CompressionMiddleware, negotiate_encoding
+
+@pytest.mark.parametrize('header, expected', [
+    (None, None),
+    ('', None),
+    ('identity', None),
+    ('gzip', 'gzip'),
+    ('GZIP', 'gzip'),
+    ('gzip;q=0.5, br;q=0.8', 'br'),
+    ('br;q=0, gzip', 'gzip'),
+    ('*', 'zstd'),
+    ('*;q=0.5, gzip;q=0', 'zstd'),
+    ('gzip;q=abc', None),
+])
+def test_negotiate_encoding(header, expected):
+    assert negotiate_encoding(header, ('zstd', 'br', 'gzip')) == expected
+
+def test_negotiate_encoding_prefers_server_order_on_ties():
+    assert negotiate_encoding('gzip, br', ('br', 'gzip')) == 'br'
+    assert negotiate_encoding('br', ('gzip',)) is None
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+    @app.get('/large')
+    def large():
+        return {'items': ['garment'] * 200}
+
+    @app.get('/small')
+    def small():
+        return {'ok': True}
+
+    @app.get('/text-stream')
+    def text_stream():
+        return StreamingResponse(iter([b'a' * 500, b'b' * 500]), media_type='text/plain')
+
+    @app.get('/events')
+    def events():
+        return PlainTextResponse('data: x\n\n' * 100, media_type='text/event-stream')
+
+    return TestClient(app)
+
+def test_large_json_is_compressed_with_exact_length(client):
+    response = client.get('/large', headers={'Accept-Encoding': 'gzip'})
+
+    assert response.headers['content-encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['vary']
+    assert response.json() == {'items': ['garment'] * 200}
+
+    with client.stream('GET', '/large', headers={'Accept-Encoding': 'gzip'}) as streamed:
+        assert int(streamed.headers['content-length']) == len(b''.join(streamed.iter_raw()))
+
+def test_small_and_unaccepted_responses_pass_through(client):
+    assert 'content-encoding' not in client.get('/small', headers={'Accept-Encoding': 'gzip'}).headers
+    assert 'content-encoding' not in client.get('/large', headers={'Accept-Encoding': 'identity'}).headers
+
+def test_streaming_body_is_compressed_chunk_by_chunk(client):
+    with client.stream('GET', '/text-stream', headers={'Accept-Encoding': 'gzip'}) as response:
+        body = b''.join(response.iter_raw())
+
+    assert response.headers['content-encoding'] == 'gzip'
+    assert 'content-length' not in response.headers
+    assert gzip.decompress(body) == b'a' * 500 + b'b' * 500
+
+def test_event_streams_are_never_compressed(client):
+    assert 'content-encoding' not in client.get('/events', headers={'Accept-Encoding': 'gzip'}).headers
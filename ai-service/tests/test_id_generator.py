@@ -0,0 +1,53 @@
+"""
+ID generator - UUIDv7 layout and ordering
+"""
+
+import threading
+import time
+import uuid
+
+from src.services.id_generator import UUIDv7Generator, new_id
+
+def test_new_id_is_a_canonical_uuid_v7():
+    value = uuid.UUID(new_id())
+
+    assert value.version == 7
+    assert value.variant == uuid.RFC_4122
+    assert abs(UUIDv7Generator.timestamp_ms(value) - time.time() * 1000) < 5000
+
+def test_ids_sort_in_creation_order_within_one_millisecond():
+    ids = [new_id() for _ in range(10_000)]
+
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
+
+def test_ids_keep_increasing_when_the_clock_steps_back(monkeypatch):
+    generator = UUIDv7Generator()
+    first = generator.new()
+    monkeypatch.setattr(time, 'time_ns', lambda: (UUIDv7Generator.timestamp_ms(first) - 10_000) * 1_000_000)
+
+    assert generator.new() > first
+
+def test_counter_overflow_borrows_the_next_millisecond(monkeypatch):
+    generator = UUIDv7Generator()
+    monkeypatch.setattr(time, 'time_ns', lambda: 1_700_000_000_000 * 1_000_000)
+    ids = [generator.new() for _ in range(5000)]
+
+    assert ids == sorted(ids)
+    assert UUIDv7Generator.timestamp_ms(ids[-1]) > 1_700_000_000_000
+
+def test_concurrent_threads_never_collide():
+    generator = UUIDv7Generator()
+    results = [[] for _ in range(8)]
+
+    def generate(out):
+        out.extend(generator.new() for _ in range(2000))
+
+    threads = [threading.Thread(target=generate, args=(out,)) for out in results]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({value for out in results for value in out}) == 16_000
+    assert all(out == sorted(out) for out in results)
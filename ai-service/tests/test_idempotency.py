@@ -0,0 +1,100 @@
+"""
+Idempotency store - claim and replay, conflicts, and the bounded in-memory backend
+"""
+
+import asyncio
+
+import pytest
+
+from src.services.idempotency import (IdempotencyConflict, IdempotencyStore,
+                                      InMemoryIdempotencyBackend, is_replayed)
+
+@pytest.fixture
+def store():
+    store = IdempotencyStore()
+    store.backend = InMemoryIdempotencyBackend()
+    return store
+
+def test_retry_replays_stored_response_without_rerunning(store):
+    calls = []
+
+    async def work():
+        calls.append(1)
+        return {'value': len(calls)}
+
+    async def scenario():
+        first = await store.run('scope', 'key-1', 'fp', work)
+        second = await store.run('scope', 'key-1', 'fp', work)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert calls == [1]
+    assert first.body == second.body == b'{"value":1}'
+    assert not is_replayed(first) and is_replayed(second)
+
+def test_key_reused_for_different_request_is_rejected(store):
+    async def scenario():
+        await store.run('scope', 'key-1', 'fp-a', lambda: asyncio.sleep(0, {}))
+        await store.run('scope', 'key-1', 'fp-b', lambda: asyncio.sleep(0, {}))
+
+    with pytest.raises(IdempotencyConflict) as conflict:
+        asyncio.run(scenario())
+    assert conflict.value.status_code == 422
+
+def test_concurrent_retry_while_pending_gets_409(store):
+    async def scenario():
+        started = asyncio.Event()
+
+        async def slow():
+            started.set()
+            await asyncio.sleep(0.05)
+            return {}
+
+        first = asyncio.create_task(store.run('scope', 'key-1', 'fp', slow))
+        await started.wait()
+        try:
+            await store.run('scope', 'key-1', 'fp', slow)
+        finally:
+            await first
+
+    with pytest.raises(IdempotencyConflict) as conflict:
+        asyncio.run(scenario())
+    assert conflict.value.status_code == 409
+
+def test_failed_request_releases_the_key(store):
+    async def failing():
+        raise RuntimeError('boom')
+
+    async def scenario():
+        with pytest.raises(RuntimeError):
+            await store.run('scope', 'key-1', 'fp', failing)
+        return await store.run('scope', 'key-1', 'fp', lambda: asyncio.sleep(0, {'ok': True}))
+
+    response = asyncio.run(scenario())
+    assert response.body == b'{"ok":true}' and not is_replayed(response)
+
+def test_memory_backend_evicts_least_recently_used_completed_records():
+    async def scenario():
+        backend = InMemoryIdempotencyBackend()
+        backend.max_entries = 3
+        await backend.claim('pending', {'status': 'pending', 'fingerprint': ''}, 60)
+        for key in ('a', 'b'):
+            await backend.save(key, {'status': 'completed', 'fingerprint': '', 'body': '{}'}, 60)
+        await backend.claim('a', {'status': 'pending', 'fingerprint': ''}, 60)  # touch: 'b' is now oldest
+        await backend.save('c', {'status': 'completed', 'fingerprint': '', 'body': '{}'}, 60)
+        return list(backend._records)
+
+    assert asyncio.run(scenario()) == ['pending', 'a', 'c']
+
+def test_memory_backend_respects_byte_budget_but_keeps_pending_claims():
+    async def scenario():
+        backend = InMemoryIdempotencyBackend()
+        backend.max_bytes = 100
+        await backend.claim('pending', {'status': 'pending', 'fingerprint': ''}, 60)
+        for key in ('a', 'b', 'c'):
+            await backend.save(key, {'status': 'completed', 'fingerprint': '', 'body': 'x' * 40}, 60)
+        return list(backend._records), backend._total_bytes
+
+    records, total = asyncio.run(scenario())
+    assert records == ['pending', 'b', 'c']
+    assert total <= 100
@@ -0,0 +1,74 @@
+"""
+Image statistics - the streaming accumulator against direct NumPy computations
+"""
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.services.image_stats import (ImageStatsAccumulator, compute_image_stats,
+                                      compute_image_stats_tiled)
+
+@pytest.fixture
+def frame():
+    return np.random.default_rng(7).integers(0, 256, size=(97, 61, 3), dtype=np.uint8)
+
+def _gray(frame: np.ndarray) -> np.ndarray:
+    return np.asarray(Image.fromarray(frame).convert('L'), dtype=np.int64)
+
+def _edge_energy(gray: np.ndarray, mask: np.ndarray) -> float:
+    horizontal = mask[:, 1:] & mask[:, :-1]
+    vertical = mask[1:] & mask[:-1]
+    total = np.abs(np.diff(gray, axis=1))[horizontal].sum() + np.abs(np.diff(gray, axis=0))[vertical].sum()
+    return total / (horizontal.sum() + vertical.sum())
+
+@pytest.mark.parametrize('block_rows', [1, 7, 64, 200])
+def test_matches_numpy_for_any_block_split(frame, block_rows):
+    stats = compute_image_stats(frame, block_rows=block_rows)
+    values = frame.astype(np.float64)
+    gray = _gray(frame)
+
+    assert (stats.width, stats.height, stats.pixel_count) == (61, 97, 97 * 61)
+    assert stats.mean == pytest.approx(values.mean())
+    assert stats.variance == pytest.approx(values.var())
+    np.testing.assert_allclose(stats.channel_mean, values.reshape(-1, 3).mean(axis=0))
+    assert stats.gray_mean == pytest.approx(gray.mean())
+    assert stats.gray_variance == pytest.approx(gray.var())
+    np.testing.assert_array_equal(stats.luminance_histogram, np.bincount(gray.ravel(), minlength=256))
+    assert stats.edge_energy == pytest.approx(_edge_energy(gray, np.ones(gray.shape, dtype=bool)))
+
+def test_mask_limits_pixels_and_edges(frame):
+    mask = np.random.default_rng(3).random(frame.shape[:2]) > 0.3
+    stats = compute_image_stats(frame, block_rows=10, mask=mask)
+    values = frame[mask].astype(np.float64)
+    gray = _gray(frame)
+
+    assert stats.pixel_count == mask.sum()
+    assert stats.mean == pytest.approx(values.mean())
+    assert stats.variance == pytest.approx(values.var())
+    assert stats.gray_mean == pytest.approx(gray[mask].mean())
+    assert stats.edge_energy == pytest.approx(_edge_energy(gray, mask))
+
+def test_accumulator_handles_uneven_strips(frame):
+    accumulator = ImageStatsAccumulator()
+    for top, bottom in [(0, 3), (3, 50), (50, 51), (51, 97)]:
+        accumulator.update(frame[top:bottom])
+
+    whole = compute_image_stats(frame, block_rows=97)
+    stats = accumulator.finalize()
+    assert stats.edge_energy == pytest.approx(whole.edge_energy)
+    assert stats.variance == pytest.approx(whole.variance)
+
+def test_tiled_image_walk_matches_in_memory_frame(frame):
+    tiled = compute_image_stats_tiled(Image.fromarray(frame), strip_bytes=61 * 3 * 8)
+    direct = compute_image_stats(frame)
+
+    assert tiled.pixel_count == direct.pixel_count
+    assert tiled.mean == pytest.approx(direct.mean)
+    assert tiled.edge_energy == pytest.approx(direct.edge_energy)
+
+def test_solid_frame_has_no_variance_or_edges():
+    stats = compute_image_stats(np.full((20, 30, 3), 90, dtype=np.uint8))
+
+    assert stats.variance == 0.0 and stats.gray_variance == 0.0
+    assert stats.edge_energy == 0.0
@@ -0,0 +1,128 @@
+"""
+Job queue - in-memory backend ordering and claims, retries, and the reaper recovering lost jobs
+"""
+
+import asyncio
+
+from src.services.job_queue import InMemoryJobBackend, JobQueue
+
+def _queue(**settings) -> JobQueue:
+    queue = JobQueue()
+    queue.backend = InMemoryJobBackend()
+    queue.retry_backoff = 0.01
+    queue.poll_timeout = 0.05
+    for name, value in settings.items():
+        setattr(queue, name, value)
+    return queue
+
+async def _wait_for(queue: JobQueue, job_id: str, statuses, timeout: float = 5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while asyncio.get_running_loop().time() < deadline:
+        job = await queue.get_job(job_id)
+        if job['status'] in statuses:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job {job_id} stuck in {job['status']}")
+
+def test_dequeue_orders_by_priority_then_fifo():
+    async def scenario():
+        backend = InMemoryJobBackend()
+        for job_id, priority in [('a', 5), ('b', 1), ('c', 5), ('d', 1)]:
+            await backend.enqueue(job_id, priority)
+        return [await backend.dequeue(0.1, 60) for _ in range(4)] + [await backend.dequeue(0.01, 60)]
+
+    assert asyncio.run(scenario()) == ['b', 'd', 'a', 'c', None]
+
+def test_claims_expire_unless_extended_and_ack_once():
+    async def scenario():
+        backend = InMemoryJobBackend()
+        await backend.enqueue('lost', 5)
+        await backend.enqueue('alive', 5)
+        await backend.dequeue(0.1, 0.05)
+        await backend.dequeue(0.1, 0.05)
+        await backend.extend('alive', 60)
+        await asyncio.sleep(0.1)
+        expired = await backend.expired_claims()
+        return expired, await backend.ack('lost'), await backend.ack('lost')
+
+    expired, first_ack, second_ack = asyncio.run(scenario())
+    assert expired == ['lost']
+    assert first_ack is True and second_ack is False
+
+def test_job_completes_and_records_result():
+    async def scenario():
+        queue = _queue()
+        queue.register_handler('echo', lambda job_id, payload: asyncio.sleep(0, {'echo': payload['value']}))
+        await queue.start()
+        try:
+            job = await queue.submit('echo', {'value': 42}, user_id='u1')
+            assert job['job_id'].startswith('job_') and job['status'] == 'queued'
+            return await _wait_for(queue, job['job_id'], ('completed',))
+        finally:
+            await queue.stop()
+
+    job = asyncio.run(scenario())
+    assert job['result'] == {'echo': 42}
+    assert job['attempts'] == 1 and job['user_id'] == 'u1'
+
+def test_failures_retry_then_fail_permanently():
+    async def scenario():
+        queue = _queue(max_attempts=2)
+        calls = []
+
+        async def flaky(job_id, payload):
+            calls.append(job_id)
+            raise RuntimeError('boom')
+
+        queue.register_handler('flaky', flaky)
+        await queue.start()
+        try:
+            job = await queue.submit('flaky', {})
+            job = await _wait_for(queue, job['job_id'], ('failed',))
+            return job, len(calls), await queue.backend.load_payload(job['job_id'])
+        finally:
+            await queue.stop()
+
+    job, calls, payload = asyncio.run(scenario())
+    assert calls == 2 and job['attempts'] == 2
+    assert job['error'] == 'boom'
+    assert payload is None
+
+def test_reaper_requeues_job_whose_worker_died():
+    async def scenario():
+        queue = _queue(worker_count=0, visibility_timeout=0.05, reap_interval=0.02)
+        queue.register_handler('work', lambda job_id, payload: asyncio.sleep(0, {'ok': True}))
+        await queue.start()
+        try:
+            job = await queue.submit('work', {})
+            # A worker claims the job, marks it running and dies without acking
+            claimed = await queue.backend.dequeue(0.1, queue.visibility_timeout)
+            record = await queue.get_job(claimed)
+            record.update(status='running', attempts=1)
+            await queue.backend.save_job(record, queue.job_ttl)
+
+            requeued = await _wait_for(queue, job['job_id'], ('queued',))
+            redelivered = await queue.backend.dequeue(0.5, 60)
+            return requeued, redelivered
+        finally:
+            await queue.stop()
+
+    requeued, redelivered = asyncio.run(scenario())
+    assert requeued['attempts'] == 1
+    assert redelivered == requeued['job_id']
+
+def test_reaper_fails_job_lost_on_final_attempt():
+    async def scenario():
+        queue = _queue(worker_count=0, visibility_timeout=0.05, reap_interval=0.02, max_attempts=1)
+        queue.register_handler('work', lambda job_id, payload: asyncio.sleep(0, {}))
+        await queue.start()
+        try:
+            job = await queue.submit('work', {})
+            record = await queue.get_job(await queue.backend.dequeue(0.1, queue.visibility_timeout))
+            record.update(status='running', attempts=1)
+            await queue.backend.save_job(record, queue.job_ttl)
+            return await _wait_for(queue, job['job_id'], ('failed',))
+        finally:
+            await queue.stop()
+
+    assert asyncio.run(scenario())['error'] == 'Worker lost while processing the job'
@@ -0,0 +1,68 @@
+"""
+Micro-batcher - concurrent submissions grouped into batched calls
+"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from src.services.micro_batcher import MicroBatcher
+
+def test_concurrent_items_run_as_one_batch_in_order():
+    batch_sizes = []
+
+    def double(inputs: np.ndarray) -> np.ndarray:
+        batch_sizes.append(len(inputs))
+        return inputs * 2
+
+    async def scenario():
+        batcher = MicroBatcher('double', double, max_batch_size=32, max_wait_ms=20)
+        return await asyncio.gather(*(batcher.submit(np.array([i])) for i in range(10))), batcher.stats()
+
+    results, stats = asyncio.run(scenario())
+    assert [int(result[0]) for result in results] == [i * 2 for i in range(10)]
+    assert batch_sizes == [10]
+    assert stats['batches'] == 1 and stats['items'] == 10
+
+def test_full_batch_flushes_without_waiting():
+    batch_sizes = []
+
+    def identity(inputs: np.ndarray) -> np.ndarray:
+        batch_sizes.append(len(inputs))
+        return inputs
+
+    async def scenario():
+        batcher = MicroBatcher('identity', identity, max_batch_size=4, max_wait_ms=10_000)
+        return await asyncio.wait_for(asyncio.gather(*(batcher.submit(np.zeros(2)) for _ in range(8))), 2)
+
+    asyncio.run(scenario())
+    assert batch_sizes == [4, 4]
+
+def test_batch_failure_reaches_every_caller():
+    def broken(inputs: np.ndarray):
+        raise RuntimeError('model crashed')
+
+    async def scenario():
+        batcher = MicroBatcher('broken', broken, max_wait_ms=1)
+        return await asyncio.gather(*(batcher.submit(np.zeros(1)) for _ in range(3)), return_exceptions=True)
+
+    assert all(isinstance(error, RuntimeError) for error in asyncio.run(scenario()))
+
+def test_stop_runs_pending_items():
+    async def scenario():
+        batcher = MicroBatcher('labels', lambda inputs: [f"row-{int(row[0])}" for row in inputs], max_wait_ms=10_000)
+        pending = [asyncio.create_task(batcher.submit(np.array([i]))) for i in range(3)]
+        await asyncio.sleep(0)
+        await batcher.stop()
+        return [task.result() for task in pending]
+
+    assert asyncio.run(scenario()) == ['row-0', 'row-1', 'row-2']
+
+@pytest.mark.parametrize('max_wait_ms', [0, 1])
+def test_single_item_latency_is_bounded(max_wait_ms):
+    async def scenario():
+        batcher = MicroBatcher('identity', lambda inputs: inputs, max_wait_ms=max_wait_ms)
+        return await asyncio.wait_for(batcher.submit(np.ones(3)), 1)
+
+    np.testing.assert_array_equal(asyncio.run(scenario()), np.ones(3))
@@ -0,0 +1,100 @@
+"""
+Progress broker - replay and live fan-out, final events and channel ownership
+"""
+
+import asyncio
+
+import pytest
+
+from src.services.progress_service import (InMemoryProgressBackend, ProgressBroker,
+                                           RedisProgressBackend)
+
+def _broker() -> ProgressBroker:
+    broker = ProgressBroker()
+    broker.backend = InMemoryProgressBackend(broker.history_limit, broker.channel_ttl)
+    return broker
+
+async def _collect(broker: ProgressBroker, channel: str):
+    return [event['stage'] async for event in broker.subscribe(channel) if event is not None]
+
+def test_late_subscriber_gets_history_then_live_events_until_final():
+    async def scenario():
+        broker = _broker()
+        await broker.publish('ch', 'validated', progress=0.25)
+        subscriber = asyncio.create_task(_collect(broker, 'ch'))
+        await asyncio.sleep(0.01)
+        await broker.publish('ch', 'colors', progress=0.75)
+        await broker.publish('ch', 'done', progress=1.0, final=True)
+        await broker.publish('ch', 'after-final')
+        return await asyncio.wait_for(subscriber, 1), broker.backend._subscribers
+
+    stages, subscribers = asyncio.run(scenario())
+    assert stages == ['validated', 'colors', 'done']
+    assert subscribers == {}
+
+def test_idle_subscriber_gets_keepalives():
+    async def scenario():
+        broker = _broker()
+        broker.keepalive_interval = 0.01
+        events = broker.subscribe('quiet')
+        first = await events.__anext__()
+        await events.aclose()
+        return first
+
+    assert asyncio.run(scenario()) is None
+
+def test_publish_without_channel_is_a_no_op():
+    broker = _broker()
+    asyncio.run(broker.publish(None, 'validated'))
+    assert broker.backend._history == {}
+
+def test_channel_is_bound_to_its_first_user():
+    async def scenario():
+        broker = _broker()
+        return [
+            await broker.claim('ch', 'alice'),
+            await broker.claim('ch', 'alice'),
+            await broker.claim('ch', 'mallory'),
+            await broker.claim('other', None)
+        ]
+
+    assert asyncio.run(scenario()) == [True, True, False, False]
+
+def test_redis_subscribers_share_one_reader():
+    fakeredis = pytest.importorskip('fakeredis')
+
+    async def scenario():
+        backend = RedisProgressBackend('redis://unused', history_limit=32, channel_ttl=60)
+        backend._client = fakeredis.FakeAsyncRedis()
+        reads = []
+        xread = backend._client.xread
+
+        async def counting_xread(*args, **kwargs):
+            reads.append(1)
+            return await xread(*args, **kwargs)
+
+        backend._client.xread = counting_xread
+
+        async def collect(channel, count):
+            events = []
+            async for event in backend.subscribe(channel, keepalive=5):
+                events.append(event['n'])
+                if len(events) == count:
+                    return events
+
+        await backend.publish('a', {'n': 0})
+        subscribers = [asyncio.create_task(collect(channel, 3 if channel == 'a' else 2))
+                       for channel in ('a', 'b') for _ in range(20)]
+        await asyncio.sleep(0.05)
+        for n in (1, 2):
+            await backend.publish('a', {'n': n})
+            await backend.publish('b', {'n': n})
+        results = await asyncio.wait_for(asyncio.gather(*subscribers), 5)
+        await backend.close()
+        return results, len(reads)
+
+    results, reads = asyncio.run(scenario())
+    assert results[:20] == [[0, 1, 2]] * 20
+    assert results[20:] == [[1, 2]] * 20
+    # One blocking read per round for all 40 subscribers, not one each
+    assert reads < 20
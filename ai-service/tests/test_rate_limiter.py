@@ -0,0 +1,90 @@
+"""
+Rate limiter - in-memory token buckets and per-caller admission
+"""
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import time
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from src.auth import authenticator
+from src.services.rate_limiter import InMemoryRateLimitBackend, RateLimiter
+
+SECRET = 'test-secret'
+
+def _token(user_id: str, secret: str = SECRET) -> str:
+    def encode(data: dict) -> str:
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).rstrip(b'=').decode()
+
+    signing_input = f"{encode({'alg': 'HS256', 'typ': 'JWT'})}.{encode({'userId': user_id, 'exp': time.time() + 60})}"
+    signature = hmac.new(secret.encode(), signing_input.encode(), hashlib.sha256).digest()
+    return f"{signing_input}.{base64.urlsafe_b64encode(signature).rstrip(b'=').decode()}"
+
+def _request(host: str = '10.0.0.1', token: str = None) -> Request:
+    headers = [(b'authorization', f"Bearer {token}".encode())] if token else []
+    return Request({'type': 'http', 'method': 'POST', 'path': '/', 'headers': headers, 'client': (host, 1234)})
+
+@pytest.fixture
+def limiter(monkeypatch):
+    monkeypatch.setattr(authenticator, 'jwt_secret', SECRET)
+    limiter = RateLimiter()
+    limiter.backend = InMemoryRateLimitBackend()
+    limiter.enabled = True
+    limiter.user_capacity, limiter.user_rate = 20.0, 1.0
+    limiter.global_capacity, limiter.global_rate = 1000.0, 100.0
+    return limiter
+
+def test_bucket_admits_until_empty_then_reports_wait():
+    async def scenario():
+        backend = InMemoryRateLimitBackend()
+        buckets = [('b', 10.0, 2.0)]
+        return [await backend.acquire(buckets, 4) for _ in range(3)]
+
+    first, second, third = asyncio.run(scenario())
+    assert first == 0.0 and second == 0.0
+    assert third == pytest.approx(1.0, abs=0.05)  # 2 tokens short at 2 tokens/s
+
+def test_acquire_is_all_or_nothing():
+    async def scenario():
+        backend = InMemoryRateLimitBackend()
+        await backend.acquire([('small', 5.0, 0.001)], 5)
+        # The empty small bucket rejects, so the large one must not be charged either
+        wait = await backend.acquire([('large', 10.0, 0.001), ('small', 5.0, 0.001)], 5)
+        return wait, await backend.acquire([('large', 10.0, 0.001)], 10)
+
+    wait, large_only = asyncio.run(scenario())
+    assert wait > 0
+    assert large_only == 0.0
+
+def test_admit_raises_429_with_retry_after(limiter):
+    async def scenario():
+        await limiter.admit('avatar_create', _request())   # 20 tokens: the whole user bucket
+        await limiter.admit('avatar_create', _request())
+
+    with pytest.raises(HTTPException) as rejected:
+        asyncio.run(scenario())
+    assert rejected.value.status_code == 429
+    assert int(rejected.value.headers['Retry-After']) >= 1
+    assert limiter.stats()['rejected'] == {'avatar_create': 1}
+
+def test_callers_are_keyed_by_verified_user_not_address(limiter):
+    alice = _token('alice')
+    assert limiter.caller_id(_request('10.0.0.1', alice)) == 'user:alice'
+    assert limiter.caller_id(_request('10.0.0.2', alice)) == 'user:alice'
+    assert limiter.caller_id(_request('10.0.0.1', _token('alice', 'forged'))) == 'ip:10.0.0.1'
+
+    async def scenario():
+        await limiter.admit('avatar_create', _request('10.0.0.1', alice))
+        # Same address, different user: separate bucket
+        await limiter.admit('avatar_create', _request('10.0.0.1', _token('bob')))
+        # Same user from another address: same, now empty, bucket
+        await limiter.admit('avatar_create', _request('10.0.0.2', alice))
+
+    with pytest.raises(HTTPException):
+        asyncio.run(scenario())
@@ -0,0 +1,34 @@
+"""
+Response encoding - columnar garment listings
+"""
+
+from src.responses import encode_columnar
+
+def test_rows_become_columns_with_missing_fields_as_none():
+    encoded = encode_columnar([{'id': 1, 'name': 'shirt'}, {'id': 2, 'brand': 'acme'}])
+
+    assert encoded['count'] == 2
+    assert encoded['columns'] == {'id': [1, 2], 'name': ['shirt', None], 'brand': [None, 'acme']}
+    assert encoded['dictionaries'] == {}
+
+def test_dictionary_columns_use_stable_codes_and_append_unseen_values():
+    rows = [
+        {'category': 'tops', 'seasons': ['summer', 'spring']},
+        {'category': 'shoes', 'seasons': []},
+        {'category': None, 'seasons': ['monsoon']}
+    ]
+    vocabulary = {'category': ['tops', 'bottoms'], 'seasons': ['spring', 'summer'], 'unused': ['x']}
+
+    encoded = encode_columnar(rows, vocabulary)
+
+    assert encoded['columns']['category'] == [0, 2, None]
+    assert encoded['columns']['seasons'] == [[1, 0], [], [2]]
+    assert encoded['dictionaries'] == {
+        'category': ['tops', 'bottoms', 'shoes'],
+        'seasons': ['spring', 'summer', 'monsoon']
+    }
+    # The caller's vocabulary is not mutated
+    assert vocabulary['category'] == ['tops', 'bottoms']
+
+def test_empty_listing():
+    assert encode_columnar([], {'category': ['tops']}) == {'count': 0, 'columns': {}, 'dictionaries': {}}
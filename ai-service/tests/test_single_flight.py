@@ -0,0 +1,110 @@
+"""
+Single-flight - concurrent identical calls share one computation
+"""
+
+import asyncio
+
+import pytest
+
+from src.services.single_flight import SingleFlight
+
+def test_concurrent_callers_share_one_execution():
+    async def scenario():
+        flight = SingleFlight('test')
+        runs = []
+
+        async def compute():
+            runs.append(1)
+            await asyncio.sleep(0.02)
+            return {'value': 7}
+
+        results = await asyncio.gather(*(flight.do('key', compute) for _ in range(10)))
+        return results, runs, flight.stats()
+
+    results, runs, stats = asyncio.run(scenario())
+    assert runs == [1]
+    assert all(result is results[0] for result in results)
+    assert stats == {'calls': 10, 'executions': 1, 'coalesced': 9, 'in_flight': 0}
+
+def test_nothing_is_cached_after_completion_and_keys_are_independent():
+    async def scenario():
+        flight = SingleFlight('test')
+        counter = iter(range(100))
+
+        async def compute():
+            return next(counter)
+
+        return [await flight.do('a', compute), await flight.do('a', compute), await flight.do('b', compute)]
+
+    assert asyncio.run(scenario()) == [0, 1, 2]
+
+def test_errors_reach_every_waiter():
+    async def scenario():
+        flight = SingleFlight('test')
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError('bad input')
+
+        return await asyncio.gather(*(flight.do('key', fail) for _ in range(3)), return_exceptions=True)
+
+    errors = asyncio.run(scenario())
+    assert [type(error) for error in errors] == [ValueError] * 3
+
+def test_cancelled_caller_does_not_cancel_the_shared_work():
+    async def scenario():
+        flight = SingleFlight('test')
+
+        async def compute():
+            await asyncio.sleep(0.03)
+            return 'done'
+
+        leaver = asyncio.create_task(flight.do('key', compute))
+        stayer = asyncio.create_task(flight.do('key', compute))
+        await asyncio.sleep(0.01)
+        leaver.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leaver
+        return await stayer
+
+    assert asyncio.run(scenario()) == 'done'
+
+def test_admission_is_charged_only_to_the_caller_that_starts_the_run():
+    async def scenario():
+        flight = SingleFlight('test')
+        charges = []
+
+        async def admit():
+            charges.append(1)
+
+        async def compute():
+            await asyncio.sleep(0.03)
+            return 'done'
+
+        leader = asyncio.create_task(flight.do('key', compute, admit=admit))
+        await asyncio.sleep(0.01)
+        joiners = [flight.do('key', compute, admit=admit) for _ in range(4)]
+        return await asyncio.gather(leader, *joiners), charges
+
+    results, charges = asyncio.run(scenario())
+    assert results == ['done'] * 5
+    assert charges == [1]
+
+def test_rejected_admission_starts_no_run():
+    async def scenario():
+        flight = SingleFlight('test')
+        runs = []
+
+        async def reject():
+            raise PermissionError('over budget')
+
+        async def compute():
+            runs.append(1)
+
+        with pytest.raises(PermissionError):
+            await flight.do('key', compute, admit=reject)
+        return runs, flight.stats()
+
+    runs, stats = asyncio.run(scenario())
+    assert runs == []
+    assert stats['executions'] == 0 and stats['in_flight'] == 0
@@ -0,0 +1,48 @@
+"""
+Texture analysis - pattern labels on synthetic fixtures and the per-image cost budget
+"""
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.services.texture_analysis import (TEXTURE_BUDGET_MS, analyze_texture,
+                                           benchmark_texture_analysis)
+
+SIZE = 512
+
+def _rgb(gray: np.ndarray) -> Image.Image:
+    return Image.fromarray(np.repeat(gray.astype(np.uint8)[..., np.newaxis], 3, axis=2))
+
+def _stripes(period: int = 32) -> np.ndarray:
+    row = (np.arange(SIZE) // (period // 2)) % 2 * 200 + 30
+    return np.tile(row, (SIZE, 1))
+
+def _checks(period: int = 32) -> np.ndarray:
+    cells = np.arange(SIZE) // (period // 2)
+    return (cells[:, np.newaxis] + cells[np.newaxis, :]) % 2 * 200 + 30
+
+def test_vertical_stripes():
+    result = analyze_texture(_rgb(_stripes()))
+    assert result['type'] == 'striped'
+    assert result['details'] == ['geometric', 'vertical']
+
+def test_horizontal_stripes():
+    result = analyze_texture(_rgb(_stripes().T))
+    assert result['type'] == 'striped'
+    assert result['details'] == ['geometric', 'horizontal']
+
+def test_checks():
+    assert analyze_texture(_rgb(_checks()))['type'] == 'checked'
+
+def test_solid():
+    assert analyze_texture(_rgb(np.full((SIZE, SIZE), 120)))['type'] == 'solid'
+
+def test_smooth_shading_is_solid():
+    gradient = np.tile(np.linspace(60, 180, SIZE), (SIZE, 1))
+    assert analyze_texture(_rgb(gradient))['type'] == 'solid'
+
+@pytest.mark.perf
+def test_median_within_budget():
+    result = benchmark_texture_analysis(iterations=30)
+    assert result['median_ms'] < TEXTURE_BUDGET_MS, result
@@ -113,6 +113,8 @@ router.post('/from-photo',
 			const response = await axios.post(`${AI_SERVICE_URL}/api/avatars/create`, form, {
 				headers: {
 					...form.getHeaders(),
+					// Lets the AI service rate-limit the authenticated caller
+					...(req.headers.authorization && { Authorization: req.headers.authorization }),
 				},
 				timeout: 30000 // 30 second timeout
 			})
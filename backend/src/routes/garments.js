@@ -108,6 +108,8 @@ router.post('/upload',
 			const response = await axios.post(`${AI_SERVICE_URL}/api/garments/upload`, form, {
 				headers: {
 					...form.getHeaders(),
+					// Lets the AI service rate-limit the authenticated caller
+					...(req.headers.authorization && { Authorization: req.headers.authorization }),
 				},
 				timeout: 30000 // 30 second timeout
 			})